@@ -1,27 +1,141 @@
-import os
 import time
-import requests
+
+# Startup is measured from here, before any other import
+_STARTED = time.perf_counter()
+
+import argparse
+import json
+import os
+import random
+import signal
+import threading
+from itertools import islice
 from pathlib import Path
-import pyautogui
-import pygetwindow as gw
-from botcity.core import DesktopBot
-from src.logger.custom_logger import CustomLoggerTracker
-from tqdm import tqdm
+from src import profiler
+from src.backends import BACKENDS, create_backend
+from src.fetcher import DEFAULT_API_URL, FetchError, PostFetcher
+from src.gui_driver import FailSafeTriggered, PyAutoGuiDriver
+from src.gui_workers import DisplayError, GuiWorkerPool
+from src.http_cache import ResponseCache
+from src.journal import CORRUPT, FAILED, PROCESSED, RunJournal
+from src.logger.custom_logger import get_logger, get_tracker, shutdown_logging
+from src.metrics import PhaseMetrics, timed
+from src.packed_store import PackedStore
+from src.parallel import ParallelExecutor
+from src.pipeline import Pipeline
+from src.profiler import SamplingProfiler
+from src.retry import UNKNOWN, VERIFICATION, WRITE, CircuitBreaker, RetryQueue, classify_exception
+from src.screen_state import CONFIRM_SAVE, EDITOR_READY, ERROR_DIALOG, SAVE_DIALOG
+from src.selection import IdSet, PostSelector
+from src.sources import FILE_SOURCES, HttpSource, SourceError, open_source, parse_field_map
+from src.typing_speed import TypingSpeedController
+from src.verifier import OK, OutputVerifier
+from src.watch import FingerprintIndex
+from src.waits import PyGetWindowProvider, WaitEngine, XdotoolWindowProvider
 import traceback
 import sys
 
-# Create an instance first
-logger_tracker = CustomLoggerTracker()
-
-# Get a logger for the registration module
-logger = logger_tracker.get_logger("main")
-
-
-class NotepadBot(DesktopBot):
-    def __init__(self):
-        super().__init__()
+# pyautogui, pygetwindow, botcity, requests and tqdm are imported when first
+# needed, so commands that do not drive the desktop start quickly
+
+# Get a logger for the main module, logging is set up by the first record
+logger = get_logger("main")
+
+DEFAULT_OUTPUT_DIR = Path.home() / "PycharmProjects/autoE_2DA" / "temp" / "tjm-project"
+
+# Seconds from the start of the import of this module until the command runs
+STARTUP_BUDGET = 0.2
+
+
+class NotepadBot:
+    def __init__(self, backend="notepad", api_url=DEFAULT_API_URL, limit=10, page_size=50, fetch_workers=4,
+                 input_mode="type", paste_min_chars=64, editor_sessions=1, selector=None,
+                 workers=1, use_threads=False, resume=False, journal_sync_every=1,
+                 use_cache=True, cache_ttl=0, offline=False, metrics_prometheus=False, output_dir=None,
+                 input_file=None, field_map=None, sql_query=None, queue_size=64, pack_segment_mb=256,
+                 pack_sync_every=100, verify=False, repair_attempts=2, typing_speed="adaptive",
+                 typing_settings=None, typing_bounds=None, editor_command="notepad.exe", gui_workers=1,
+                 display_start=99, display_size="1280x1024x24", worker_restarts=3,
+                 screen_templates=None, launch_attempts=1, max_retries=3, retry_delay=2.0, retry_max_delay=60.0,
+                 breaker_window=20, breaker_threshold=0.5, breaker_min_samples=10, breaker_cooldown=30.0,
+                 breaker_action="pause", fallback_backend="headless"):
+        # Latency of every phase of the run, written next to the summary report
+        self.metrics = PhaseMetrics()
+        self.metrics_prometheus = metrics_prometheus
+        self.output_dir = output_dir
         self.desktop_path = None
         self.logs_path = None
+        self.limit = limit
+        # How text reaches Notepad: "type" sends keystrokes, "paste" goes through the clipboard
+        self.input_mode = input_mode
+        self.paste_min_chars = paste_min_chars
+        # Keyboard, clipboard and launching, and the window list, of the desktop being driven
+        self.driver = PyAutoGuiDriver(self)
+        # pygetwindow does not support X11, xdotool lists the windows there (e.g. on Xvfb)
+        self.windows = XdotoolWindowProvider() if sys.platform.startswith("linux") else PyGetWindowProvider()
+        self.editor_command = editor_command
+        self.waiter = WaitEngine(self.windows)
+        # Image templates of the screen states, used instead of window titles once loaded by the backend
+        self.screen_templates = screen_templates
+        self.screen = None
+        self.clipboard_available = None
+        # Characters per second spent entering each post, by post ID
+        self.input_rates = {}
+        # Number of Notepad windows kept open for the run, 0 launches one per post
+        self.editor_sessions = editor_sessions
+        # Decides which fetched posts are processed, all of them by default
+        self.selector = selector or PostSelector()
+        # Parallel workers for backends that support concurrent writes
+        self.workers = workers
+        self.use_threads = use_threads
+        # Outcome of every post, kept in logs_path, and whether to skip posts it marks as done
+        self.journal = None
+        self.resume = resume
+        self.journal_sync_every = journal_sync_every
+        self.backend = create_backend(backend, self)
+        # Per-key interval and pause after every GUI action, learned per host unless fixed
+        self.typing = TypingSpeedController(adaptive=typing_speed == "adaptive" and self.backend.name == "notepad",
+                                            bounds=typing_bounds)
+        self.typing_settings = typing_settings
+        # Notepad worker processes, each on its own virtual display, and how often one is restarted
+        self.gui_workers = gui_workers
+        self.display_start = display_start
+        self.display_size = display_size
+        self.worker_restarts = worker_restarts
+        # Watch mode: fingerprints of the posts written by earlier cycles, and the graceful stop request
+        self.fingerprints = None
+        self.stop_requested = threading.Event()
+        self.fetcher = PostFetcher(base_url=api_url, page_size=page_size, max_workers=fetch_workers,
+                                   offline=offline)
+        # API responses are cached under desktop_path once the directories exist
+        self.use_cache = use_cache or offline
+        self.cache_ttl = cache_ttl
+        # JSON, JSONL, CSV or SQLite file read instead of the API, and how its fields map onto posts
+        self.input_file = input_file
+        self.field_map = field_map
+        self.sql_query = sql_query
+        # Posts fetched and rendered ahead of the one being written
+        self.queue_size = queue_size
+        # Segment size and fsync cadence of the packed backend
+        self.pack_segment_mb = pack_segment_mb
+        self.pack_sync_every = pack_sync_every
+        # Check every saved file against its post, and how often corrupted posts are written again
+        self.verify = verify
+        self.repair_attempts = repair_attempts
+        self.verifier = OutputVerifier()
+        # Why the last post failed (see src/retry.py), and how often Notepad is launched before giving a post up
+        self.failure = None
+        self.launch_attempts = launch_attempts
+        # Failed posts are deferred with backoff, and a burst of failures opens the circuit breaker
+        self.retry_options = {"max_retries": max_retries, "base_delay": retry_delay, "max_delay": retry_max_delay}
+        self.breaker_options = {"window": breaker_window, "threshold": breaker_threshold,
+                                "min_samples": breaker_min_samples, "cooldown": breaker_cooldown}
+        self.retries = RetryQueue(**self.retry_options)
+        self.breaker = CircuitBreaker(**self.breaker_options)
+        # What to do when the breaker opens: "pause", "switch" to the fallback backend or "stop"
+        self.breaker_action = breaker_action
+        self.fallback_backend = fallback_backend
+        self.switched_from = None
 
     def find_window_by_title(self, title, partial=False, timeout=5):
         """
@@ -34,31 +148,37 @@ class NotepadBot(DesktopBot):
         Returns:
             bool: True if window found, False otherwise
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                windows = gw.getWindowsWithTitle(title)
-                if windows:
-                    if partial:
-                        return True
-                    else:
-                        # Check for exact match
-                        for window in windows:
-                            if window.title == title:
-                                return True
-                time.sleep(0.2)
-            except Exception as e:
-                logger.error(f"Error finding window '{title}': {str(e)}")
-                return False
+        if self.waiter.wait_for_window([title], partial=partial, timeout=timeout):
+            return True
 
         logger.warning(f"Window '{title}' not found after {timeout} seconds")
         return False
 
+    def wait_for_screen(self, state, title, partial=False, timeout=5):
+        """
+        Wait for a screen state by its image template, or for its window title without one
+
+        Args:
+            state (str): Screen state, see src/screen_state.py
+            title (str): Title of the window showing the state, the fallback
+            partial (bool): Allow partial title matches
+            timeout (int): Maximum time to wait in seconds
+
+        Returns:
+            bool: True if the state was reached, False otherwise
+        """
+        if self.screen is not None and state in self.screen:
+            if self.screen.wait_for(state, timeout):
+                return True
+            logger.warning(f"Screen state '{state}' not detected after {timeout} seconds")
+            return False
+        return self.find_window_by_title(title, partial=partial, timeout=timeout)
+
     def initialize_directories(self):
         """Set up necessary directories for files and logs"""
         try:
             # Create directory for saving files if it doesn't exist
-            self.desktop_path = Path.home() / "PycharmProjects/autoE_2DA" / "temp" / "tjm-project"
+            self.desktop_path = Path(self.output_dir) if self.output_dir else DEFAULT_OUTPUT_DIR
             self.desktop_path.mkdir(parents=True, exist_ok=True)
 
             # Create logs directory
@@ -73,58 +193,36 @@ class NotepadBot(DesktopBot):
             logger.debug(traceback.format_exc())
             return False
 
-    def fetch_posts(self, limit=10, retry_count=3, timeout=10):
+    def open_source(self):
         """
-        Fetch posts from the API with retry logic
-
-        Args:
-            limit (int): Maximum number of posts to fetch
-            retry_count (int): Number of retry attempts
-            timeout (int): Request timeout in seconds
+        Create the record source of the run
 
         Returns:
-            list: List of posts or empty list if failed
+            RecordSource: The input file, or the API read through the response cache
         """
-        posts = []
-        attempt = 0
-
-        while attempt < retry_count:
-            try:
-                logger.info(f"Fetching posts from JSONPlaceholder API (attempt {attempt + 1}/{retry_count})...")
-                response = requests.get("https://jsonplaceholder.typicode.com/posts", timeout=timeout)
-
-                if response.status_code == 200:
-                    posts = response.json()
-                    # Limit to the specified number of posts
-                    posts = posts[:limit]
-                    logger.info(f"Successfully fetched {len(posts)} posts")
-                    return posts
-                else:
-                    logger.error(f"API returned status code {response.status_code}")
-            except requests.exceptions.Timeout:
-                logger.error(f"Request timed out (attempt {attempt + 1}/{retry_count})")
-            except requests.exceptions.ConnectionError:
-                logger.error(f"Connection error (attempt {attempt + 1}/{retry_count})")
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request failed: {str(e)} (attempt {attempt + 1}/{retry_count})")
-            except Exception as e:
-                logger.error(f"Unexpected error fetching posts: {str(e)}")
-                logger.debug(traceback.format_exc())
-
-            attempt += 1
-            if attempt < retry_count:
-                # Exponential backoff: 1s, 2s, 4s, etc.
-                wait_time = 2 ** (attempt - 1)
-                logger.info(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-
-        logger.error("All attempts to fetch posts failed")
-        return []
-
-    def launch_notepad(self, retry_count=3):
+        if self.input_file:
+            logger.info(f"Reading posts from {self.input_file}")
+            return open_source(self.input_file, field_map=self.field_map, query=self.sql_query)
+        if self.use_cache:
+            self.fetcher.cache = ResponseCache(self.desktop_path / "cache" / "http", ttl=self.cache_ttl)
+        logger.info(f"Streaming posts from {self.fetcher.base_url} "
+                    f"({self.fetcher.max_workers} concurrent requests of up to {self.fetcher.page_size} posts)...")
+        return HttpSource(self.fetcher, limit=self.limit, field_map=self.field_map)
+
+    def iter_posts(self):
+        """Lazily yield up to ``limit`` posts from the record source, timing every read as ``fetch_posts``"""
+        source = self.open_source()
+        return self.metrics.timed_iter(islice(source, self.limit) if self.limit else source, "fetch_posts")
+
+    @timed("launch_notepad")
+    def launch_notepad(self, retry_count=3, close_existing=True):
         """
         Launch Notepad with retry logic
 
+        Args:
+            retry_count (int): Number of launch attempts
+            close_existing (bool): Close other Notepad windows before launching
+
         Returns:
             bool: True if Notepad launched successfully, False otherwise
         """
@@ -133,34 +231,22 @@ class NotepadBot(DesktopBot):
                 logger.info(f"Launching Notepad (attempt {attempt + 1}/{retry_count})...")
 
                 # Close any existing Notepad instances to avoid confusion
-                self.close_all_notepads()
-                time.sleep(0.5)
-
-                # Try different methods to launch Notepad
-                if attempt == 0:
-                    # First try using botcity
-                    self.execute("notepad.exe")
-                elif attempt == 1:
-                    # Second try using os.system
-                    os.system("start notepad.exe")
-                else:
-                    # Last try using subprocess
-                    import subprocess
-                    subprocess.Popen(["notepad.exe"], shell=True)
+                if close_existing or attempt > 0:
+                    self.close_all_notepads()
 
-                # Wait for Notepad to open with increasing patience
-                wait_time = 1 + attempt
-                logger.info(f"Waiting {wait_time} seconds for Notepad to open...")
-                time.sleep(wait_time)
+                # Try a different method to launch Notepad on each attempt
+                self.driver.launch(self.editor_command, attempt)
 
-                # Check if Notepad is open
-                if self.find_window_by_title("Untitled - Notepad", timeout=3):
+                # Wait for Notepad to open with increasing patience
+                if self.wait_for_screen(EDITOR_READY, "Untitled - Notepad", timeout=4 + attempt):
                     logger.info("Notepad launched successfully")
                     # Make Notepad the active window
-                    notepad_windows = gw.getWindowsWithTitle("Untitled - Notepad")
+                    notepad_windows = self.windows.get_windows("Untitled - Notepad")
                     if notepad_windows:
                         notepad_windows[0].activate()
-                        time.sleep(0.5)
+                        if not self.waiter.wait_for_active_window("Untitled - Notepad", timeout=1):
+                            logger.warning("Notepad did not report focus, continuing anyway")
+                            self.typing.record_focus_loss()
                         logger.info("Notepad activated")
                         return True
             except Exception as e:
@@ -170,10 +256,11 @@ class NotepadBot(DesktopBot):
         logger.error("All attempts to launch Notepad failed")
         return False
 
+    @timed("close_all_notepads")
     def close_all_notepads(self):
         """Close all open Notepad windows"""
         try:
-            notepad_windows = gw.getWindowsWithTitle("Notepad")
+            notepad_windows = self.windows.get_windows("Notepad")
             for window in notepad_windows:
                 try:
                     window.close()
@@ -181,98 +268,236 @@ class NotepadBot(DesktopBot):
                 except Exception as e:
                     logger.warning(f"Failed to close Notepad window: {str(e)}")
 
-            # Give windows time to close
-            time.sleep(0.5)
+            # Wait for the windows to be gone
+            if notepad_windows and not self.waiter.wait_for_window_closed("Notepad", partial=True, timeout=2):
+                logger.warning("Some Notepad windows are still open")
         except Exception as e:
             logger.error(f"Error closing Notepad windows: {str(e)}")
 
-    def safe_type(self, text, interval=0.01):
-        """Type text safely with error handling"""
+    @timed("safe_type")
+    def safe_type(self, text, interval=None):
+        """Type text safely with error handling, with the controller's interval by default"""
         try:
-            pyautogui.write(text, interval=interval)
+            self.driver.write(text, interval=self.typing.interval if interval is None else interval)
             return True
         except Exception as e:
             logger.error(f"Error typing text: {str(e)}")
             return False
 
+    @timed("safe_paste")
+    def safe_paste(self, text):
+        """Paste text through the clipboard with error handling"""
+        try:
+            # Notepad stores a typed Enter as CRLF, paste the same line endings
+            self.driver.copy(text.replace("\r\n", "\n").replace("\n", "\r\n"))
+            self.driver.hotkey('ctrl', 'v')
+            return True
+        except Exception as e:
+            logger.warning(f"Clipboard unavailable, falling back to typing: {str(e)}")
+            self.clipboard_available = False
+            return False
+
+    def enter_text(self, text):
+        """
+        Enter text with the configured input mode
+
+        Strings shorter than paste_min_chars are typed, as is everything
+        once the clipboard has failed.
+
+        Returns:
+            bool: True if the text was entered, False otherwise
+        """
+        if self.clipboard_available is None:
+            self.clipboard_available = self.driver.clipboard_available
+        if (self.input_mode == "paste" and self.clipboard_available
+                and len(text) >= self.paste_min_chars and self.safe_paste(text)):
+            return True
+        return self.safe_type(text)
+
+    def record_input_rate(self, post_id, chars, elapsed):
+        """Record and log how fast the text of a post was entered"""
+        rate = chars / elapsed if elapsed > 0 else float("inf")
+        self.input_rates[post_id] = rate
+        logger.info(f"Entered {chars} characters for post {post_id} in {elapsed:.2f}s ({rate:.0f} chars/s)")
+
+    @timed("safe_hotkey")
     def safe_hotkey(self, *keys):
         """Press hotkey safely with error handling"""
         try:
-            pyautogui.hotkey(*keys)
+            self.driver.hotkey(*keys)
             return True
         except Exception as e:
             logger.error(f"Error pressing hotkey {keys}: {str(e)}")
             return False
 
 
+    @timed("safe_press")
     def safe_press(self, key):
         """Press key safely with error handling"""
         try:
-            pyautogui.press(key)
+            self.driver.press(key)
             return True
         except Exception as e:
             logger.error(f"Error pressing key {key}: {str(e)}")
             return False
 
-    def process_post(self, post):
+    @timed("process_post")
+    def process_post(self, post, rendered=None):
         """
         Process a single post by creating a text file with its content
 
         Args:
             post (dict): Post data
+            rendered: Document prepared ahead by the backend's render(), None to render it now
         Returns:
             bool: True if successful, False otherwise
         """
-        user_id = post["userId"]
         post_id = post["id"]
-        title = post["title"]
-        body = post["body"]
 
         logger.info(f"Processing post {post_id}...")
-
-        # Launch Notepad
-        if not self.launch_notepad():
-            logger.error(f"Failed to launch Notepad for post {post_id}")
-            return False
+        profiler.set_post(post_id)
+        self.failure = None
 
         try:
-            # Type the title in uppercase with underline
-            self.safe_type(f"{title.upper()}\n")
-            self.safe_type("=" * len(title) + "\n\n")
-
-            # Add metadata
-            self.safe_type(f"Post ID: {post_id}\n")
-            self.safe_type(f"User ID: {user_id}\n\n")
-
-            # Type the body text
-            self.safe_type(body)
-
-            # Add timestamp at the bottom
-            self.safe_type(f"\n\n---\nGenerated: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-            # Save the document
-            if not self.save_file(post_id):
+            if not self.backend.write_post(post, rendered):
+                if self.failure is None:
+                    self.failure = WRITE
                 return False
 
-            # Close Notepad
-            self.safe_hotkey('alt', 'f4')
-            time.sleep(1)
-
-            # Verify Notepad is closed
-            if self.find_window_by_title("Untitled - Notepad", timeout=2):
-                logger.warning("Notepad didn't close properly, forcing closure")
-                self.close_all_notepads()
-
             logger.info(f"Successfully processed post {post_id}")
             return True
 
         except Exception as e:
             logger.error(f"Error processing post {post_id}: {str(e)}")
             logger.debug(traceback.format_exc())
-            # Clean up
-            self.close_all_notepads()
+            self.failure = classify_exception(e)
             return False
+        finally:
+            profiler.set_post(None)
+
+    @timed("verify_post")
+    def verify_post(self, post):
+        """
+        Check the saved file of a post against the post, and record a mismatch in the journal
+
+        Args:
+            post (dict): Post data
+        Returns:
+            bool: True if the file matches the post (or the backend has no file per post), False otherwise
+        """
+        post_id = post["id"]
+        file_path = self.backend.output_path(post_id)
+        if file_path is None:
+            return True
+
+        return self.record_verification(post, self.verifier.verify(post, file_path))
+
+    def record_verification(self, post, result):
+        """
+        Log a failed verification and record it in the journal
+
+        Args:
+            post (dict): Post data
+            result (dict): Result of OutputVerifier.verify for the post
+        Returns:
+            bool: True if the file matched the post, False otherwise
+        """
+        post_id = post["id"]
+        if result["status"] == OK:
+            return True
 
+        if result.get("line"):
+            logger.warning(f"File of post {post_id} does not match the post from line {result['line']} "
+                           f"({result['actual_size']} bytes, {result['expected_size']} expected)")
+        else:
+            logger.warning(f"File of post {post_id} is {result['status']}: {result['file']}")
+        details = {key: result[key] for key in ("expected_sha256", "actual_sha256", "line") if key in result}
+        self.journal.record(post_id, CORRUPT, details={"verification": result["status"], **details})
+        return False
+
+    def repair_posts(self, posts):
+        """
+        Write corrupted posts again until their files verify, up to repair_attempts passes
+
+        Args:
+            posts (list): Posts whose files failed verification
+        Returns:
+            tuple: (IDs of the repaired posts, IDs of the posts still corrupted)
+        """
+        repaired = []
+        for attempt in range(self.repair_attempts):
+            if not posts:
+                break
+            logger.info(f"Repair pass {attempt + 1}/{self.repair_attempts}: rewriting {len(posts)} corrupted posts")
+            remaining = []
+            for post in posts:
+                post_id = post["id"]
+                success = self.process_post(post)
+                verified = success and self.verify_post(post)
+                if success:
+                    self.typing.record_post(verified)
+                if verified:
+                    logger.info(f"Repaired post {post_id}")
+                    repaired.append(post_id)
+                    self.journal.record(post_id, PROCESSED, self.backend.output_path(post_id))
+                else:
+                    remaining.append(post)
+            posts = remaining
+        return repaired, [post["id"] for post in posts]
+
+    def verify_outputs(self, repair=False):
+        """
+        Verify the files of a previous run against the posts of the source, without writing anything
+
+        Mismatches are recorded in the journal and in verification_<time>.jsonl;
+        with ``repair`` only the corrupted and missing posts are written again.
+
+        Returns:
+            int: Number of posts whose file is still missing or corrupted
+        """
+        if not self.initialize_directories():
+            logger.critical("Failed to initialize directories, exiting")
+            return -1
+
+        self.journal = RunJournal(self.logs_path / "run_journal.jsonl", sync_every=self.journal_sync_every)
+        report_path = self.logs_path / f"verification_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        checked = 0
+        corrupted = []
+        try:
+            with open(report_path, "w", encoding="utf-8") as report:
+                for post in self.iter_posts():
+                    if not self.selector.matches(post):
+                        continue
+                    checked += 1
+                    if not self.verify_post(post):
+                        # Only the corrupted posts are kept for the repair pass
+                        corrupted.append(post)
+                        report.write(json.dumps(self.journal.index[post["id"]]) + "\n")
+        except (FetchError, SourceError) as e:
+            logger.error(f"Stopped reading posts: {str(e)}")
+        logger.info(f"Verified {checked} posts, {len(corrupted)} missing or corrupted, see {report_path}")
+
+        remaining = [post["id"] for post in corrupted]
+        if repair and corrupted:
+            if not self.backend.setup():
+                logger.critical(f"Failed to set up the {self.backend.name} backend, cannot repair")
+            else:
+                try:
+                    repaired, remaining = self.repair_posts(corrupted)
+                    logger.info(f"Repaired {len(repaired)} posts, {len(remaining)} still corrupted")
+                except FailSafeTriggered:
+                    logger.critical("PyAutoGUI failsafe triggered, stopping the repair")
+                finally:
+                    try:
+                        self.backend.teardown()
+                    except FailSafeTriggered:
+                        logger.warning("PyAutoGUI failsafe still active, leaving the Notepad windows open")
+        self.journal.close()
+        if remaining:
+            logger.warning(f"Posts still missing or corrupted: {', '.join(map(str, remaining[:50]))}")
+        return len(remaining)
+
+    @timed("save_file")
     def save_file(self, post_id):
         """
         Save the current Notepad file
@@ -291,37 +516,50 @@ class NotepadBot(DesktopBot):
             # Save using keyboard shortcuts
             logger.info(f"Saving file to: {file_path}")
             self.safe_hotkey('ctrl', 's')
-            time.sleep(1)
 
-            # Check if Save dialog is open
-            if not self.find_window_by_title("Save As", partial=True, timeout=3):
+            # Check if Save dialog is open, how long it takes tells how busy the desktop is
+            started = time.perf_counter()
+            if not self.wait_for_screen(SAVE_DIALOG, "Save As", partial=True, timeout=4):
                 logger.error("Save dialog did not appear")
+                self.typing.record_dialog(time.perf_counter() - started, timed_out=True)
                 return False
+            self.typing.record_dialog(time.perf_counter() - started)
 
             # Type the file path
-            self.safe_type(str(file_path))
-            time.sleep(0.5)
+            self.enter_text(str(file_path))
 
             # Press Save button
             self.safe_press('enter')
-            time.sleep(1)
-
-            # Handle "File already exists" dialog
-            if self.find_window_by_title("Confirm Save As", timeout=2):
-                logger.info("File already exists - handling confirmation dialog")
-                self.safe_press('left')  # Select "Yes"
-                self.safe_press('enter')
-                time.sleep(1)
-
-            # Handle other potential dialogs
-            for _ in range(3):  # Try up to 3 times
-                if self.find_window_by_title("Error", timeout=1) or self.find_window_by_title("Warning", timeout=1):
+
+            def save_outcome():
+                # The templates see a dialog as soon as it is drawn, its title may come first
+                if self.screen is not None:
+                    detected = self.screen.detect([CONFIRM_SAVE, ERROR_DIALOG])
+                    if detected:
+                        return "Confirm Save As" if detected[0] == CONFIRM_SAVE else "Error"
+                # Look for every dialog the save can raise in a single pass
+                dialog = self.waiter.find_window(["Confirm Save As", "Error", "Warning"])
+                if dialog:
+                    return dialog
+                if self.waiter.find_window(["Save As"], partial=True) is None:
+                    return "closed"
+                return None
+
+            # Handle "File already exists" and other potential dialogs, up to 3 times
+            for _ in range(3):
+                outcome = self.waiter.wait_until(save_outcome, timeout=5, description="Save dialog outcome")
+                if outcome == "Confirm Save As":
+                    logger.info("File already exists - handling confirmation dialog")
+                    self.safe_press('left')  # Select "Yes"
+                    self.safe_press('enter')
+                elif outcome in ("Error", "Warning"):
                     logger.warning("Error or warning dialog detected - attempting to dismiss")
                     self.safe_press('enter')  # Try to dismiss dialog
-                    time.sleep(0.5)
+                else:
+                    break
 
             # Verify the file was created
-            if file_path.exists():
+            if self.waiter.wait_for_file(file_path, timeout=3):
                 logger.info(f"File verified at: {file_path}")
                 return True
             else:
@@ -333,14 +571,19 @@ class NotepadBot(DesktopBot):
             logger.debug(traceback.format_exc())
             return False
 
-    def write_summary_report(self, posts, processed_posts, skipped_posts):
+    def write_summary_report(self, fetched, processed_posts, skipped_posts, resumed_posts=None,
+                             corrupted_posts=None, repaired_posts=None, workers=None):
         """
         Write a summary report of the processing run
 
         Args:
-            posts (list): All posts that were fetched
+            fetched (int): Number of posts that were fetched
             processed_posts (list): IDs of successfully processed posts
             skipped_posts (list): IDs of skipped posts
+            resumed_posts (list): IDs of posts already done by a previous run
+            corrupted_posts (list): IDs of posts whose saved file failed verification
+            repaired_posts (list): IDs of the corrupted posts a repair pass fixed
+            workers (list): Stats of the GUI worker processes, when posts were spread across displays
         """
         try:
             summary_path = self.logs_path / f"summary_report_{time.strftime('%Y%m%d_%H%M%S')}.txt"
@@ -348,9 +591,45 @@ class NotepadBot(DesktopBot):
             with open(summary_path, 'w') as f:
                 f.write("=== NOTEPAD BOT SUMMARY REPORT ===\n\n")
                 f.write(f"Date and Time: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total posts fetched: {len(posts)}\n")
+                f.write(f"Total posts fetched: {fetched}\n")
                 f.write(f"Posts processed: {len(processed_posts)}\n")
-                f.write(f"Posts skipped: {len(skipped_posts)}\n\n")
+                f.write(f"Posts skipped: {len(skipped_posts)}\n")
+                if resumed_posts:
+                    f.write(f"Posts already done (resumed): {len(resumed_posts)}\n")
+                if corrupted_posts:
+                    f.write(f"Files failing verification: {len(corrupted_posts)} "
+                            f"({len(repaired_posts or [])} repaired)\n")
+                f.write("\n")
+
+                if self.input_rates:
+                    rates = list(self.input_rates.values())
+                    f.write(f"Input mode: {self.input_mode}\n")
+                    f.write(f"Average input rate: {sum(rates) / len(rates):.0f} chars/s\n")
+                    mode = f"adaptive, {self.typing.adjustments} adjustments" if self.typing.adaptive else "fixed"
+                    f.write(f"Key interval: {self.typing.interval * 1000:.1f} ms, "
+                            f"pause: {self.typing.pause * 1000:.0f} ms ({mode})\n\n")
+
+                if self.screen is not None and self.screen.stats:
+                    f.write("Screen state checks:\n")
+                    for state, stats in self.screen.summary().items():
+                        f.write(f"  {state}: {stats['checks']} checks, {stats['matches']} matches, "
+                                f"{stats['mean_ms']:.1f} ms per check\n")
+                    f.write("\n")
+
+                retries = self.retries.stats()
+                if retries["failures"] or self.breaker.trips:
+                    f.write("=== RETRIES ===\n")
+                    f.write("Failures by cause: " + ", ".join(
+                        f"{category} {count}" for category, count in sorted(retries["failures"].items())) + "\n")
+                    f.write(f"Deferred: {retries['deferred']}, retried: {retries['retried']}, "
+                            f"recovered: {retries['recovered']}, given up: {retries['given_up']}\n")
+                    f.write(f"Circuit breaker trips: {self.breaker.trips}, paused {self.breaker.paused:.1f}s")
+                    if self.switched_from:
+                        f.write(f", switched from the {self.switched_from} to the {self.backend.name} backend")
+                    f.write("\n")
+                    if retries["given_up"]:
+                        f.write("Posts given up are journaled as failed, run again with --resume to retry them\n")
+                    f.write("\n")
 
                 f.write("Processing success rate: {:.1f}%\n\n".format(
                     len(processed_posts) / (len(processed_posts) + len(skipped_posts)) * 100 if
@@ -368,8 +647,17 @@ class NotepadBot(DesktopBot):
                 # Add system info
                 f.write("\n=== SYSTEM INFORMATION ===\n")
                 f.write(f"Python version: {sys.version}\n")
-                f.write(f"PyAutoGUI version: {pyautogui.__version__}\n")
-                f.write(f"PyGetWindow version: {gw.__version__}\n")
+                f.write(f"Output backend: {self.backend.name}\n")
+                if self.backend.name == "notepad" and self.gui_workers <= 1:
+                    f.write(f"PyAutoGUI version: {self.driver.version}\n")
+                    f.write(f"PyGetWindow version: {self.windows.version}\n")
+
+                if workers:
+                    f.write("\n=== GUI WORKERS ===\n")
+                    for stats in workers:
+                        f.write(f"Worker {stats['worker']} (display {stats['display'] or 'inherited'}): "
+                                f"{stats['posts']} posts, {stats['steals']} stolen, {stats['restarts']} restarts"
+                                f"{', retired' if stats['retired'] else ''}\n")
 
             logger.info(f"Summary report saved to {summary_path}")
             return True
@@ -378,6 +666,33 @@ class NotepadBot(DesktopBot):
             logger.debug(traceback.format_exc())
             return False
 
+    def write_metrics_report(self):
+        """Write the per-phase latency histograms as JSON, and optionally in Prometheus format"""
+        try:
+            metrics_path = self.logs_path / f"metrics_{time.strftime('%Y%m%d_%H%M%S')}.json"
+            self.metrics.write_json(metrics_path)
+            logger.info(f"Metrics saved to {metrics_path}")
+            if self.metrics_prometheus:
+                prometheus_path = metrics_path.with_suffix(".prom")
+                self.metrics.write_prometheus(prometheus_path)
+                logger.info(f"Prometheus metrics saved to {prometheus_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write metrics report: {str(e)}")
+            logger.debug(traceback.format_exc())
+            return False
+
+    def gui_worker_options(self):
+        """Arguments of the NotepadBot of each GUI worker process (see create_gui_worker)"""
+        return {
+            "backend": "notepad", "limit": None, "use_cache": False, "output_dir": str(self.desktop_path),
+            "input_mode": self.input_mode, "paste_min_chars": self.paste_min_chars,
+            "editor_sessions": self.editor_sessions, "editor_command": self.editor_command,
+            "verify": self.verify, "typing_speed": "adaptive" if self.typing.adaptive else "fixed",
+            "typing_settings": self.typing_settings, "typing_bounds": self.typing.bounds,
+            "screen_templates": self.screen_templates, "launch_attempts": self.launch_attempts,
+        }
+
     def action(self, execution=None):
         """Main bot action method"""
         # Initialize directories
@@ -385,84 +700,822 @@ class NotepadBot(DesktopBot):
             logger.critical("Failed to initialize directories, exiting")
             return
 
-        # Fetch posts from the API
-        posts = self.fetch_posts(limit=10)
-        if not posts:
-            logger.error("No posts to process, exiting")
+        from tqdm import tqdm
+
+        # Open the run journal, when resuming posts whose output is intact are skipped
+        self.journal = RunJournal(self.logs_path / "run_journal.jsonl", sync_every=self.journal_sync_every)
+        if self.resume:
+            self.journal.load()
+
+        # Prepare the output backend, GUI worker processes prepare their own Notepad
+        gui_parallel = self.gui_workers > 1 and self.backend.name == "notepad"
+        if not gui_parallel and not self.backend.setup():
+            logger.critical(f"Failed to set up the {self.backend.name} backend, exiting")
             return
 
-        # Track processed posts
+        if self.workers > 1 and not self.backend.parallel_safe:
+            logger.warning(f"The {self.backend.name} backend cannot run in parallel, processing posts one by one")
+        parallel = self.workers > 1 and self.backend.parallel_safe
+        if parallel and self.verify:
+            logger.warning("Files written by parallel workers are not verified, run the verify command afterwards")
+
+        # Track fetched, processed, skipped and resumed posts
+        counts = {"fetched": 0, "changed": 0}
         processed_posts = []
         skipped_posts = []
-
-        # Set up pyautogui safety
-        pyautogui.PAUSE = 0.1  # Add small pause between commands
-        pyautogui.FAILSAFE = True  # Enable failsafe
-
-        for post in tqdm(posts, desc="Processing posts", colour="green"):
-            user_id = post["userId"]
+        resumed_posts = []
+        # Posts the watch state records as written with the same content
+        unchanged_posts = []
+        # Posts saved with a file that does not match, written again after the main pass
+        corrupted_posts = []
+        repaired_posts = []
+        worker_stats = []
+        gui_pools = []
+        # Failures are retried once the posts behind them are done, and counted per run
+        self.retries = RetryQueue(**self.retry_options)
+        self.breaker = CircuitBreaker(**self.breaker_options)
+        original_backend = self.backend
+
+        def fail(post, category):
+            """Journal a failed post and defer it, or give it up"""
             post_id = post["id"]
-            title = post["title"]
-
-            # Ask user if they want to save this post
-            save_post = input(f"\nProcess post {post_id} with title: '{title}'? (y/n): ").strip().lower()
-            if save_post != 'y':  # Fixed logical error
-                logger.info(f"Skipping post {post_id}")
+            if not self.retries.record_failure(post, category):
                 skipped_posts.append(post_id)
-                continue
+            self.journal.record(post_id, FAILED,
+                                details={"failure": category, "attempts": self.retries.attempts[post_id]})
 
-            # Process the post
-            success = self.process_post(post)
+        def attempt(post, rendered):
+            """Write a post in this process and record its outcome"""
+            post_id = post["id"]
+            # A document rendered for a backend the breaker switched away from is rendered again
+            success = self.process_post(post, rendered if self.backend is original_backend else None)
+            verified = self.verify_post(post) if success and self.verify else None
             if success:
+                self.typing.record_post(verified)
+            if verified is False:
+                corrupted_posts.append(post)
+                self.retries.count(VERIFICATION)
+            elif success:
                 processed_posts.append(post_id)
+                self.retries.record_success(post_id)
+                self.journal.record(post_id, PROCESSED, self.backend.output_path(post_id))
             else:
-                skipped_posts.append(post_id)
+                fail(post, self.failure or UNKNOWN)
+            if self.breaker.record(bool(success) and verified is not False):
+                self.on_breaker_trip(can_switch=True)
+
+        def selected_posts(pipeline, progress):
+            """Select the posts to process, and skip those a previous run completed"""
+            for post, rendered in pipeline:
+                if self.stop_requested.is_set():
+                    logger.info("Stop requested, not starting any more posts")
+                    break
+                counts["fetched"] += 1
+                progress.update(1)
+                post_id = post["id"]
+                if not self.selector.accepts(post):
+                    logger.debug(f"Skipping post {post_id}")
+                    skipped_posts.append(post_id)
+                elif self.resume and self.backend.is_done(post_id, self.journal):
+                    resumed_posts.append(post_id)
+                elif self.fingerprints is not None and not self.is_changed(post):
+                    unchanged_posts.append(post_id)
+                else:
+                    counts["changed"] += 1
+                    yield post, rendered
 
-            # Small delay between iterations
-            time.sleep(1)
+        # Posts are read and rendered by the producer while earlier ones are written,
+        # so memory is bounded by the queue whatever the size of the source
+        pipeline = Pipeline(self.iter_posts(), prepare=None if parallel or gui_parallel else self.backend.render,
+                            queue_size=self.queue_size, metrics=self.metrics)
+        try:
+            with pipeline, tqdm(total=self.limit, desc="Processing posts", colour="green") as progress:
+                if parallel:
+                    # Posts being written by the workers, kept to defer those that fail
+                    in_flight = {}
+
+                    def tracked_posts():
+                        for post, _ in selected_posts(pipeline, progress):
+                            in_flight[post["id"]] = post
+                            yield post
+
+                    def on_shard(results):
+                        # The shard writer fingerprinted its files, the journal does not hash them again
+                        self.journal.record_many([(post_id, PROCESSED, self.backend.output_path(post_id), None,
+                                                   *file_fingerprint)
+                                                  for post_id, success, *file_fingerprint in results if success])
+                        for post_id, success, *_ in results:
+                            post = in_flight.pop(post_id, None)
+                            if not success and post is not None:
+                                fail(post, WRITE)
+
+                    executor = ParallelExecutor(workers=self.workers, use_threads=self.use_threads)
+                    with self.metrics.span("parallel_write"):
+                        processed, _ = executor.run_iter(tracked_posts(), self.backend.shard_writer(), on_shard)
+                    processed_posts.extend(processed)
+                    # The few failed posts are retried here, one by one
+                    for post in self.retries.drain(self.stop_requested):
+                        attempt(post, None)
+                elif gui_parallel:
+                    repairs = {}
+
+                    def on_result(post, result):
+                        """Journal the outcome of a post written by a GUI worker, True to write it again"""
+                        post_id = post["id"]
+                        if result.get("input_rate") is not None:
+                            self.input_rates[post_id] = result["input_rate"]
+                        if not result["success"]:
+                            fail(post, result.get("failure") or UNKNOWN)
+                            if self.breaker.record(False):
+                                self.on_breaker_trip()
+                            return False
+                        verification = result["verification"]
+                        if verification is None or self.record_verification(post, verification):
+                            processed_posts.append(post_id)
+                            self.retries.record_success(post_id)
+                            self.journal.record(post_id, PROCESSED, self.backend.output_path(post_id))
+                            if post_id in repairs:
+                                repaired_posts.append(post_id)
+                            self.breaker.record(True)
+                            return False
+                        if post_id not in repairs:
+                            corrupted_posts.append(post)
+                            self.retries.count(VERIFICATION)
+                        if self.breaker.record(False):
+                            self.on_breaker_trip()
+                        repairs[post_id] = repairs.get(post_id, 0) + 1
+                        if repairs[post_id] <= self.repair_attempts:
+                            return True
+                        skipped_posts.append(post_id)
+                        return False
+
+                    def new_pool():
+                        gui_pools.append(GuiWorkerPool(self.gui_workers, create_gui_worker, self.gui_worker_options(),
+                                                       display_start=self.display_start,
+                                                       display_size=self.display_size,
+                                                       max_restarts=self.worker_restarts, metrics=self.metrics))
+                        return gui_pools[-1]
+
+                    with self.metrics.span("gui_workers"):
+                        worker_stats = new_pool().run((post for post, _ in selected_posts(pipeline, progress)),
+                                                      on_result)
+                        # Deferred posts get fresh workers, a retry deferred again during a pass gets another one
+                        while len(self.retries) and not self.stop_requested.is_set():
+                            new_pool().run(self.retries.drain(self.stop_requested), on_result)
+                else:
+                    for post, rendered in selected_posts(pipeline, progress):
+                        attempt(post, rendered)
+
+                    # Failed posts no longer hold up the others, they are retried once every post was tried
+                    for post in self.retries.drain(self.stop_requested):
+                        attempt(post, None)
+
+                    if corrupted_posts:
+                        logger.warning(f"{len(corrupted_posts)} files do not match their post, repairing them")
+                        repaired_posts, still_corrupted = self.repair_posts(corrupted_posts)
+                        processed_posts.extend(repaired_posts)
+                        skipped_posts.extend(still_corrupted)
+        except FailSafeTriggered:
+            logger.critical("PyAutoGUI failsafe triggered (mouse moved to a screen corner), stopping the run")
+        except KeyboardInterrupt:
+            logger.critical("Interrupted, stopping the run")
+        except (FetchError, SourceError) as e:
+            logger.error(f"Stopped reading posts: {str(e)}")
+        except DisplayError as e:
+            logger.critical(f"Cannot start the virtual displays of the GUI workers: {str(e)}")
+
+        # Posts still deferred when the run stopped are journaled as failed, --resume retries them
+        abandoned = self.retries.abandon()
+        if abandoned:
+            logger.warning(f"Stopped with {len(abandoned)} posts still waiting for a retry")
+            skipped_posts.extend(abandoned)
+
+        fetched = counts["fetched"]
+        if not fetched:
+            logger.error("No posts to process, exiting")
+        if resumed_posts:
+            logger.info(f"Resuming run: {len(resumed_posts)} posts already done")
+
+        try:
+            if gui_parallel:
+                # Every worker shares the settings file of this host, what they learned is saved once, from here
+                self.typing.path = self.backend.typing_settings_path()
+                self.typing.load()
+                self.typing.merge(worker.typing for pool in gui_pools for worker in pool.workers)
+            self.backend.teardown()
+        except FailSafeTriggered:
+            logger.warning("PyAutoGUI failsafe still active, leaving the Notepad windows open")
+        self.journal.close()
+
+        outcome = {"fetched": fetched, "changed": counts["changed"], "processed": len(processed_posts),
+                   "skipped": len(skipped_posts), "unchanged": len(unchanged_posts)}
+        if self.fingerprints is not None:
+            self.fingerprints.commit(processed_posts)
+            if not counts["changed"]:
+                # A watch cycle without changes leaves no reports behind
+                logger.info(f"No new or changed posts among {fetched} fetched")
+                return outcome
 
         # Write summary report
-        self.write_summary_report(posts, processed_posts, skipped_posts)
+        self.write_summary_report(fetched, processed_posts, skipped_posts, resumed_posts,
+                                  [post["id"] for post in corrupted_posts], repaired_posts, worker_stats)
+        self.write_metrics_report()
 
         # Print final summary to terminal
         logger.info("\n=== PROCESSING COMPLETE ===")
-        logger.info(f"Total posts fetched: {len(posts)}")
+        logger.info(f"Total posts fetched: {fetched}")
         logger.info(f"Posts processed: {len(processed_posts)}")
         logger.info(f"Posts skipped: {len(skipped_posts)}")
+        if resumed_posts:
+            logger.info(f"Posts already done: {len(resumed_posts)}")
+        if unchanged_posts:
+            logger.info(f"Posts unchanged since the last cycle: {len(unchanged_posts)}")
+        if corrupted_posts:
+            logger.info(f"Corrupted files repaired: {len(repaired_posts)}/{len(corrupted_posts)}")
         logger.info(f"Files saved to: {self.desktop_path}")
         logger.info(f"Logs directory: {self.logs_path}")
+        return outcome
 
+    def on_breaker_trip(self, can_switch=False):
+        """
+        React to the circuit breaker opening, as set by breaker_action
 
-def main():
-    try:
-        print("\n=== Notepad Data Entry Bot ===")
-        print("This script will fetch posts from JSONPlaceholder API and create text files in Notepad")
-        print("You can choose which posts to process\n")
+        Args:
+            can_switch (bool): Whether the posts are written in this process, so the backend can be swapped
+        """
+        if self.breaker_action == "stop":
+            logger.critical("Too many posts are failing, stopping the run")
+            self.stop_requested.set()
+            return
+        if (self.breaker_action == "switch" and can_switch and self.switched_from is None
+                and self.fallback_backend != self.backend.name):
+            fallback = create_backend(self.fallback_backend, self)
+            if fallback.setup():
+                logger.critical(f"Too many posts are failing, switching from the {self.backend.name} "
+                                f"to the {fallback.name} backend")
+                self.backend.teardown()
+                self.switched_from, self.backend = self.backend.name, fallback
+                self.breaker.reset()
+                return
+            logger.error(f"Cannot set up the {self.fallback_backend} backend, pausing instead")
+        self.breaker.pause(self.stop_requested)
+
+    def is_changed(self, post):
+        """Check whether a post is new or changed since it was last written, or lost its output file"""
+        if self.fingerprints.changed(post):
+            return True
+        file_path = self.backend.output_path(post["id"])
+        if file_path is not None and not file_path.exists():
+            # Written by an earlier cycle but deleted since, write it again
+            self.fingerprints.forget(post["id"])
+            return self.fingerprints.changed(post)
+        return False
 
-        # Check if required libraries are installed
-        required_libraries = ["requests", "pyautogui", "pygetwindow", "botcity.core", "tqdm"]
-        missing_libraries = []
+    def watch(self, interval=300, max_cycles=0, state_file=None):
+        """
+        Poll the source every ``interval`` seconds and write only new and changed posts
+
+        The per-post fingerprints are kept in a state file, so a restarted
+        watcher picks up where it stopped. SIGINT/SIGTERM finish the post
+        being written and save the state before exiting; a second signal
+        stops at once.
+
+        Args:
+            interval (float): Seconds between the start of two cycles
+            max_cycles (int): Stop after this many cycles, 0 to run until stopped
+            state_file (Path): Watch state, defaults to logs_path/watch_state.json
+
+        Returns:
+            int: Number of cycles run
+        """
+        if not self.initialize_directories():
+            logger.critical("Failed to initialize directories, exiting")
+            return 0
+        self.fingerprints = FingerprintIndex(state_file or self.logs_path / "watch_state.json").load()
 
-        for lib in required_libraries:
+        def request_stop(signum, frame):
+            if self.stop_requested.is_set():
+                raise KeyboardInterrupt
+            logger.info(f"Received {signal.Signals(signum).name}, stopping after the current post")
+            self.stop_requested.set()
+
+        previous_handlers = {signum: signal.signal(signum, request_stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+        cycles = 0
+        try:
+            while not self.stop_requested.is_set():
+                started = time.monotonic()
+                cycles += 1
+                logger.info(f"Watch cycle {cycles} ({len(self.fingerprints)} posts known)")
+                outcome = self.action()
+                self.fingerprints.save()
+                if outcome is None:
+                    logger.critical("Watch cycle failed, stopping")
+                    break
+                logger.info(f"Watch cycle {cycles} done in {time.monotonic() - started:.1f}s: "
+                            f"{outcome['processed']} written, {outcome['unchanged']} unchanged")
+                if max_cycles and cycles >= max_cycles:
+                    break
+                # Sleep until the next cycle, waking up at once on a stop request
+                self.stop_requested.wait(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        logger.info(f"Watch stopped after {cycles} cycles, state saved to {self.fingerprints.path}")
+        return cycles
+
+
+def create_gui_worker(worker_id, options):
+    """
+    Build the bot of a GUI worker process, on the display the worker was given
+
+    Raises:
+        RuntimeError: If Notepad cannot be prepared, the pool then restarts the worker
+    """
+    bot = NotepadBot(**options)
+    if not bot.initialize_directories() or not bot.backend.setup():
+        raise RuntimeError(f"GUI worker {worker_id} could not set up Notepad")
+    return bot
+
+
+COMMANDS = ("fetch", "render", "run", "watch", "verify", "report", "export")
+
+# Import name of every third-party library a command may need, with its distribution name
+REQUIREMENTS = {
+    "requests": "requests",
+    "tqdm": "tqdm",
+    "pyautogui": "PyAutoGUI",
+    "pygetwindow": "PyGetWindow",
+    "botcity.core": "botcity-framework-core",
+    "numpy": "numpy",
+    "PIL": "pillow",
+}
+GUI_LIBRARIES = ["pyautogui", "pygetwindow", "botcity.core"]
+
+
+def parse_args(argv=None):
+    """Parse the command line, ``run`` is the default command"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "run")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--output-dir",
+                        help="Directory the post files and logs are written to")
+    common.add_argument("--async-logging", action="store_true",
+                        help="Queue log records and write them from a background thread")
+    common.add_argument("--log-queue-size", type=int, default=10000,
+                        help="Records the asynchronous log queue holds before the full policy applies")
+    common.add_argument("--log-full-policy", choices=["block", "drop"], default="block",
+                        help="Wait for room or drop the record when the log queue is full")
+    common.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET,
+                        help="Warn when starting up takes longer than this many seconds")
+    common.add_argument("--profile", action="store_true",
+                        help="Sample the stacks of the run and write a flamegraph-ready profile and a "
+                             "hotspot table to the logs directory")
+    common.add_argument("--profile-interval", type=float, default=0.01,
+                        help="Seconds between two profile samples")
+    common.add_argument("--profile-fraction", type=float, default=1.0,
+                        help="Profile only this fraction of the runs started with --profile, e.g. 0.1")
+    common.add_argument("--profile-top", type=int, default=25,
+                        help="Rows of each table of the hotspot report")
+
+    source = argparse.ArgumentParser(add_help=False)
+    source.add_argument("--api-url", default=DEFAULT_API_URL,
+                        help="Root URL of the posts API, e.g. a local stand-in server")
+    source.add_argument("--limit", type=int, default=10,
+                        help="Maximum number of posts to fetch, 0 for all")
+    source.add_argument("--page-size", type=int, default=50,
+                        help="Number of posts requested per page")
+    source.add_argument("--fetch-workers", type=int, default=4,
+                        help="Number of concurrent page requests")
+    source.add_argument("--cache-ttl", type=float, default=0,
+                        help="Seconds cached API responses are used without revalidation")
+    source.add_argument("--no-cache", action="store_true",
+                        help="Do not cache API responses on disk")
+    source.add_argument("--offline", action="store_true",
+                        help="Serve posts from the response cache without any network request "
+                             "(pages are cached per --page-size, whatever the --limit)")
+
+    writing = argparse.ArgumentParser(add_help=False)
+    writing.add_argument("--input", dest="input_file",
+                         help="Read the posts from a JSON, JSONL, CSV or SQLite file instead of the API")
+    writing.add_argument("--field-map",
+                         help="Input fields holding the post fields, e.g. title=subject,body=text")
+    writing.add_argument("--sql-query",
+                         help="Query returning the posts of a SQLite input (default: SELECT * FROM posts)")
+    writing.add_argument("--queue-size", type=int, default=64,
+                         help="Posts fetched and rendered ahead of the one being written")
+    writing.add_argument("--pack-segment-mb", type=int, default=256,
+                         help="Size of the segment files of the packed backend")
+    writing.add_argument("--pack-sync-every", type=int, default=100,
+                         help="fsync the packed store after this many posts")
+    writing.add_argument("--workers", type=int, default=1,
+                         help="Parallel workers for the headless backend")
+    writing.add_argument("--worker-type", choices=["process", "thread"], default="process",
+                         help="Run the parallel workers as processes or as threads")
+    writing.add_argument("--resume", action="store_true",
+                         help="Skip posts the run journal records as done with their file intact")
+    writing.add_argument("--journal-sync-every", type=int, default=1,
+                         help="fsync the run journal after this many posts")
+    writing.add_argument("--metrics-prometheus", action="store_true",
+                         help="Also write the phase metrics in Prometheus text format")
+    writing.add_argument("--verify", action="store_true",
+                         help="Check every saved file against its post and rewrite the ones that differ")
+    writing.add_argument("--repair-attempts", type=int, default=2,
+                         help="Times a post whose file fails verification is written again")
+
+    failures = writing.add_argument_group("failure handling",
+                                          "Failed posts are retried after the others, with jittered backoff")
+    failures.add_argument("--max-retries", type=int, default=3,
+                          help="Retries of a failed post before it is left to the next run, 0 to not retry")
+    failures.add_argument("--retry-delay", type=float, default=2.0,
+                          help="Seconds before the first retry of a post, doubled for every further one")
+    failures.add_argument("--retry-max-delay", type=float, default=60.0,
+                          help="Longest wait before a retry")
+    failures.add_argument("--breaker-window", type=int, default=20,
+                          help="Recent posts the circuit breaker looks at")
+    failures.add_argument("--breaker-threshold", type=float, default=0.5,
+                          help="Share of failed recent posts that opens the circuit breaker, above 1 to disable it")
+    failures.add_argument("--breaker-min-samples", type=int, default=10,
+                          help="Posts written before the circuit breaker can open")
+    failures.add_argument("--breaker-cooldown", type=float, default=30.0,
+                          help="Seconds to pause once the circuit breaker opened")
+    failures.add_argument("--breaker-action", choices=["pause", "switch", "stop"], default="pause",
+                          help="When the circuit breaker opens: pause, switch to --fallback-backend, or stop the run")
+    failures.add_argument("--fallback-backend", choices=["headless", "packed"], default="headless",
+                          help="Backend used once --breaker-action switch opened the circuit breaker")
+
+    selection = writing.add_argument_group("post selection", "All fetched posts are processed unless filtered")
+    selection.add_argument("--include", help="Post IDs or ranges to process, e.g. 1-5,8")
+    selection.add_argument("--exclude", help="Post IDs or ranges to skip")
+    selection.add_argument("--user-ids", help="Only process posts of these userId values or ranges")
+    selection.add_argument("--title-regex", help="Only process posts whose title matches this pattern")
+    selection.add_argument("--body-regex", help="Only process posts whose body matches this pattern")
+    selection.add_argument("--min-body-length", type=int, help="Minimum body length in characters")
+    selection.add_argument("--max-body-length", type=int, help="Maximum body length in characters")
+    selection.add_argument("--selection-file", help="YAML/JSON file with the selection options above")
+    selection.add_argument("--interactive", action="store_true", default=None,
+                           help="Ask for confirmation of each post")
+
+    gui = argparse.ArgumentParser(add_help=False)
+    gui.add_argument("--input-mode", choices=["type", "paste"], default="type",
+                     help="Enter text into Notepad keystroke by keystroke or through the clipboard")
+    gui.add_argument("--paste-min-chars", type=int, default=64,
+                     help="Shorter strings are typed even in paste mode")
+    gui.add_argument("--editor-sessions", type=int, default=1,
+                     help="Notepad windows reused across posts, 0 to launch and close Notepad for every post")
+    gui.add_argument("--editor-command", default="notepad.exe",
+                     help="Command starting Notepad, e.g. \"wine notepad\" on Linux")
+    gui.add_argument("--screen-templates",
+                     help="Directory of PNG templates of the screen states (editor_ready, save_dialog, "
+                          "confirm_save, error_dialog) detected instead of polling window titles")
+    gui.add_argument("--gui-workers", type=int, default=1,
+                     help="Notepad worker processes, each on its own Xvfb display (Linux)")
+    gui.add_argument("--display-start", type=int, default=99,
+                     help="First X display number tried for the GUI workers")
+    gui.add_argument("--display-size", default="1280x1024x24",
+                     help="Geometry of the virtual displays, WIDTHxHEIGHTxDEPTH")
+    gui.add_argument("--worker-restarts", type=int, default=3,
+                     help="Times a crashed GUI worker is restarted before it is retired")
+    gui.add_argument("--launch-attempts", type=int, default=1,
+                     help="Notepad launches tried for a post before it is deferred to the retry queue")
+    gui.add_argument("--typing-speed", choices=["adaptive", "fixed"], default="adaptive",
+                     help="Learn the key interval and action pause of this host, or use the slow fixed ones")
+    gui.add_argument("--typing-settings",
+                     help="JSON file the learned typing settings are kept in (default: <output dir>/typing_speed.json)")
+    gui.add_argument("--min-key-interval", type=float, help="Shortest delay between two keystrokes, in seconds")
+    gui.add_argument("--max-key-interval", type=float, help="Longest delay between two keystrokes, in seconds")
+    gui.add_argument("--min-pause", type=float, help="Shortest pause after a GUI action, in seconds")
+    gui.add_argument("--max-pause", type=float, help="Longest pause after a GUI action, in seconds")
+
+    parser = argparse.ArgumentParser(description="Notepad Data Entry Bot")
+    commands = parser.add_subparsers(dest="command", metavar="{fetch,render,run,watch,verify,report,export}")
+
+    fetch = commands.add_parser("fetch", parents=[common, source],
+                                help="Download posts and save them as JSON")
+    fetch.add_argument("--output", default="-",
+                       help="JSON file to write (JSONL for .jsonl), - for standard output")
+
+    render = commands.add_parser("render", parents=[common, source, writing],
+                                 help="Write the post files directly to disk, without a desktop")
+    render.add_argument("--backend", choices=["headless", "packed"], default="headless",
+                        help="Write one file per post, or pack them into segment files")
+
+    run = commands.add_parser("run", parents=[common, source, writing, gui],
+                              help="Fetch posts and write them with the selected backend (default)")
+    run.add_argument("--backend", choices=sorted(BACKENDS), default="notepad",
+                     help="How posts are written: typed into Notepad or written directly to disk")
+
+    watch = commands.add_parser("watch", parents=[common, source, writing, gui],
+                                help="Poll the source and write only new and changed posts, until stopped")
+    watch.add_argument("--backend", choices=sorted(BACKENDS), default="notepad",
+                       help="How posts are written: typed into Notepad or written directly to disk")
+    watch.add_argument("--interval", type=float, default=300,
+                       help="Seconds between two polls of the source")
+    watch.add_argument("--max-cycles", type=int, default=0,
+                       help="Stop after this many polls, 0 to run until SIGINT/SIGTERM")
+    watch.add_argument("--state-file",
+                       help="Fingerprints of the written posts (default: <output dir>/logs/watch_state.json)")
+    # Every post of the source is watched, not just the first ten
+    watch.set_defaults(limit=0)
+
+    verify = commands.add_parser("verify", parents=[common, source, writing, gui],
+                                 help="Check the saved files against the posts and rewrite the corrupted ones")
+    verify.add_argument("--backend", choices=["notepad", "headless"], default="notepad",
+                        help="How corrupted posts are written again with --repair")
+    verify.add_argument("--repair", action="store_true",
+                        help="Write the missing and corrupted posts again")
+
+    commands.add_parser("report", parents=[common],
+                        help="Show the summary and phase metrics of the last run")
+
+    export = commands.add_parser("export", parents=[common],
+                                 help="Write the posts of the packed store out as post_<id>.txt files")
+    export.add_argument("--to", required=True, help="Directory the files are written to")
+    export.add_argument("--include", help="Post IDs or ranges to export, e.g. 1-5,8 (default: all)")
+    args = parser.parse_args(argv)
+
+    # Report bad input options as usage errors, before anything starts
+    if getattr(args, "input_file", None) and Path(args.input_file).suffix.lower() not in FILE_SOURCES:
+        parser.error(f"unsupported --input file '{args.input_file}', use one of: {', '.join(sorted(FILE_SOURCES))}")
+    try:
+        parse_field_map(getattr(args, "field_map", None))
+    except SourceError as e:
+        parser.error(str(e))
+    return args
+
+
+def build_selector(args):
+    """Create the post selector from the command line options"""
+    options = {
+        "include": args.include,
+        "exclude": args.exclude,
+        "user_ids": args.user_ids,
+        "title_regex": args.title_regex,
+        "body_regex": args.body_regex,
+        "min_body_length": args.min_body_length,
+        "max_body_length": args.max_body_length,
+        "interactive": args.interactive,
+    }
+    if args.selection_file:
+        return PostSelector.from_file(args.selection_file, **options)
+    return PostSelector(**{key: value for key, value in options.items() if value is not None})
+
+
+def required_libraries(args):
+    """Import names of the libraries a command needs"""
+    if args.command in ("report", "export"):
+        return []
+    if args.command == "fetch":
+        return ["requests"]
+    libraries = ["requests", "tqdm"]
+    if args.backend == "notepad" and (args.command != "verify" or args.repair):
+        libraries += GUI_LIBRARIES
+        if args.screen_templates:
+            libraries += ["numpy", "PIL"]
+    return libraries
+
+
+def missing_libraries(libraries):
+    """
+    Check libraries are installed from their package metadata, without importing them
+
+    Returns:
+        list: Distribution names of the missing libraries
+    """
+    from importlib import metadata
+
+    missing = []
+    for lib in libraries:
+        try:
+            metadata.distribution(REQUIREMENTS[lib])
+        except metadata.PackageNotFoundError:
+            missing.append(REQUIREMENTS[lib])
+    return missing
+
+
+def create_bot(args):
+    """Create the bot for the fetch, render, run, watch and verify commands"""
+    options = {}
+    if args.command != "fetch":
+        options.update(selector=build_selector(args), workers=args.workers,
+                       use_threads=args.worker_type == "thread", resume=args.resume,
+                       journal_sync_every=args.journal_sync_every, metrics_prometheus=args.metrics_prometheus,
+                       input_file=args.input_file, field_map=parse_field_map(args.field_map),
+                       sql_query=args.sql_query, queue_size=args.queue_size,
+                       pack_segment_mb=args.pack_segment_mb, pack_sync_every=args.pack_sync_every,
+                       verify=args.verify, repair_attempts=args.repair_attempts, max_retries=args.max_retries,
+                       retry_delay=args.retry_delay, retry_max_delay=args.retry_max_delay,
+                       breaker_window=args.breaker_window, breaker_threshold=args.breaker_threshold,
+                       breaker_min_samples=args.breaker_min_samples, breaker_cooldown=args.breaker_cooldown,
+                       breaker_action=args.breaker_action, fallback_backend=args.fallback_backend)
+    if args.command in ("run", "watch", "verify"):
+        bounds = {"min_interval": args.min_key_interval, "max_interval": args.max_key_interval,
+                  "min_pause": args.min_pause, "max_pause": args.max_pause}
+        options.update(input_mode=args.input_mode, paste_min_chars=args.paste_min_chars,
+                       editor_sessions=args.editor_sessions, typing_speed=args.typing_speed,
+                       typing_settings=args.typing_settings, editor_command=args.editor_command,
+                       gui_workers=args.gui_workers, display_start=args.display_start,
+                       display_size=args.display_size, worker_restarts=args.worker_restarts,
+                       screen_templates=args.screen_templates, launch_attempts=args.launch_attempts,
+                       typing_bounds={key: value for key, value in bounds.items() if value is not None})
+    return NotepadBot(backend=getattr(args, "backend", "headless"), api_url=args.api_url, limit=args.limit or None,
+                      page_size=args.page_size, fetch_workers=args.fetch_workers,
+                      use_cache=not args.no_cache, cache_ttl=args.cache_ttl, offline=args.offline,
+                      output_dir=args.output_dir, **options)
+
+
+def write_posts(posts, stream, jsonl=False):
+    """Write posts as they arrive, as a JSON array or one JSON object per line"""
+    count = 0
+    if not jsonl:
+        stream.write("[")
+    for post in posts:
+        if jsonl:
+            stream.write(json.dumps(post) + "\n")
+        else:
+            stream.write(("," if count else "") + "\n  " + json.dumps(post))
+        count += 1
+    if not jsonl:
+        stream.write("\n]\n")
+    return count
+
+
+def fetch_command(args):
+    """Download posts (through the response cache) and write them as JSON or JSONL"""
+    bot = create_bot(args)
+    if not bot.initialize_directories():
+        return 1
+    jsonl = args.output.endswith((".jsonl", ".ndjson"))
+    try:
+        if args.output == "-":
+            count = write_posts(bot.iter_posts(), sys.stdout, jsonl)
+        else:
+            # Posts are written next to the output and moved into place once all of them arrived,
+            # so a failed fetch leaves the previous output, not a truncated one
+            tmp_path = f"{args.output}.{os.getpid()}.tmp"
             try:
-                __import__(lib)
-            except ImportError:
-                missing_libraries.append(lib)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    count = write_posts(bot.iter_posts(), f, jsonl)
+                os.replace(tmp_path, args.output)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            logger.info(f"Saved {count} posts to {args.output}")
+    except FetchError as e:
+        logger.error(f"Failed to fetch posts: {str(e)}")
+        return 1
+    return 0 if count else 1
+
+
+def run_command(args):
+    """Fetch posts and write them with the selected backend (run and render commands)"""
+    print("\n=== Notepad Data Entry Bot ===")
+    print("This script will fetch posts from JSONPlaceholder API and create text files in Notepad")
+    print("Use --interactive to choose which posts to process\n")
+
+    bot = create_bot(args)
+    if args.startup is not None:
+        bot.metrics.record("startup", args.startup)
+    bot.action()
+    return 0
+
+
+def watch_command(args):
+    """Keep the output in sync with the source, writing only what changed"""
+    bot = create_bot(args)
+    return 0 if bot.watch(interval=args.interval, max_cycles=args.max_cycles, state_file=args.state_file) else 1
+
+
+def verify_command(args):
+    """Verify the saved files of a previous run, and rewrite the corrupted ones with --repair"""
+    bot = create_bot(args)
+    remaining = bot.verify_outputs(repair=args.repair)
+    return 0 if remaining == 0 else 1
+
+
+def report_command(args):
+    """Print the summary report and phase metrics of the last run"""
+    logs_path = Path(args.output_dir or DEFAULT_OUTPUT_DIR) / "logs"
+    summaries = sorted(logs_path.glob("summary_report_*.txt"))
+    metrics_files = sorted(logs_path.glob("metrics_*.json"))
+    if not summaries and not metrics_files:
+        print(f"No reports found in {logs_path}")
+        return 1
+
+    if summaries:
+        print(summaries[-1].read_text())
+    if metrics_files:
+        with open(metrics_files[-1], "r") as f:
+            phases = json.load(f)["phases"]
+        print(f"=== PHASE METRICS ({metrics_files[-1].name}) ===")
+        for phase, stats in phases.items():
+            print(f"  {phase:<20} n={stats['count']:<7} total={stats['total']:8.3f}s "
+                  f"p50={stats['p50'] * 1000:8.2f}ms p95={stats['p95'] * 1000:8.2f}ms p99={stats['p99'] * 1000:8.2f}ms")
+    return 0
+
+
+def export_command(args):
+    """Explode the packed store back into one post_<id>.txt file per post"""
+    store_path = Path(args.output_dir or DEFAULT_OUTPUT_DIR) / "packed"
+    if not store_path.is_dir():
+        print(f"No packed store found in {store_path}")
+        return 1
+    # Read-only, a run may still be appending to the store
+    with PackedStore(store_path, read_only=True) as store:
+        post_ids = None
+        if args.include:
+            include = IdSet(args.include)
+            post_ids = [post_id for post_id in store.index if post_id in include]
+        written, failed = store.export(args.to, post_ids)
+    print(f"Exported {written} posts to {args.to}")
+    if failed:
+        print(f"Failed to export {len(failed)} posts: {', '.join(map(str, failed[:20]))}")
+        return 1
+    return 0
+
+
+def run(args):
+    """Dispatch to the function of the selected command"""
+    if args.command == "fetch":
+        return fetch_command(args)
+    if args.command == "report":
+        return report_command(args)
+    if args.command == "export":
+        return export_command(args)
+    if args.command == "verify":
+        return verify_command(args)
+    if args.command == "watch":
+        return watch_command(args)
+    return run_command(args)
+
+
+def write_profile(sampler, logs_path, top=25):
+    """
+    Write the collapsed stacks and the hotspot table of a profiled run
+
+    Args:
+        sampler (SamplingProfiler): Stopped profiler
+        logs_path (Path): Directory the summary reports are written to
+        top (int): Rows of each hotspot table
+    """
+    try:
+        logs_path.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        collapsed_path = logs_path / f"profile_{stamp}.collapsed"
+        report_path = logs_path / f"profile_{stamp}.txt"
+        sampler.write_collapsed(collapsed_path)
+        sampler.write_report(report_path, top)
+        logger.info(f"Profile saved to {report_path} and {collapsed_path} "
+                    f"(sampler overhead {sampler.sampler_cpu:.3f}s over {sampler.elapsed:.1f}s)")
+        return True
+    except OSError as e:
+        logger.error(f"Failed to write the profile: {str(e)}")
+        return False
 
-        if missing_libraries:
-            print(f"ERROR: Missing required libraries: {', '.join(missing_libraries)}")
-            print("Please install them using: pip install " + " ".join(missing_libraries))
-            return
 
-        # Initialize and run the bot
-        bot = NotepadBot()
-        bot.action()
+def main(argv=None, started=None):
+    """
+    Run a command of the bot
+
+    Args:
+        argv (list): Command line arguments, defaults to sys.argv
+        started (float): perf_counter value at process start, to check the startup budget
+
+    Returns:
+        int: Exit status
+    """
+    args = parse_args(argv)
+    if args.async_logging:
+        get_tracker().set_async(True, queue_size=args.log_queue_size, full_policy=args.log_full_policy)
+    try:
+        # Check if required libraries are installed
+        missing = missing_libraries(required_libraries(args))
+        if missing:
+            print(f"ERROR: Missing required libraries: {', '.join(missing)}")
+            print("Please install them using: pip install " + " ".join(missing))
+            return 1
+
+        args.startup = time.perf_counter() - started if started is not None else None
+        if args.startup is not None and args.startup > args.startup_budget:
+            logger.warning(f"Startup took {args.startup * 1000:.0f} ms, "
+                           f"over the {args.startup_budget * 1000:.0f} ms budget")
+
+        if not args.profile or random.random() >= args.profile_fraction:
+            return run(args)
+        sampler = SamplingProfiler(interval=args.profile_interval).start()
+        try:
+            return run(args)
+        finally:
+            write_profile(sampler.stop(), Path(args.output_dir or DEFAULT_OUTPUT_DIR) / "logs", args.profile_top)
     except Exception as e:
         print(f"Critical error: {str(e)}")
         print(traceback.format_exc())
-
-
+        return 1
+    finally:
+        # Flush the records still queued by the asynchronous listener
+        shutdown_logging()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main(started=_STARTED))
@@ -0,0 +1,381 @@
+import time
+import traceback
+from functools import partial
+from pathlib import Path
+
+from src.editor_session import EditorSessionPool
+from src.journal import fingerprint
+from src.logger.custom_logger import get_logger
+from src.packed_store import PackedStore
+from src.retry import LAUNCH, SAVE, TYPING, classify_exception
+from src.screen_state import ScreenStateDetector
+
+# Get a logger for the backends module
+logger = get_logger("backends")
+
+
+def render_post_segments(post, generated_at=None):
+    """
+    Build the document for a post as the ordered text segments the GUI path types
+
+    Args:
+        post (dict): Post data with userId, id, title and body
+        generated_at (str): Timestamp for the footer, defaults to now
+
+    Returns:
+        list: Text segments, in typing order
+    """
+    if generated_at is None:
+        generated_at = time.strftime('%Y-%m-%d %H:%M:%S')
+
+    title = post["title"]
+    return [
+        f"{title.upper()}\n",
+        "=" * len(title) + "\n\n",
+        f"Post ID: {post['id']}\n",
+        f"User ID: {post['userId']}\n\n",
+        post["body"],
+        f"\n\n---\nGenerated: {generated_at}",
+    ]
+
+
+def render_post(post, generated_at=None):
+    """Render the full document for a post as a single string"""
+    return "".join(render_post_segments(post, generated_at))
+
+
+def _write_post_data(post, directory, generated_at=None, newline="\r\n", encoding="utf-8", text=None):
+    """Write the file of a post, returning its path and the bytes written, or None on failure"""
+    file_path = Path(directory) / f"post_{post['id']}.txt"
+    try:
+        document = text if text is not None else render_post(post, generated_at)
+        data = document.replace("\n", newline).encode(encoding)
+        with open(file_path, "wb") as f:
+            f.write(data)
+        return file_path, data
+    except OSError as e:
+        logger.error(f"Failed to write {file_path}: {str(e)}")
+        return None
+
+
+def write_post_file(post, directory, generated_at=None, newline="\r\n", encoding="utf-8", text=None):
+    """
+    Render a post and write it to ``directory``/post_<id>.txt
+
+    Args:
+        text (str): Already rendered document, rendered here when None
+
+    Returns:
+        bool: True if the file was written, False otherwise
+    """
+    return _write_post_data(post, directory, generated_at, newline, encoding, text) is not None
+
+
+def write_post_files(posts, directory, generated_at=None, newline="\r\n", encoding="utf-8"):
+    """
+    Write a shard of posts, module level so it can run in worker processes
+
+    Each written file is fingerprinted for the run journal from the bytes
+    still in memory, so hashing runs in the workers instead of the parent
+    reading every file back.
+
+    Returns:
+        list: (post ID, success, journal fingerprint or None) in the order of ``posts``
+    """
+    results = []
+    for post in posts:
+        written = _write_post_data(post, directory, generated_at, newline, encoding)
+        file_fingerprint = None
+        if written is not None:
+            try:
+                file_fingerprint = fingerprint(*written)
+            except OSError as e:
+                logger.warning(f"Could not fingerprint {written[0]}: {str(e)}")
+        results.append((post["id"], written is not None, file_fingerprint))
+    return results
+
+
+class OutputBackend:
+    """Base class for the ways a post can be turned into post_<id>.txt"""
+
+    name = None
+    # Whether posts can be written concurrently through shard_writer()
+    parallel_safe = False
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    def setup(self):
+        """Prepare the backend before the first post, returns True when ready"""
+        return True
+
+    def output_path(self, post_id):
+        """Return the file a post is written to, None when posts are not written to their own file"""
+        return Path(self.bot.desktop_path) / f"post_{post_id}.txt"
+
+    def is_done(self, post_id, journal):
+        """Check whether a previous run already wrote the post and its output is intact"""
+        return journal.is_done(post_id, self.output_path(post_id))
+
+    def render(self, post):
+        """
+        Prepare what write_post needs for a post, ahead of time
+
+        Runs in the producer stage of the pipeline while earlier posts are
+        still being written; the result is passed back to write_post.
+        """
+        return None
+
+    def write_post(self, post, rendered=None):
+        """
+        Write a single post to its output file
+
+        Args:
+            post (dict): Post data
+            rendered: Result of render() for the post, None to render it now
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        raise NotImplementedError
+
+    def shard_writer(self):
+        """
+        Return a picklable callable writing a list of posts, for parallel_safe backends
+
+        The callable returns (post ID, success[, journal fingerprint]) tuples in input order.
+        """
+        raise NotImplementedError
+
+    def teardown(self):
+        """Release anything held by the backend after the last post"""
+
+
+class NotepadBackend(OutputBackend):
+    """Types each post into Notepad and saves it through the Save As dialog"""
+
+    name = "notepad"
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.sessions = None
+
+    def setup(self):
+        """Set up pyautogui safety, the typing speed and the reusable Notepad sessions"""
+        bot = self.bot
+        typing = bot.typing
+        typing.path = self.typing_settings_path()
+        typing.load()
+        if typing.adaptive and not bot.verify:
+            logger.info("Typing only speeds up on verified posts, run with --verify to let it learn faster settings")
+        try:
+            # Pause between commands, as learned for this host, and enable failsafe
+            bot.driver.configure(pause=typing.pause, failsafe=True)
+            typing.on_pause_change = lambda pause: bot.driver.configure(pause=pause, failsafe=True)
+        except Exception as e:
+            logger.error(f"The GUI driver is not available, cannot drive Notepad: {str(e)}")
+            return False
+
+        if bot.screen_templates:
+            try:
+                bot.screen = ScreenStateDetector.from_directory(bot.screen_templates, bot.driver.screenshot,
+                                                                waiter=bot.waiter, metrics=bot.metrics)
+            except (ImportError, OSError, ValueError) as e:
+                logger.warning(f"Cannot load the screen templates, waiting on window titles: {str(e)}")
+
+        if bot.editor_sessions > 0:
+            self.sessions = EditorSessionPool(bot, size=bot.editor_sessions)
+        return True
+
+    def typing_settings_path(self):
+        """JSON file the typing settings of every host are kept in"""
+        bot = self.bot
+        return Path(bot.typing_settings) if bot.typing_settings else Path(bot.desktop_path) / "typing_speed.json"
+
+    def render(self, post):
+        # Title, underline, metadata, body and timestamp are typed one by one,
+        # in paste mode the whole document goes through the clipboard at once
+        if self.bot.input_mode == "paste":
+            return [render_post(post)]
+        return render_post_segments(post)
+
+    def write_post(self, post, rendered=None):
+        bot = self.bot
+        post_id = post["id"]
+
+        # Reuse a Notepad session, or launch a fresh Notepad for this post
+        session = None
+        if self.sessions is not None:
+            with bot.metrics.span("prepare_editor"):
+                session = self.sessions.acquire()
+            if session is None:
+                logger.error(f"No Notepad session available for post {post_id}")
+                bot.failure = LAUNCH
+                return False
+        elif not bot.launch_notepad(retry_count=bot.launch_attempts):
+            logger.error(f"Failed to launch Notepad for post {post_id}")
+            bot.failure = LAUNCH
+            return False
+
+        try:
+            segments = rendered if rendered is not None else self.render(post)
+
+            started = time.perf_counter()
+            for segment in segments:
+                if not bot.enter_text(segment):
+                    logger.error(f"Failed to enter the text of post {post_id}")
+                    bot.failure = TYPING
+                    if session is not None:
+                        session.broken = True
+                    return False
+            bot.record_input_rate(post_id, sum(len(segment) for segment in segments),
+                                  time.perf_counter() - started)
+
+            # Save the document
+            if not bot.save_file(post_id):
+                bot.failure = SAVE
+                if session is not None:
+                    # Unknown state (dialog left open, unsaved buffer), relaunch next time
+                    session.broken = True
+                return False
+
+            if session is not None:
+                session.posts_written += 1
+                return True
+
+            # Close Notepad and verify it is gone, the title now carries the file name
+            with bot.metrics.span("close_notepad"):
+                bot.safe_hotkey('alt', 'f4')
+                if not bot.waiter.wait_for_window_closed("Notepad", partial=True, timeout=2):
+                    logger.warning("Notepad didn't close properly, forcing closure")
+                    bot.close_all_notepads()
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Error typing post {post_id} into Notepad: {str(e)}")
+            logger.debug(traceback.format_exc())
+            bot.failure = classify_exception(e)
+            # Clean up
+            if session is not None:
+                session.broken = True
+            else:
+                bot.close_all_notepads()
+            return False
+
+    def teardown(self):
+        """Close the reused Notepad sessions and keep what was learned about the typing speed"""
+        if self.sessions is not None:
+            logger.info(f"Notepad was launched {self.sessions.launches} times for the run")
+            self.sessions.close_all()
+            self.sessions = None
+        self.bot.typing.save()
+
+
+class HeadlessBackend(OutputBackend):
+    """Writes the rendered document straight to disk, no display required"""
+
+    name = "headless"
+    parallel_safe = True
+
+    def __init__(self, bot, newline="\r\n", encoding="utf-8"):
+        """
+        Args:
+            bot (NotepadBot): Bot owning the output directory
+            newline (str): Line ending written for each "\\n"; Notepad stores
+                every typed Enter as CRLF, so this matches the GUI files
+            encoding (str): File encoding, Notepad saves UTF-8 by default
+        """
+        super().__init__(bot)
+        self.newline = newline
+        self.encoding = encoding
+        self.generated_at = None
+
+    def setup(self):
+        """Fix the footer timestamp for the run so output does not depend on scheduling"""
+        self.generated_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        return True
+
+    def render(self, post):
+        return render_post(post, self.generated_at)
+
+    def write_post(self, post, rendered=None):
+        return write_post_file(post, self.bot.desktop_path, self.generated_at, self.newline, self.encoding,
+                               text=rendered)
+
+    def shard_writer(self):
+        return partial(write_post_files, directory=str(self.bot.desktop_path), generated_at=self.generated_at,
+                       newline=self.newline, encoding=self.encoding)
+
+
+class PackedBackend(HeadlessBackend):
+    """
+    Appends the rendered documents to the segments of a PackedStore
+
+    The documents are byte-identical to the headless files, without one
+    file per post; ``python main.py export`` writes them out as files.
+    """
+
+    name = "packed"
+    parallel_safe = False
+
+    def __init__(self, bot, newline="\r\n", encoding="utf-8"):
+        super().__init__(bot, newline, encoding)
+        self.store = None
+
+    def setup(self):
+        super().setup()
+        try:
+            self.store = PackedStore(Path(self.bot.desktop_path) / "packed",
+                                     max_segment_bytes=self.bot.pack_segment_mb * 1024 * 1024,
+                                     sync_every=self.bot.pack_sync_every).open()
+            return True
+        except OSError as e:
+            logger.error(f"Failed to open the packed store: {str(e)}")
+            return False
+
+    def output_path(self, post_id):
+        return None
+
+    def is_done(self, post_id, journal):
+        # Records are CRC-checked when read back, the index entry is enough here
+        return post_id in self.store
+
+    def write_post(self, post, rendered=None):
+        text = rendered if rendered is not None else self.render(post)
+        try:
+            self.store.append(post["id"], text.replace("\n", self.newline).encode(self.encoding))
+            return True
+        except OSError as e:
+            logger.error(f"Failed to append post {post['id']} to the packed store: {str(e)}")
+            return False
+
+    def teardown(self):
+        if self.store is not None:
+            self.store.close()
+            logger.info(f"Packed store holds {len(self.store)} posts")
+            self.store = None
+
+
+BACKENDS = {
+    NotepadBackend.name: NotepadBackend,
+    HeadlessBackend.name: HeadlessBackend,
+    PackedBackend.name: PackedBackend,
+}
+
+
+def create_backend(name, bot):
+    """
+    Instantiate an output backend by name
+
+    Args:
+        name (str): One of the keys of BACKENDS
+        bot (NotepadBot): Bot the backend writes for
+
+    Returns:
+        OutputBackend: The backend instance
+    """
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output backend '{name}', choose from: {', '.join(BACKENDS)}")
+    return backend_class(bot)
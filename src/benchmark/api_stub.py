@@ -0,0 +1,130 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi").split()
+
+
+def synthetic_post(post_id, body_size=200, seed=0):
+    """
+    Build a deterministic JSONPlaceholder-like post
+
+    Args:
+        post_id (int): ID of the post, starting at 1
+        body_size (int): Approximate body length in characters
+        seed (int): Seed shared by all posts of a collection
+    """
+    rng = random.Random(seed * 1_000_003 + post_id)
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+    lines = []
+    length = 0
+    while length < body_size:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12)))
+        lines.append(line)
+        length += len(line) + 1
+    return {"userId": (post_id - 1) // 10 + 1, "id": post_id, "title": title, "body": "\n".join(lines)}
+
+
+class PostsApiStub:
+    """
+    Local HTTP server serving synthetic posts at /posts
+
+    Understands the ``_start``/``_limit`` pagination parameters and answers
+    If-None-Match with 304, like JSONPlaceholder. Posts are generated on
+    demand, so memory does not grow with ``count``.
+
+    Usage:
+        with PostsApiStub(count=1000) as api:
+            bot = NotepadBot(api_url=api.url)
+    """
+
+    def __init__(self, count=100, body_size=200, seed=0, latency=0.0):
+        """
+        Args:
+            count (int): Number of posts in the collection
+            body_size (int): Approximate body length in characters
+            seed (int): Seed of the generated content
+            latency (float): Seconds added to every response
+        """
+        self.count = count
+        self.body_size = body_size
+        self.seed = seed
+        self.latency = latency
+        self.requests = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def etag(self):
+        return f'"{self.seed}-{self.count}-{self.body_size}"'
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def posts(self, start, limit):
+        end = self.count if limit is None else min(self.count, start + limit)
+        return [synthetic_post(post_id, self.body_size, self.seed) for post_id in range(start + 1, end + 1)]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlparse(self.path)
+                if url.path.rstrip("/") != "/posts":
+                    self.send_error(404)
+                    return
+                if self.headers.get("If-None-Match") == stub.etag:
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                query = parse_qs(url.query)
+                start = int(query.get("_start", ["0"])[0])
+                limit = int(query["_limit"][0]) if "_limit" in query else None
+                body = json.dumps(stub.posts(start, limit)).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", stub.etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Start serving on a free local port"""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
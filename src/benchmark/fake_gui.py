@@ -0,0 +1,346 @@
+import random
+import time
+import zlib
+from pathlib import Path
+
+from src.gui_driver import GuiDriver
+from src.waits import WaitEngine, WindowProvider
+
+# Seconds each simulated action takes
+DEFAULT_LATENCIES = {
+    "keystroke": 0.0001,  # per typed character
+    "action": 0.001,      # per hotkey or key press, like pyautogui.PAUSE
+    "launch": 0.05,       # until a launched Notepad window appears
+    "dialog": 0.01,       # until the Save As dialog appears
+}
+
+# Probability of each simulated failure
+DEFAULT_FAILURE_RATES = {
+    "launch": 0.0,          # Notepad never appears
+    "save_dialog": 0.0,     # Ctrl+S does not open the Save As dialog
+    "keystroke_drop": 0.0,  # a typed character is lost
+}
+
+# Size of the simulated screen and of the window kinds drawn on it, as (width, height)
+SCREEN_SIZE = (640, 480)
+WINDOW_SIZES = {"notepad": (200, 120), "Save As": (140, 60), "Confirm Save As": (120, 40)}
+# Where each kind of window opens, at odd coordinates so screen matching cannot rely on grid alignment
+WINDOW_POSITIONS = {"notepad": (41, 23), "Save As": (143, 97), "Confirm Save As": (201, 151)}
+DESKTOP_GRAY = 96
+
+
+class FakeWindow:
+    """A simulated top-level window"""
+
+    def __init__(self, desktop, title, visible_at=0.0):
+        self.desktop = desktop
+        self._title = title
+        self.visible_at = visible_at
+        # (left, top) on the screen, the default of its kind if None
+        self.position = None
+
+    @property
+    def title(self):
+        return self._title
+
+    @property
+    def kind(self):
+        """Key of the window in WINDOW_SIZES and WINDOW_POSITIONS"""
+        return self._title
+
+    @property
+    def visible(self):
+        return time.perf_counter() >= self.visible_at
+
+    def activate(self):
+        self.desktop.active = self
+
+    def close(self):
+        self.desktop.close_window(self)
+
+
+class FakeNotepad(FakeWindow):
+    """A simulated Notepad window with its text buffer"""
+
+    def __init__(self, desktop, visible_at=0.0):
+        super().__init__(desktop, None, visible_at)
+        self.buffer = []
+        self.file_path = None
+        self.dirty = False
+        self.selected_all = False
+
+    @property
+    def title(self):
+        name = self.file_path.name if self.file_path else "Untitled"
+        return f"{'*' if self.dirty else ''}{name} - Notepad"
+
+    @property
+    def kind(self):
+        return "notepad"
+
+    def insert(self, text):
+        if self.selected_all:
+            self.buffer = []
+            self.selected_all = False
+        self.buffer.extend(text)
+        self.dirty = True
+
+    def new_document(self):
+        self.buffer = []
+        self.file_path = None
+        self.dirty = False
+        self.selected_all = False
+
+    def text(self):
+        return "".join(self.buffer)
+
+
+class FakeDialog(FakeWindow):
+    """A simulated dialog (Save As, Confirm Save As) owned by a Notepad window"""
+
+    def __init__(self, desktop, title, owner, visible_at=0.0):
+        super().__init__(desktop, title, visible_at)
+        self.owner = owner
+        self.field = ""
+
+
+class FakeDesktop:
+    """
+    In-memory stand-in for the Windows desktop running Notepad
+
+    Reacts to the keystrokes of FakeGuiDriver the way Notepad and its Save
+    As dialog do, and writes the saved files to disk with CRLF line endings.
+    """
+
+    def __init__(self, latencies=None, failure_rates=None, seed=0):
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.failure_rates = {**DEFAULT_FAILURE_RATES, **(failure_rates or {})}
+        self.rng = random.Random(seed)
+        self.windows = []
+        self.active = None
+        self.clipboard = ""
+        self.launches = 0
+        self._faces = {}
+
+    def attach(self, bot):
+        """Make ``bot`` drive this desktop instead of the real one"""
+        bot.driver = FakeGuiDriver(self)
+        bot.windows = FakeWindowProvider(self)
+        bot.waiter = WaitEngine(bot.windows)
+        bot.clipboard_available = None
+        return bot
+
+    def _fails(self, failure):
+        rate = self.failure_rates.get(failure, 0.0)
+        return rate > 0 and self.rng.random() < rate
+
+    def visible_windows(self):
+        return [window for window in self.windows if window.visible]
+
+    def face(self, kind):
+        """
+        Pixels of a kind of window, the same on every desktop
+
+        Saved as images they are the screen state templates of the fake
+        desktop, e.g. ``face("Save As")`` for the Save As dialog.
+
+        Returns:
+            ndarray: Grayscale uint8 array of the WINDOW_SIZES of the kind
+        """
+        import numpy as np
+
+        face = self._faces.get(kind)
+        if face is None:
+            width, height = WINDOW_SIZES[kind]
+            rng = np.random.default_rng(zlib.crc32(kind.encode("utf-8")))
+            # 4 x 4 pixel blocks, coarse like text and widgets rather than noise
+            blocks = rng.integers(0, 256, ((height + 3) // 4, (width + 3) // 4), dtype=np.uint8)
+            face = self._faces[kind] = np.kron(blocks, np.ones((4, 4), dtype=np.uint8))[:height, :width]
+        return face
+
+    def screenshot(self, region=None):
+        """
+        Draw the visible windows, oldest first, on a plain desktop
+
+        Args:
+            region (tuple): (left, top, width, height) to capture, None for the whole screen
+
+        Returns:
+            ndarray: Grayscale uint8 array
+        """
+        import numpy as np
+
+        screen_width, screen_height = SCREEN_SIZE
+        screen = np.full((screen_height, screen_width), DESKTOP_GRAY, dtype=np.uint8)
+        for window in self.visible_windows():
+            left, top = window.position or WINDOW_POSITIONS[window.kind]
+            face = self.face(window.kind)[:max(0, screen_height - top), :max(0, screen_width - left)]
+            screen[top:top + face.shape[0], left:left + face.shape[1]] = face
+        if region is None:
+            return screen
+        left, top, width, height = region
+        return screen[top:top + height, left:left + width]
+
+    def close_window(self, window):
+        if window in self.windows:
+            self.windows.remove(window)
+        if isinstance(window, FakeNotepad):
+            for dialog in [w for w in self.windows if isinstance(w, FakeDialog) and w.owner is window]:
+                self.windows.remove(dialog)
+        if self.active is window or self.active not in self.windows:
+            owner = getattr(window, "owner", None)
+            self.active = owner if owner in self.windows else (self.windows[-1] if self.windows else None)
+
+    def launch_notepad(self):
+        self.launches += 1
+        if self._fails("launch"):
+            return
+        window = FakeNotepad(self, time.perf_counter() + self.latencies["launch"])
+        self.windows.append(window)
+        self.active = window
+
+    def _open_dialog(self, title, owner, delay=0.0):
+        dialog = FakeDialog(self, title, owner, time.perf_counter() + delay)
+        self.windows.append(dialog)
+        self.active = dialog
+
+    def _save(self, notepad, path):
+        path = Path(path)
+        with open(path, "w", encoding="utf-8", newline="\r\n") as f:
+            f.write(notepad.text())
+        notepad.file_path = path
+        notepad.dirty = False
+
+    def _accept(self, dialog):
+        """Enter in a dialog"""
+        notepad = dialog.owner
+        if dialog.title == "Save As":
+            if Path(dialog.field).exists():
+                self._open_dialog("Confirm Save As", notepad)
+                self.active.field = dialog.field
+                return
+            self._save(notepad, dialog.field)
+            self.close_window(dialog)
+        elif dialog.title == "Confirm Save As":
+            self._save(notepad, dialog.field)
+            for window in [w for w in self.windows if isinstance(w, FakeDialog) and w.owner is notepad]:
+                self.close_window(window)
+        else:
+            self.close_window(dialog)
+        self.active = notepad
+
+    def type_text(self, text):
+        target = self.active
+        for char in text:
+            if isinstance(target, FakeDialog):
+                if char == "\n":
+                    self._accept(target)
+                    target = self.active
+                else:
+                    target.field += char
+            elif isinstance(target, FakeNotepad):
+                if not self._fails("keystroke_drop"):
+                    target.insert(char)
+
+    def press_key(self, key):
+        target = self.active
+        if key == "enter":
+            self.type_text("\n")
+        elif key in ("delete", "backspace") and isinstance(target, FakeNotepad):
+            if target.buffer:
+                if target.selected_all:
+                    target.buffer = []
+                else:
+                    target.buffer.pop()
+                target.dirty = True
+            target.selected_all = False
+        elif key == "escape" and isinstance(target, FakeDialog):
+            self.close_window(target)
+
+    def hotkey(self, keys):
+        target = self.active
+        if keys == ("alt", "f4"):
+            if target is not None:
+                self.close_window(target)
+        elif isinstance(target, FakeNotepad):
+            if keys == ("ctrl", "s"):
+                if target.file_path:
+                    self._save(target, target.file_path)
+                elif not self._fails("save_dialog"):
+                    self._open_dialog("Save As", target, self.latencies["dialog"])
+            elif keys == ("ctrl", "n"):
+                target.new_document()
+            elif keys == ("ctrl", "a"):
+                target.selected_all = True
+            elif keys == ("ctrl", "v"):
+                target.insert(self.clipboard.replace("\r\n", "\n"))
+
+
+def create_fake_gui_worker(worker_id, options):
+    """
+    Build the bot of a GUI worker process driving its own FakeDesktop
+
+    Drop-in replacement of main.create_gui_worker for GuiWorkerPool, so the
+    pool runs without Xvfb or Notepad. ``options["fake_desktop"]`` holds the
+    FakeDesktop arguments, the seed defaulting to the worker ID.
+    """
+    from main import NotepadBot
+
+    options = dict(options)
+    desktop = FakeDesktop(**{"seed": worker_id, **options.pop("fake_desktop", {})})
+    bot = desktop.attach(NotepadBot(**options))
+    if not bot.initialize_directories() or not bot.backend.setup():
+        raise RuntimeError(f"GUI worker {worker_id} could not set up the fake desktop")
+    return bot
+
+
+class FakeGuiDriver(GuiDriver):
+    """GuiDriver acting on a FakeDesktop, with the desktop's simulated latencies"""
+
+    version = "fake"
+    clipboard_available = True
+
+    def __init__(self, desktop):
+        self.desktop = desktop
+        self.keystrokes = 0
+
+    def write(self, text, interval=0.01):
+        self.keystrokes += len(text)
+        time.sleep(len(text) * self.desktop.latencies["keystroke"])
+        self.desktop.type_text(text)
+
+    def hotkey(self, *keys):
+        time.sleep(self.desktop.latencies["action"])
+        self.desktop.hotkey(tuple(key.lower() for key in keys))
+
+    def press(self, key):
+        time.sleep(self.desktop.latencies["action"])
+        self.desktop.press_key(key.lower())
+
+    def copy(self, text):
+        self.desktop.clipboard = text
+
+    def launch(self, command, attempt=0):
+        self.desktop.launch_notepad()
+
+    def screenshot(self, region=None):
+        return self.desktop.screenshot(region)
+
+
+class FakeWindowProvider(WindowProvider):
+    """WindowProvider listing the windows of a FakeDesktop"""
+
+    version = "fake"
+
+    def __init__(self, desktop):
+        self.desktop = desktop
+
+    def get_titles(self):
+        return [window.title for window in self.desktop.visible_windows()]
+
+    def get_windows(self, title):
+        return [window for window in self.desktop.visible_windows() if title.upper() in window.title.upper()]
+
+    def get_active_title(self):
+        active = self.desktop.active
+        return active.title if active is not None and active.visible else None
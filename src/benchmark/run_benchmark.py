@@ -0,0 +1,189 @@
+"""
+End-to-end throughput benchmark of NotepadBot, runnable headless on Linux
+
+Each scenario serves synthetic posts from a local PostsApiStub and runs
+NotepadBot.action against it; the Notepad scenarios drive a FakeDesktop
+instead of the real pyautogui/pygetwindow stack.
+
+Usage:
+    python -m src.benchmark.run_benchmark
+    python -m src.benchmark.run_benchmark --scenario notepad_paste --posts 50 --save-baseline
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from main import STARTUP_BUDGET, NotepadBot
+from src.benchmark.api_stub import PostsApiStub
+from src.benchmark.fake_gui import FakeDesktop
+from src.journal import PROCESSED
+from src.logger.custom_logger import get_tracker
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak memory is then not reported
+    resource = None
+
+SCENARIOS = {
+    "headless": {"backend": "headless", "posts": 2000},
+    "headless_parallel": {"backend": "headless", "posts": 2000, "workers": 4},
+    "notepad_type": {"backend": "notepad", "posts": 20, "input_mode": "type"},
+    "notepad_paste": {"backend": "notepad", "posts": 20, "input_mode": "paste"},
+    "notepad_relaunch": {"backend": "notepad", "posts": 20, "input_mode": "paste", "editor_sessions": 0},
+}
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process and its children, in MB"""
+    if resource is None:
+        return None
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak_kb / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_scenario(name, backend="headless", posts=100, body_size=200, input_mode="type", editor_sessions=1,
+                 workers=1, latencies=None, failure_rates=None, seed=0):
+    """
+    Run one benchmark scenario end to end
+
+    Returns:
+        dict: Throughput, peak memory and per-phase latency of the run
+    """
+    with PostsApiStub(count=posts, body_size=body_size, seed=seed) as api, \
+            tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as output_dir:
+        bot = NotepadBot(backend=backend, api_url=api.url, limit=posts, input_mode=input_mode,
+                         editor_sessions=editor_sessions, workers=workers, use_cache=False,
+                         output_dir=output_dir)
+        desktop = None
+        if backend == "notepad":
+            desktop = FakeDesktop(latencies=latencies, failure_rates=failure_rates, seed=seed)
+            desktop.attach(bot)
+
+        start = time.perf_counter()
+        bot.action()
+        elapsed = time.perf_counter() - start
+
+        processed = sum(1 for entry in bot.journal.index.values() if entry["status"] == PROCESSED)
+
+    result = {
+        "posts": posts,
+        "processed": processed,
+        "elapsed": elapsed,
+        "posts_per_sec": processed / elapsed if elapsed > 0 else 0.0,
+        "peak_memory_mb": peak_memory_mb(),
+        "phases": bot.metrics.summary(),
+    }
+    if desktop is not None:
+        result["notepad_launches"] = desktop.launches
+    return result
+
+
+def measure_startup(runs=5):
+    """Median time, in seconds, a fresh interpreter takes to import main"""
+    code = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+    root = Path(__file__).resolve().parents[2]
+    samples = sorted(float(subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True,
+                                          text=True, check=True).stdout)
+                     for _ in range(runs))
+    return samples[len(samples) // 2]
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Flag scenarios whose throughput dropped more than ``tolerance`` below the baseline
+
+    Returns:
+        list: Human readable regression descriptions
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        floor = reference["posts_per_sec"] * (1 - tolerance)
+        if result["posts_per_sec"] < floor:
+            regressions.append(f"{name}: {result['posts_per_sec']:.1f} posts/s is below "
+                               f"{floor:.1f} ({reference['posts_per_sec']:.1f} baseline - {tolerance:.0%})")
+    return regressions
+
+
+def print_result(name, result):
+    memory = f"{result['peak_memory_mb']:.1f} MB" if result["peak_memory_mb"] is not None else "n/a"
+    print(f"\n=== {name} ===")
+    print(f"Processed {result['processed']}/{result['posts']} posts in {result['elapsed']:.2f}s "
+          f"({result['posts_per_sec']:.1f} posts/s), peak memory {memory}")
+    for phase, stats in result["phases"].items():
+        print(f"  {phase:<20} n={stats['count']:<7} total={stats['total']:8.3f}s "
+              f"p50={stats['p50'] * 1000:8.2f}ms p95={stats['p95'] * 1000:8.2f}ms p99={stats['p99'] * 1000:8.2f}ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="NotepadBot throughput benchmark")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run, repeatable (default: all)")
+    parser.add_argument("--posts", type=int, help="Override the number of posts of every scenario")
+    parser.add_argument("--body-size", type=int, default=200, help="Approximate body length in characters")
+    parser.add_argument("--latencies", type=json.loads, default=None,
+                        help='Fake desktop latencies as JSON, e.g. \'{"keystroke": 0.001}\'')
+    parser.add_argument("--failure-rates", type=json.loads, default=None,
+                        help='Fake desktop failure rates as JSON, e.g. \'{"launch": 0.05}\'')
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed throughput drop versus the baseline, as a fraction")
+    parser.add_argument("--output", help="Write the full results as JSON to this file")
+    parser.add_argument("--log-level", default="WARNING", help="Level of the bot loggers during the runs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Loggers are created on first use, with the level the tracker is configured with
+    get_tracker().update_config({"default_level": args.log_level, "modules": {}})
+
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        options = dict(SCENARIOS[name])
+        if args.posts:
+            options["posts"] = args.posts
+        results[name] = run_scenario(name, body_size=args.body_size, latencies=args.latencies,
+                                     failure_rates=args.failure_rates, **options)
+        print_result(name, results[name])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+
+    startup = measure_startup()
+    print(f"\nStartup (import main): {startup * 1000:.1f} ms, budget {STARTUP_BUDGET * 1000:.0f} ms")
+    if startup > STARTUP_BUDGET:
+        regressions.append(f"startup: {startup * 1000:.1f} ms is over the {STARTUP_BUDGET * 1000:.0f} ms budget")
+
+    if args.save_baseline:
+        baseline.update({name: {"posts_per_sec": result["posts_per_sec"],
+                                "peak_memory_mb": result["peak_memory_mb"]}
+                         for name, result in results.items()})
+        baseline_path.write_text(json.dumps(baseline, indent=2))
+        print(f"\nBaseline saved to {baseline_path}")
+
+    if regressions:
+        print("\nPERFORMANCE REGRESSIONS:")
+        for regression in regressions:
+            print(f"- {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import traceback
+
+from src.logger.custom_logger import get_logger
+from src.screen_state import EDITOR_READY
+
+# Get a logger for the editor session module
+logger = get_logger("editor_session")
+
+UNTITLED_TITLE = "Untitled - Notepad"
+
+
+class EditorSession:
+    """
+    One Notepad window kept open for the whole run
+
+    After a post is saved the window is reused: Ctrl+N starts a new
+    document and Select-All/Delete makes sure the buffer is empty. The
+    window is only relaunched when the health check fails.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.window = None
+        self.posts_written = 0
+        self.launches = 0
+        self.broken = False
+
+    def open(self, close_existing=True):
+        """
+        Launch a Notepad window owned by this session
+
+        Args:
+            close_existing (bool): Close every other Notepad window first
+
+        Returns:
+            bool: True if the window is open and focused
+        """
+        windows = self.bot.windows
+        before = [] if close_existing else list(windows.get_windows(UNTITLED_TITLE))
+        if not self.bot.launch_notepad(retry_count=self.bot.launch_attempts, close_existing=close_existing):
+            return False
+
+        new_windows = [w for w in windows.get_windows(UNTITLED_TITLE) if w not in before]
+        if not new_windows:
+            logger.error("Could not identify the launched Notepad window")
+            return False
+
+        self.window = new_windows[0]
+        self.posts_written = 0
+        self.launches += 1
+        self.broken = False
+        return True
+
+    def is_healthy(self):
+        """Check the window is still open and has no unsaved changes"""
+        if self.window is None or self.broken:
+            return False
+        try:
+            if self.window not in self.bot.windows.get_windows("Notepad"):
+                return False
+            # Notepad prefixes the title with '*' while there are unsaved changes
+            return not self.window.title.startswith("*")
+        except Exception as e:
+            logger.warning(f"Notepad health check failed: {str(e)}")
+            return False
+
+    def prepare(self):
+        """
+        Focus the window and leave it with an empty, untitled document
+
+        Returns:
+            bool: True if the session is ready for typing
+        """
+        bot = self.bot
+        try:
+            self.window.activate()
+            if self.posts_written:
+                # The window still shows the saved post, start a new document
+                bot.safe_hotkey('ctrl', 'n')
+                if bot.screen is not None and EDITOR_READY in bot.screen:
+                    ready = bot.screen.wait_for(EDITOR_READY, timeout=3)
+                else:
+                    ready = bot.waiter.wait_for_active_window(UNTITLED_TITLE, timeout=3)
+                if not ready:
+                    logger.warning("Notepad did not open a new document")
+                    bot.typing.record_focus_loss()
+                    return False
+            else:
+                bot.waiter.wait_for_active_window(self.window.title, timeout=1)
+
+            bot.safe_hotkey('ctrl', 'a')
+            bot.safe_press('delete')
+            return True
+        except Exception as e:
+            logger.error(f"Failed to prepare Notepad for the next post: {str(e)}")
+            logger.debug(traceback.format_exc())
+            return False
+
+    def close(self):
+        """Close the session window, discarding unsaved changes"""
+        if self.window is None:
+            return
+        bot = self.bot
+        try:
+            self.window.close()
+            if not bot.waiter.wait_until(lambda: self.window not in bot.windows.get_windows("Notepad"),
+                                         timeout=2, description="Notepad session closed"):
+                # A "Do you want to save changes?" prompt is blocking the close
+                bot.safe_hotkey('alt', 'n')
+        except Exception as e:
+            logger.warning(f"Failed to close Notepad session: {str(e)}")
+        self.window = None
+
+
+class EditorSessionPool:
+    """Keeps ``size`` editor sessions alive and hands them out in turn"""
+
+    def __init__(self, bot, size=1):
+        self.bot = bot
+        self.sessions = [EditorSession(bot) for _ in range(max(1, size))]
+        self._next = 0
+
+    def acquire(self, retry_count=3):
+        """
+        Return the next session, focused and with an empty document
+
+        Unhealthy sessions are relaunched, up to ``retry_count`` times.
+
+        Returns:
+            EditorSession: Ready session, or None if Notepad could not be prepared
+        """
+        session = self.sessions[self._next]
+        self._next = (self._next + 1) % len(self.sessions)
+
+        for attempt in range(retry_count):
+            if not session.is_healthy():
+                if session.window is not None:
+                    logger.warning("Notepad session is unhealthy, relaunching")
+                    session.close()
+                # The first session starts from a clean desktop
+                if not session.open(close_existing=session is self.sessions[0]
+                                    and not any(s.window for s in self.sessions)):
+                    continue
+            if session.prepare():
+                return session
+            session.broken = True
+
+        logger.error("Could not get a ready Notepad session")
+        return None
+
+    def close_all(self):
+        """Close every session window"""
+        for session in self.sessions:
+            session.close()
+
+    @property
+    def launches(self):
+        """Total number of Notepad launches across the sessions"""
+        return sum(session.launches for session in self.sessions)
@@ -0,0 +1,187 @@
+import math
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the fetcher module
+logger = get_logger("fetcher")
+
+DEFAULT_API_URL = "https://jsonplaceholder.typicode.com"
+
+
+class FetchError(Exception):
+    """Raised when a page of posts could not be fetched after all retries"""
+
+
+class PostFetcher:
+    """
+    Fetch posts page by page over a pooled HTTP session
+
+    Pages are requested with the json-server style ``_start``/``_limit`` query
+    parameters understood by JSONPlaceholder, so only the pages covering the
+    requested posts are downloaded, and up to ``max_workers`` pages are in
+    flight at once. Every page holds ``page_size`` posts whatever the limit,
+    the last one being trimmed here, so a page is cached under the same key
+    by runs with different limits.
+    """
+
+    def __init__(self, base_url=DEFAULT_API_URL, page_size=50, max_workers=4, timeout=10, retry_count=3,
+                 cache=None, offline=False):
+        """
+        Args:
+            base_url (str): API root, e.g. a local stand-in server
+            page_size (int): Number of posts requested per page
+            max_workers (int): Maximum number of concurrent page requests
+            timeout (int): Request timeout in seconds
+            retry_count (int): Number of attempts per page
+            cache (ResponseCache): Persistent response cache, None to always download
+            offline (bool): Serve pages from the cache only, without any request
+        """
+        self.base_url = base_url.rstrip("/")
+        self.page_size = max(1, page_size)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.retry_count = retry_count
+        self.cache = cache
+        self.offline = offline
+        self._session = None
+
+    @property
+    def session(self):
+        """Shared keep-alive session, sized for the number of workers"""
+        if self._session is None:
+            # requests is the slowest import of the bot, only pay for it when a page is downloaded
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
+
+    def close(self):
+        """Close the pooled connections"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def fetch_page(self, start, count):
+        """
+        Fetch ``count`` posts starting at offset ``start`` with retry logic
+
+        Returns:
+            list: Posts of the page (shorter than ``count`` at the end of the collection)
+
+        Raises:
+            FetchError: If every attempt failed
+        """
+        url = f"{self.base_url}/posts"
+        params = {"_start": start, "_limit": count}
+
+        cached = self.cache.get(url, params) if self.cache is not None else None
+        if self.offline:
+            if cached is None:
+                raise FetchError(f"Posts {start}-{start + count - 1} are not in the cache (offline mode)")
+            return cached.body
+        headers = {}
+        if cached is not None:
+            if self.cache.is_fresh(cached):
+                return cached.body
+            headers = cached.conditional_headers()
+
+        import requests
+
+        for attempt in range(self.retry_count):
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code == 304 and cached is not None:
+                    logger.debug(f"Posts {start}-{start + count - 1} not modified, using the cache")
+                    return self.cache.revalidated(url, params, cached).body
+                if response.status_code == 200:
+                    if self.cache is not None:
+                        return self.cache.store_response(url, params, response).body
+                    return response.json()
+                logger.error(f"API returned status code {response.status_code} for posts {start}-{start + count - 1}")
+            except requests.exceptions.Timeout:
+                logger.error(f"Request timed out (attempt {attempt + 1}/{self.retry_count})")
+            except requests.exceptions.ConnectionError:
+                logger.error(f"Connection error (attempt {attempt + 1}/{self.retry_count})")
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Request failed: {str(e)} (attempt {attempt + 1}/{self.retry_count})")
+            except ValueError as e:
+                logger.error(f"Invalid JSON in API response: {str(e)} (attempt {attempt + 1}/{self.retry_count})")
+
+            if attempt + 1 < self.retry_count:
+                # Exponential backoff: 1s, 2s, 4s, etc.
+                wait_time = 2 ** attempt
+                logger.info(f"Retrying in {wait_time} seconds...")
+                time.sleep(wait_time)
+
+        if cached is not None:
+            logger.warning(f"Serving stale cached posts {start}-{start + count - 1} ({cached.age:.0f}s old)")
+            return cached.body
+        raise FetchError(f"All attempts to fetch posts {start}-{start + count - 1} failed")
+
+    def iter_pages(self, limit=None):
+        """
+        Yield pages of up to ``limit`` posts in collection order, as they arrive
+
+        Pages are requested in waves of ``max_workers`` concurrent requests,
+        so at most one wave is held in memory.
+
+        Raises:
+            FetchError: If a page could not be fetched
+        """
+        fetched = 0
+        start = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while limit is None or fetched < limit:
+                # Plan the next wave of full pages, one per worker, no more than the limit needs
+                count = self.max_workers
+                if limit is not None:
+                    count = min(count, math.ceil((limit - fetched) / self.page_size))
+                pages = [start + index * self.page_size for index in range(count)]
+
+                results = list(executor.map(lambda page_start: self.fetch_page(page_start, self.page_size), pages))
+
+                for page in results:
+                    if len(page) > self.page_size:
+                        # The server ignored the pagination parameters and sent everything
+                        logger.warning("API does not support pagination, truncating the full collection")
+                        yield page[:limit] if limit is not None else page
+                        return
+                    last = len(page) < self.page_size
+                    if limit is not None:
+                        page = page[:limit - fetched]
+                    fetched += len(page)
+                    yield page
+                    if last or fetched == limit:
+                        # Reached the end of the collection, or the limit
+                        return
+
+                start += count * self.page_size
+
+    def iter_posts(self, limit=None):
+        """Yield up to ``limit`` posts one by one, see iter_pages"""
+        for page in self.iter_pages(limit):
+            yield from page
+
+    def fetch(self, limit=None):
+        """
+        Fetch up to ``limit`` posts, or the whole collection when ``limit`` is None
+
+        Returns:
+            list: Posts in collection order, empty list if failed
+        """
+        try:
+            return list(self.iter_posts(limit))
+        except FetchError as e:
+            logger.error(str(e))
+            return []
+        except Exception as e:
+            logger.error(f"Unexpected error fetching posts: {str(e)}")
+            logger.debug(traceback.format_exc())
+            return []
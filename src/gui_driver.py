@@ -0,0 +1,127 @@
+import os
+import subprocess
+
+
+class FailSafeTriggered(BaseException):
+    """
+    The user aborted the run by moving the mouse into a screen corner
+
+    Like KeyboardInterrupt it derives from BaseException, so the
+    ``except Exception`` handlers around GUI actions let it through.
+    """
+
+
+class GuiDriver:
+    """
+    Keyboard, clipboard and application launching used by the Notepad path
+
+    The bot never talks to pyautogui directly, so a simulated driver can
+    stand in for the desktop (see src/benchmark/fake_gui.py).
+    """
+
+    version = None
+    clipboard_available = False
+
+    def configure(self, pause=0.1, failsafe=True):
+        """Set the pause after every action and the mouse-corner failsafe"""
+
+    def write(self, text, interval=0.01):
+        """Type text keystroke by keystroke, raises FailSafeTriggered when the user aborts"""
+        raise NotImplementedError
+
+    def hotkey(self, *keys):
+        """Press a key combination"""
+        raise NotImplementedError
+
+    def press(self, key):
+        """Press a single key"""
+        raise NotImplementedError
+
+    def copy(self, text):
+        """Put text on the clipboard"""
+        raise NotImplementedError
+
+    def launch(self, command, attempt=0):
+        """Start an application, trying a different method on each attempt"""
+        raise NotImplementedError
+
+    def screenshot(self, region=None):
+        """Grab (left, top, width, height) of the screen, or all of it, as a PIL image or an array"""
+        raise NotImplementedError
+
+
+class PyAutoGuiDriver(GuiDriver):
+    """Drives the real desktop with pyautogui, pyperclip and botcity, imported on first use"""
+
+    def __init__(self, bot):
+        """
+        Args:
+            bot (NotepadBot): Bot being driven
+        """
+        self.bot = bot
+        self._pyautogui = None
+        self._desktop_bot = None
+
+    @property
+    def pyautogui(self):
+        if self._pyautogui is None:
+            import pyautogui
+            self._pyautogui = pyautogui
+        return self._pyautogui
+
+    @property
+    def desktop_bot(self):
+        """botcity DesktopBot, the first launch method"""
+        if self._desktop_bot is None:
+            from botcity.core import DesktopBot
+            self._desktop_bot = DesktopBot()
+        return self._desktop_bot
+
+    @property
+    def version(self):
+        return self.pyautogui.__version__
+
+    @property
+    def clipboard_available(self):
+        try:
+            import pyperclip  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def configure(self, pause=0.1, failsafe=True):
+        self.pyautogui.PAUSE = pause
+        self.pyautogui.FAILSAFE = failsafe
+
+    def _failsafe(self, action, *args, **kwargs):
+        try:
+            return action(*args, **kwargs)
+        except self.pyautogui.FailSafeException as e:
+            raise FailSafeTriggered(str(e)) from e
+
+    def write(self, text, interval=0.01):
+        self._failsafe(self.pyautogui.write, text, interval=interval)
+
+    def hotkey(self, *keys):
+        self._failsafe(self.pyautogui.hotkey, *keys)
+
+    def press(self, key):
+        self._failsafe(self.pyautogui.press, key)
+
+    def copy(self, text):
+        import pyperclip
+        pyperclip.copy(text)
+
+    def launch(self, command, attempt=0):
+        if attempt == 0:
+            # First try using botcity
+            self.desktop_bot.execute(command)
+        elif attempt == 1:
+            # Second try using os.system
+            os.system(f"start {command}")
+        else:
+            # Last try using subprocess
+            subprocess.Popen([command], shell=True)
+
+    def screenshot(self, region=None):
+        return self.pyautogui.screenshot(region=region)
@@ -0,0 +1,378 @@
+import os
+import subprocess
+import time
+from collections import Counter, deque
+from multiprocessing import connection, get_context
+from pathlib import Path
+
+from src.logger.custom_logger import get_logger
+from src.verifier import OK
+
+# Get a logger for the gui workers module
+logger = get_logger("gui_workers")
+
+X11_SOCKET_DIR = Path("/tmp/.X11-unix")
+
+
+class DisplayError(Exception):
+    """Raised when a virtual display cannot be started"""
+
+
+def display_in_use(number):
+    """Check whether an X server already owns display ``number``"""
+    return Path(f"/tmp/.X{number}-lock").exists() or (X11_SOCKET_DIR / f"X{number}").exists()
+
+
+def free_display_numbers(count, start=99):
+    """Return ``count`` display numbers from ``start`` on that no X server uses"""
+    numbers = []
+    number = start
+    while len(numbers) < count:
+        if not display_in_use(number):
+            numbers.append(number)
+        number += 1
+    return numbers
+
+
+class VirtualDisplay:
+    """An Xvfb server owned by one GUI worker"""
+
+    def __init__(self, number, size="1280x1024x24", command="Xvfb"):
+        """
+        Args:
+            number (int): X display number, the display is ":<number>"
+            size (str): Screen geometry and depth, WIDTHxHEIGHTxDEPTH
+            command (str): X server to run
+        """
+        self.number = number
+        self.size = size
+        self.command = command
+        self.process = None
+
+    @property
+    def name(self):
+        return f":{self.number}"
+
+    def start(self, timeout=10):
+        """
+        Start the server and wait for its socket
+
+        Raises:
+            DisplayError: If the server cannot be run or does not come up
+        """
+        try:
+            self.process = subprocess.Popen([self.command, self.name, "-screen", "0", self.size, "-nolisten", "tcp"],
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            raise DisplayError(f"Cannot run {self.command}: {str(e)}") from e
+
+        socket_path = X11_SOCKET_DIR / f"X{self.number}"
+        deadline = time.monotonic() + timeout
+        while not socket_path.exists():
+            if self.process.poll() is not None:
+                raise DisplayError(f"{self.command} {self.name} exited with status {self.process.returncode}")
+            if time.monotonic() > deadline:
+                self.stop()
+                raise DisplayError(f"{self.command} {self.name} did not start within {timeout} seconds")
+            time.sleep(0.05)
+        logger.info(f"Started virtual display {self.name} ({self.size})")
+        return self
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        """Stop the server"""
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
+def worker_main(worker_id, display, factory, options, conn):
+    """
+    Entry point of a GUI worker process
+
+    The display is selected before the bot is built, so pyautogui and
+    xdotool only ever see this worker's display. The worker then writes the
+    posts it receives one at a time and answers each with its outcome and
+    its current typing settings; it never saves them itself, as every
+    worker shares the settings file of the host (see NotepadBot.action).
+    """
+    if display is not None:
+        os.environ["DISPLAY"] = display
+    bot = None
+    try:
+        bot = factory(worker_id, options)
+        bot.typing.path = None
+        conn.send(("ready", None))
+        while True:
+            post = conn.recv()
+            if post is None:
+                break
+            post_id = post["id"]
+            success = bot.process_post(post)
+            verification = None
+            if success and bot.verify:
+                file_path = bot.backend.output_path(post_id)
+                verification = bot.verifier.verify(post, file_path) if file_path is not None else None
+            if success:
+                bot.typing.record_post(None if verification is None else verification["status"] == OK)
+            conn.send(("result", {"post_id": post_id, "success": success, "verification": verification,
+                                  "failure": None if success else bot.failure,
+                                  "input_rate": bot.input_rates.get(post_id), "metrics": bot.metrics.drain(),
+                                  "typing": bot.typing.settings()}))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    except Exception as e:
+        logger.critical(f"GUI worker {worker_id} failed: {str(e)}")
+        raise
+    finally:
+        if bot is not None:
+            bot.backend.teardown()
+        conn.close()
+
+
+class GuiWorker:
+    """Parent-side state of one worker: its display, process, pipe and local queue"""
+
+    def __init__(self, worker_id, display=None):
+        self.worker_id = worker_id
+        self.display = display
+        self.process = None
+        self.conn = None
+        self.queue = deque()
+        self.current = None
+        self.ready = False
+        self.retired = False
+        self.posts = 0
+        self.restarts = 0
+        self.steals = 0
+        # Typing settings last reported by the worker process
+        self.typing = None
+
+    def stats(self):
+        return {"worker": self.worker_id, "display": self.display.name if self.display else None,
+                "posts": self.posts, "restarts": self.restarts, "steals": self.steals, "retired": self.retired}
+
+
+class GuiWorkerPool:
+    """
+    Runs N isolated GUI bots, each on its own virtual display, and feeds them posts
+
+    Posts are streamed from the source into one local queue per worker,
+    at most ``buffer_per_worker`` each. A worker takes from the front of
+    its own queue and, once it is empty, steals the back half of the
+    longest other queue, so a slow or restarted worker never holds up the
+    tail of the run. A worker whose process dies is restarted, on a fresh
+    display if the server died too, up to ``max_restarts`` times; the post
+    it was writing is handed out again unless it already crashed
+    ``max_post_crashes`` workers.
+    """
+
+    def __init__(self, workers, factory, options, use_displays=True, display_start=99,
+                 display_size="1280x1024x24", max_restarts=3, max_post_crashes=2, buffer_per_worker=4,
+                 metrics=None):
+        """
+        Args:
+            workers (int): Number of worker processes
+            factory (callable): Picklable ``factory(worker_id, options)`` building a
+                set up NotepadBot in the worker, raising if Notepad cannot be prepared
+            options (dict): Passed to the factory
+            use_displays (bool): Give every worker its own Xvfb display
+            display_start (int): First display number tried
+            display_size (str): Geometry of the virtual displays
+            max_restarts (int): Restarts of a worker before it is retired
+            max_post_crashes (int): Crashes a post may cause before it is given up
+            buffer_per_worker (int): Posts read ahead of each worker
+            metrics (PhaseMetrics): Receives the phase samples of the workers
+        """
+        self.workers = [GuiWorker(worker_id) for worker_id in range(1, max(1, workers) + 1)]
+        self.factory = factory
+        self.options = options
+        self.use_displays = use_displays
+        self.display_start = display_start
+        self.display_size = display_size
+        self.max_restarts = max_restarts
+        self.max_post_crashes = max_post_crashes
+        self.buffer_per_worker = max(1, buffer_per_worker)
+        self.metrics = metrics
+        self._context = get_context("spawn")
+        self._crashes = Counter()
+
+    def _start(self, worker):
+        if self.use_displays and (worker.display is None or not worker.display.is_alive()):
+            if worker.display is not None:
+                worker.display.stop()
+            worker.display = VirtualDisplay(free_display_numbers(1, self.display_start)[0], self.display_size).start()
+        parent_conn, child_conn = self._context.Pipe()
+        worker.process = self._context.Process(
+            target=worker_main, name=f"gui-worker-{worker.worker_id}", daemon=True,
+            args=(worker.worker_id, worker.display.name if worker.display else None, self.factory, self.options,
+                  child_conn))
+        worker.process.start()
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.ready = False
+        logger.info(f"Started GUI worker {worker.worker_id}"
+                    + (f" on display {worker.display.name}" if worker.display else ""))
+
+    def _active(self):
+        return [worker for worker in self.workers if not worker.retired]
+
+    def _buffered(self):
+        return sum(len(worker.queue) for worker in self.workers)
+
+    def _take(self, worker):
+        """Next post for a worker, from its own queue or stolen from the busiest one"""
+        if not worker.queue:
+            victim = max((other for other in self.workers if other is not worker and other.queue),
+                         key=lambda other: len(other.queue), default=None)
+            if victim is None:
+                return None
+            stolen = [victim.queue.pop() for _ in range(max(1, len(victim.queue) // 2))]
+            worker.queue.extend(reversed(stolen))
+            worker.steals += len(stolen)
+            logger.debug(f"GUI worker {worker.worker_id} stole {len(stolen)} posts from worker {victim.worker_id}")
+        return worker.queue.popleft()
+
+    def _enqueue(self, post):
+        active = self._active() or self.workers
+        min(active, key=lambda worker: len(worker.queue) + (worker.current is not None)).queue.append(post)
+
+    def _crashed(self, worker, on_result):
+        exit_code = worker.process.exitcode if worker.process is not None else None
+        logger.error(f"GUI worker {worker.worker_id} died (exit code {exit_code})")
+        worker.conn.close()
+        worker.ready = False
+        post, worker.current = worker.current, None
+        if post is not None:
+            self._crashes[post["id"]] += 1
+            if self._crashes[post["id"]] >= self.max_post_crashes:
+                logger.error(f"Giving up post {post['id']}, it crashed {self._crashes[post['id']]} workers")
+                on_result(post, {"post_id": post["id"], "success": False, "verification": None})
+            else:
+                worker.queue.appendleft(post)
+
+        if worker.restarts < self.max_restarts:
+            worker.restarts += 1
+            try:
+                self._start(worker)
+                return
+            except DisplayError as e:
+                logger.error(f"Cannot restart GUI worker {worker.worker_id}: {str(e)}")
+        logger.error(f"Retiring GUI worker {worker.worker_id} after {worker.restarts} restarts")
+        worker.retired = True
+        # Its queue goes back to the others
+        orphans, worker.queue = worker.queue, deque()
+        for orphan in orphans:
+            self._enqueue(orphan)
+
+    def run(self, posts, on_result):
+        """
+        Write every post on the workers
+
+        Args:
+            posts (iterable): Posts to write, read lazily
+            on_result (callable): ``on_result(post, result)``, called in this process
+                with the outcome of each post; returning True hands the post out again
+                (e.g. when its file failed verification)
+
+        Returns:
+            list: Stats of every worker
+        """
+        source = iter(posts)
+        exhausted = False
+        try:
+            for worker in self.workers:
+                self._start(worker)
+
+            while True:
+                active = self._active()
+                if not active:
+                    logger.critical("Every GUI worker was retired, giving up the remaining posts")
+                    for worker in self.workers:
+                        while worker.queue:
+                            post = worker.queue.popleft()
+                            on_result(post, {"post_id": post["id"], "success": False, "verification": None})
+                    for post in source:
+                        on_result(post, {"post_id": post["id"], "success": False, "verification": None})
+                    break
+
+                # Read ahead, with bounded memory, into the shortest local queue
+                while not exhausted and self._buffered() < len(active) * self.buffer_per_worker:
+                    post = next(source, None)
+                    if post is None:
+                        exhausted = True
+                    else:
+                        self._enqueue(post)
+
+                for worker in active:
+                    if worker.ready and worker.current is None:
+                        post = self._take(worker)
+                        if post is not None:
+                            worker.current = post
+                            worker.conn.send(post)
+
+                if exhausted and not self._buffered() and all(worker.current is None for worker in active):
+                    break
+
+                waitables = {}
+                for worker in active:
+                    waitables[worker.conn] = worker
+                    waitables[worker.process.sentinel] = worker
+                ready = connection.wait(list(waitables), timeout=1)
+                handled = set()
+                for item in ready:
+                    worker = waitables[item]
+                    if worker in handled:
+                        continue
+                    handled.add(worker)
+                    self._receive(worker, on_result)
+        finally:
+            self.close()
+        return [worker.stats() for worker in self.workers]
+
+    def _receive(self, worker, on_result):
+        """Handle every message a worker sent, or its death"""
+        try:
+            while worker.conn.poll():
+                kind, payload = worker.conn.recv()
+                if kind == "ready":
+                    worker.ready = True
+                elif kind == "result":
+                    post, worker.current = worker.current, None
+                    worker.posts += 1
+                    if self.metrics is not None:
+                        self.metrics.merge(payload.pop("metrics", {}))
+                    worker.typing = payload.pop("typing", None) or worker.typing
+                    if on_result(post, payload):
+                        self._enqueue(post)
+        except (EOFError, OSError):
+            pass
+        if not worker.process.is_alive():
+            self._crashed(worker, on_result)
+
+    def close(self):
+        """Stop every worker and display"""
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                try:
+                    worker.conn.send(None)
+                except (OSError, ValueError):
+                    pass
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=10)
+                if worker.process.is_alive():
+                    logger.warning(f"GUI worker {worker.worker_id} did not stop, terminating it")
+                    worker.process.terminate()
+                    worker.process.join(timeout=5)
+                worker.process = None
+            if worker.display is not None:
+                worker.display.stop()
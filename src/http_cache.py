@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the http cache module
+logger = get_logger("http_cache")
+
+
+class CacheEntry:
+    """A cached JSON response with its validators"""
+
+    def __init__(self, url, body, etag=None, last_modified=None, fetched_at=None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @property
+    def age(self):
+        """Seconds since the response was fetched or last revalidated"""
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self):
+        """Headers turning the next request into a conditional one"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Persistent cache of JSON API responses, one file per URL and query
+
+    Entries younger than ``ttl`` seconds are served without a request;
+    older ones are revalidated with If-None-Match/If-Modified-Since.
+    """
+
+    def __init__(self, directory, ttl=0):
+        """
+        Args:
+            directory (Path): Where the cache files are stored
+            ttl (float): Seconds a response is served without revalidation
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(url, params=None):
+        """Cache key of a URL and its query parameters"""
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+    def _path(self, url, params):
+        return self.directory / f"{self.key(url, params)}.json"
+
+    def get(self, url, params=None):
+        """Return the cached entry for a request, or None"""
+        path = self._path(url, params)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return CacheEntry(data["url"], data["body"], data.get("etag"), data.get("last_modified"),
+                              data["fetched_at"])
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring corrupt cache entry {path.name}: {str(e)}")
+            return None
+
+    def is_fresh(self, entry):
+        """Whether an entry can be served without revalidation"""
+        return entry.age < self.ttl
+
+    def put(self, url, params, entry):
+        """Store an entry, atomically replacing any previous one"""
+        path = self._path(url, params)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"url": entry.url, "body": entry.body, "etag": entry.etag,
+                           "last_modified": entry.last_modified, "fetched_at": entry.fetched_at}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry for {url}: {str(e)}")
+
+    def store_response(self, url, params, response):
+        """Cache a 200 response and return the new entry"""
+        entry = CacheEntry(url, response.json(), response.headers.get("ETag"),
+                           response.headers.get("Last-Modified"))
+        self.put(url, params, entry)
+        return entry
+
+    def revalidated(self, url, params, entry):
+        """Record that the server confirmed an entry (304) and return it"""
+        entry.fetched_at = time.time()
+        self.put(url, params, entry)
+        return entry
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the journal module
+logger = get_logger("journal")
+
+PROCESSED = "processed"
+FAILED = "failed"
+# Saved, but the file does not match the post
+CORRUPT = "corrupt"
+
+
+def file_digest(path, chunk_size=1 << 16):
+    """Return the SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(file_path, data=None):
+    """
+    Fingerprint of a written file, as stored in the journal for processed posts
+
+    Args:
+        file_path (Path): Written file
+        data (bytes): Content just written to the file, hashed instead of reading the file back
+
+    Returns:
+        dict: Path, size, modification time and SHA-256 of the file
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    stat = os.stat(file_path)
+    return {"file": str(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "sha256": hashlib.sha256(data).hexdigest() if data is not None else file_digest(file_path)}
+
+
+class RunJournal:
+    """
+    Append-only, fsync'd record of the outcome of every post
+
+    Each line is a JSON object with the post ID, its status and, for
+    processed posts, the SHA-256, size and modification time of the written
+    file. The last line for a post wins, so a rerun simply appends.
+    """
+
+    def __init__(self, path, sync_every=1):
+        """
+        Args:
+            path (Path): Journal file, created on first write
+            sync_every (int): fsync after this many records (record_many always syncs)
+        """
+        self.path = Path(path)
+        self.sync_every = max(1, sync_every)
+        self.index = {}
+        self._file = None
+        self._unsynced = 0
+
+    def load(self):
+        """
+        Load the journal into the post ID index
+
+        A truncated last line, left by a crash in the middle of a write, is ignored.
+
+        Returns:
+            dict: Last record of every post, by post ID
+        """
+        self.index = {}
+        if not self.path.exists():
+            return self.index
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                    self.index[entry["post_id"]] = entry
+                except (ValueError, KeyError):
+                    logger.warning(f"Ignoring corrupt journal line {line_number} in {self.path}")
+        logger.info(f"Loaded {len(self.index)} posts from journal {self.path}")
+        return self.index
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            # Terminate a line torn by a crash, or the next record would be glued onto it
+            if self._file.tell() > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b"\n"
+                if torn:
+                    logger.warning(f"Journal {self.path} ends with a truncated line, starting a new one")
+                    self._file.write("\n")
+        return self._file
+
+    def _entry(self, post_id, status, file_path=None, details=None, file_fingerprint=None):
+        entry = {"post_id": post_id, "status": status, "time": time.strftime('%Y-%m-%d %H:%M:%S')}
+        if details:
+            entry.update(details)
+        if status == PROCESSED and file_path is not None:
+            try:
+                entry.update(file_fingerprint or fingerprint(file_path))
+            except OSError as e:
+                logger.warning(f"Could not fingerprint {file_path}: {str(e)}")
+        return entry
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def record(self, post_id, status, file_path=None, details=None):
+        """
+        Append the outcome of a post
+
+        Args:
+            post_id (int): ID of the post
+            status (str): PROCESSED, FAILED or CORRUPT
+            file_path (Path): Written file, fingerprinted for processed posts
+            details (dict): Extra fields stored with the entry, e.g. the verification result
+        """
+        self.record_many([(post_id, status, file_path, details)], sync=False)
+        if self._unsynced >= self.sync_every:
+            self._sync()
+
+    def record_many(self, outcomes, sync=True):
+        """
+        Append several outcomes, then fsync once
+
+        Args:
+            outcomes (iterable): (post ID, status, file path[, details[, fingerprint]]) tuples;
+                a fingerprint computed where the file was written saves hashing it here
+            sync (bool): fsync once the outcomes are written
+        """
+        f = self._open()
+        for post_id, status, file_path, *extra in outcomes:
+            entry = self._entry(post_id, status, file_path, *extra)
+            f.write(json.dumps(entry) + "\n")
+            self.index[post_id] = entry
+            self._unsynced += 1
+        if sync:
+            self._sync()
+
+    def is_done(self, post_id, file_path):
+        """
+        Check whether a post was processed and its output is still intact
+
+        A file whose size or modification time changed is rejected with a
+        stat; one that looks unchanged is re-hashed, since an edit can keep
+        both.
+        """
+        entry = self.index.get(post_id)
+        if entry is None or entry["status"] != PROCESSED or "sha256" not in entry:
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            return False
+        try:
+            return file_digest(file_path) == entry["sha256"]
+        except OSError:
+            return False
+
+    def close(self):
+        """Sync and close the journal file"""
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
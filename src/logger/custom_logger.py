@@ -1,27 +1,148 @@
+import atexit
 import logging
+import logging.handlers
 import os
-import yaml
-from datetime import datetime
+import queue
+import threading
 import sys
 
+from src.logger.log_storage import DEFAULT_STORAGE_CONFIG, DailyRotatingFileHandler, wait_for_maintenance
+
 # fmt: off
 # SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # PARENT_DIR = os.path.dirname(SCRIPT_DIR)
 # sys.path.append(os.path.dirname(PARENT_DIR))
 
 
+DEFAULT_ASYNC_CONFIG = {
+    'enabled': False,
+    'queue_size': 10000,
+    'full_policy': 'block',  # 'block' waits for room, 'drop' discards the record
+    'batch_size': 256,
+}
+
+
+class BatchedFileHandler(DailyRotatingFileHandler):
+    """DailyRotatingFileHandler that only flushes when the listener finishes a batch."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+class BatchedStreamHandler(logging.StreamHandler):
+    """StreamHandler that only flushes when the listener finishes a batch."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler on a bounded queue that blocks or drops when it is full."""
+
+    def __init__(self, log_queue, block=True):
+        super().__init__(log_queue)
+        self.block = block
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener:
+    """Background thread draining the log queue into the per-module handlers."""
+
+    _STOP = object()
+
+    def __init__(self, log_queue, batch_size=256):
+        self.queue = log_queue
+        self.batch_size = batch_size
+        self.handlers = {}
+        self._thread = None
+
+    def register(self, module_name, handlers):
+        """Route the records of a module to its handlers."""
+        self.handlers[module_name] = handlers
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            # Wait for one record, then take whatever else is already queued
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        stop = False
+        touched = set()
+        for record in batch:
+            if record is self._STOP:
+                stop = True
+                continue
+            for handler in self.handlers.get(record.name, ()):
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+                    touched.add(handler)
+        for handler in touched:
+            handler.flush_batch()
+        return stop
+
+    def stop(self):
+        """Write everything still queued, then stop the thread."""
+        if self._thread is not None:
+            self.queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+
 class CustomLoggerTracker:
-    def __init__(self, config_path='logging_config.yaml'):
-        """Initialize the custom logger with configuration."""
+    def __init__(self, config_path='logging_config.yaml', async_logging=None):
+        """
+        Initialize the custom logger with configuration.
+
+        async_logging (dict) overrides the 'async_logging' section of the
+        configuration; with 'enabled' set, loggers only enqueue records and a
+        background listener writes them in batches.
+        """
         self.config = self._load_config(config_path)
         self.loggers = {}
         self.base_log_dir = self.config.get('base_log_dir', 'logs')
+        self.async_config = {**DEFAULT_ASYNC_CONFIG, **self.config.get('async_logging', {}), **(async_logging or {})}
+        self.storage_config = {**DEFAULT_STORAGE_CONFIG, **self.config.get('storage', {})}
+        self._queue_handler = None
+        self._listener = None
+        self._hooks_registered = False
         self._setup_base_directory()
 
     def _load_config(self, config_path):
         """Load configuration from YAML file."""
         try:
             with open(config_path, 'r') as file:
+                import yaml
                 return yaml.safe_load(file)
         except FileNotFoundError:
             # Default configuration if file not found
@@ -30,6 +151,8 @@ class CustomLoggerTracker:
                 'default_level': 'INFO',
                 'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                 'console_output': True,
+                'async_logging': dict(DEFAULT_ASYNC_CONFIG),
+                'storage': dict(DEFAULT_STORAGE_CONFIG),
                 'modules': {
                     'main': {'level': 'INFO'},
                     'detection': {'level': 'INFO'},
@@ -45,14 +168,68 @@ class CustomLoggerTracker:
         if not os.path.exists(self.base_log_dir):
             os.makedirs(self.base_log_dir)
 
-    def _get_log_path(self, module_name):
-        """Generate the hierarchical path for log files."""
-        now = datetime.now()
-        year_dir = os.path.join(self.base_log_dir, str(now.year))
-        month_dir = os.path.join(year_dir, f"{now.month:02d}")
-        day_dir = os.path.join(month_dir, f"{now.day:02d}")
-        os.makedirs(day_dir, exist_ok=True)
-        return os.path.join(day_dir, f"{module_name}.log")
+    def _create_handlers(self, module_name):
+        """Create the file and console handlers of a module."""
+        batched = self.async_config['enabled']
+        formatter = logging.Formatter(self.config.get('format'))
+        handlers = []
+
+        # Create file handler writing to the year/month/day directory of the current date
+        file_handler_class = BatchedFileHandler if batched else DailyRotatingFileHandler
+        file_handler = file_handler_class(self.base_log_dir, module_name, **self.storage_config)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+        # Optionally add console handler
+        if self.config.get('console_output', True):
+            console_handler = BatchedStreamHandler() if batched else logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            handlers.append(console_handler)
+        return handlers
+
+    def _attach_handlers(self, logger, module_name):
+        handlers = self._create_handlers(module_name)
+        if self.async_config['enabled']:
+            self._start_listener()
+            self._listener.register(module_name, handlers)
+            logger.addHandler(self._queue_handler)
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
+
+    def _start_listener(self):
+        """Create the bounded queue and its listener on first use."""
+        if self._listener is not None:
+            return
+        log_queue = queue.Queue(maxsize=self.async_config['queue_size'])
+        self._queue_handler = BoundedQueueHandler(log_queue, block=self.async_config['full_policy'] != 'drop')
+        self._listener = BatchingQueueListener(log_queue, batch_size=self.async_config['batch_size'])
+        self._listener.start()
+        if not self._hooks_registered:
+            self._hooks_registered = True
+            atexit.register(self.shutdown)
+            # A forked worker has no listener thread, it logs synchronously instead
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._use_sync_in_child)
+
+    def _detach_handlers(self):
+        for logger in self.loggers.values():
+            for handler in logger.handlers[:]:
+                logger.removeHandler(handler)
+                if handler is not self._queue_handler:
+                    handler.close()
+
+    def _use_sync_in_child(self):
+        if self._listener is None:
+            return
+        for logger in self.loggers.values():
+            for handler in logger.handlers[:]:
+                logger.removeHandler(handler)
+        self._listener = None
+        self._queue_handler = None
+        self.async_config = {**self.async_config, 'enabled': False}
+        for module_name, logger in self.loggers.items():
+            self._attach_handlers(logger, module_name)
 
     def get_logger(self, module_name):
         """Get or create a logger for a specific module."""
@@ -65,35 +242,103 @@ class CustomLoggerTracker:
         level = getattr(logging, module_config.get('level', self.config['default_level']))
         logger.setLevel(level)
 
-        # Create formatter
-        formatter = logging.Formatter(self.config.get('format'))
-
-        # Create file handler with the hierarchical path
-        log_path = self._get_log_path(module_name)
-        file_handler = logging.FileHandler(log_path)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-
-        # Optionally add console handler
-        if self.config.get('console_output', True):
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
+        self._attach_handlers(logger, module_name)
 
         self.loggers[module_name] = logger
         return logger
 
+    def set_async(self, enabled=True, **options):
+        """
+        Switch every logger of the tracker to (or from) asynchronous mode.
+
+        options override the queue_size, full_policy and batch_size settings.
+        """
+        self.shutdown()
+        self._detach_handlers()
+        self.async_config = {**self.async_config, **options, 'enabled': enabled}
+        for module_name, logger in self.loggers.items():
+            self._attach_handlers(logger, module_name)
+
+    def shutdown(self):
+        """Flush every queued record, stop the background listener and finish pending compression."""
+        if self._listener is None:
+            wait_for_maintenance()
+            return
+        self._listener.stop()
+        dropped = self._queue_handler.dropped
+        for handlers in self._listener.handlers.values():
+            for handler in handlers:
+                if dropped and isinstance(handler, BatchedFileHandler):
+                    handler.handle(logging.makeLogRecord({
+                        'name': handler.module_name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                        'msg': f"{dropped} log records were dropped because the log queue was full"}))
+                handler.close()
+        wait_for_maintenance()
+        self._listener = None
+        for logger in self.loggers.values():
+            if self._queue_handler in logger.handlers:
+                logger.removeHandler(self._queue_handler)
+        self._queue_handler = None
+        self.async_config = {**self.async_config, 'enabled': False}
+        # Records logged after shutdown go straight to the files again
+        for module_name, logger in self.loggers.items():
+            if not logger.handlers:
+                self._attach_handlers(logger, module_name)
+
     def update_config(self, new_config):
         """Update logger configuration."""
         self.config.update(new_config)
         # Reset all loggers to apply new configuration
-        for module_name in self.loggers:
-            logger = self.loggers[module_name]
-            for handler in logger.handlers[:]:
-                logger.removeHandler(handler)
+        self.shutdown()
+        self._detach_handlers()
         self.loggers = {}
 
 
+_default_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker():
+    """Return the tracker shared by every module of the process, created on first use."""
+    global _default_tracker
+    if _default_tracker is None:
+        with _tracker_lock:
+            if _default_tracker is None:
+                _default_tracker = CustomLoggerTracker()
+    return _default_tracker
+
+
+def shutdown_logging():
+    """Flush and stop the shared tracker, if anything was logged at all."""
+    if _default_tracker is not None:
+        _default_tracker.shutdown()
+
+
+class LazyLogger:
+    """Stands in for a module logger until the first record is logged."""
+
+    def __init__(self, module_name):
+        self.module_name = module_name
+        self._logger = None
+
+    def __getattr__(self, name):
+        # Only reached for logger attributes (info, error, ...), so the
+        # tracker, its directories and file handlers are created on first use
+        if self._logger is None:
+            self._logger = get_tracker().get_logger(self.module_name)
+        return getattr(self._logger, name)
+
+
+def get_logger(module_name):
+    """
+    Get a logger for a module from the shared tracker.
+
+    Modules call this at import time, so the returned logger only sets up
+    logging when it is first used.
+    """
+    return LazyLogger(module_name)
+
+
 if __name__ == "__main__":
     # Create an instance first
     logger_tracker = CustomLoggerTracker()
@@ -0,0 +1,160 @@
+"""
+Pull every log line about a post out of the log tree
+
+The per-day index.jsonl written by DailyRotatingFileHandler gives the
+segment and byte offset of each line mentioning a post, so only the
+segments that contain the post are opened (and decompressed). Days without
+an index are scanned line by line.
+
+Usage:
+    python -m src.logger.log_query 42
+    python -m src.logger.log_query 42 --logs logs --since 2025-01-01 --module backends --level ERROR
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from src.logger.log_storage import (ACTIVE_SUFFIX, INDEX_FILE, POST_ID_PATTERN, SEGMENT_PATTERN,
+                                    iter_day_directories, segment_name, stem_module)
+
+
+def open_segment(directory, file_stem, segment):
+    """Open segment ``segment`` of a ``<module>`` or ``<module>-<pid>`` log in binary mode, wherever it is"""
+    for name in (segment_name(file_stem, segment, compressed=True), segment_name(file_stem, segment)):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return gzip.open(path, 'rb') if name.endswith(".gz") else open(path, 'rb')
+    # Not rolled over yet, the segment is still the active file
+    path = os.path.join(directory, file_stem + ACTIVE_SUFFIX)
+    return open(path, 'rb') if os.path.exists(path) else None
+
+
+def mentions_post(line, post_id):
+    return any(int(match) == post_id for match in POST_ID_PATTERN.findall(line))
+
+
+def read_index(directory, post_id, modules=None, levels=None):
+    """
+    Return the index entries of a post in a day directory, or None if the day has no index
+
+    Returns:
+        dict: Offsets by (file name stem, segment)
+    """
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    offsets = defaultdict(list)
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if str(entry.get("post_id")) != str(post_id):
+                continue
+            if modules and entry["module"] not in modules:
+                continue
+            if levels and entry["level"] not in levels:
+                continue
+            # Lines of forked processes are in <module>-<pid> files
+            offsets[(entry.get("file", entry["module"]), entry["segment"])].append(entry["offset"])
+    return offsets
+
+
+def scan_segment(stream, post_id):
+    """Yield every line of a segment that mentions the post"""
+    for raw_line in stream:
+        line = raw_line.decode('utf-8', 'replace').rstrip("\n")
+        if mentions_post(line, post_id):
+            yield line
+
+
+def lines_from_index(directory, offsets, post_id):
+    """Yield the indexed lines of a day, reading each segment once in offset order"""
+    for (file_stem, segment), positions in sorted(offsets.items()):
+        stream = open_segment(directory, file_stem, segment)
+        if stream is None:
+            continue
+        with stream:
+            for offset in sorted(set(positions)):
+                stream.seek(offset)
+                line = stream.readline().decode('utf-8', 'replace').rstrip("\n")
+                if not mentions_post(line, post_id):
+                    # Offsets drift when several processes append to one file, fall back to a scan
+                    stream.seek(0)
+                    yield from scan_segment(stream, post_id)
+                    break
+                yield line
+
+
+def lines_from_scan(directory, post_id, modules=None, levels=None):
+    """Yield the lines of a day without an index by scanning its files"""
+    for name in sorted(os.listdir(directory)):
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            module_name = match.group('module')
+        elif name.endswith(ACTIVE_SUFFIX):
+            module_name = name[:-len(ACTIVE_SUFFIX)]
+        else:
+            continue
+        if modules and stem_module(module_name) not in modules:
+            continue
+        path = os.path.join(directory, name)
+        with (gzip.open(path, 'rb') if name.endswith(".gz") else open(path, 'rb')) as stream:
+            for line in scan_segment(stream, post_id):
+                if not levels or any(f" - {level} - " in line for level in levels):
+                    yield line
+
+
+def find_post_lines(base_log_dir, post_id, since=None, until=None, modules=None, levels=None):
+    """
+    Yield every log line mentioning ``post_id``, day by day
+
+    Args:
+        base_log_dir (str): Root of the year/month/day log tree
+        post_id (int): Post to look for
+        since (date): First day to search, inclusive
+        until (date): Last day to search, inclusive
+        modules (list): Only search the logs of these modules
+        levels (list): Only return lines of these levels
+    """
+    for day, directory in iter_day_directories(base_log_dir):
+        if (since and day < since) or (until and day > until):
+            continue
+        offsets = read_index(directory, post_id, modules, levels)
+        if offsets is None:
+            yield from lines_from_scan(directory, post_id, modules, levels)
+        else:
+            yield from lines_from_index(directory, offsets, post_id)
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print every log line about a post")
+    parser.add_argument("post_id", type=int, help="Post ID to look up")
+    parser.add_argument("--logs", default="logs", help="Root of the log tree")
+    parser.add_argument("--since", type=parse_date, help="First day to search, YYYY-MM-DD")
+    parser.add_argument("--until", type=parse_date, help="Last day to search, YYYY-MM-DD")
+    parser.add_argument("--module", action="append", help="Only search this module, repeatable")
+    parser.add_argument("--level", action="append", type=str.upper, help="Only show this level, repeatable")
+    args = parser.parse_args(argv)
+
+    found = 0
+    for line in find_post_lines(args.logs, args.post_id, args.since, args.until, args.module, args.level):
+        print(line)
+        found += 1
+    if not found:
+        print(f"No log lines found for post {args.post_id}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+
+DEFAULT_STORAGE_CONFIG = {
+    'max_bytes': 10 * 1024 * 1024,  # roll over to a new segment at this size, 0 for no cap
+    'compress': True,
+    'retention_days': 30,  # day directories older than this are deleted, 0 keeps everything
+    'max_total_mb': 1024,  # oldest closed segments are deleted above this total, 0 for no cap
+    'index': True,
+}
+
+INDEX_FILE = "index.jsonl"
+ACTIVE_SUFFIX = ".log"
+
+# "post 12", "post ID 12", "post_12.txt", ... in a log message
+POST_ID_PATTERN = re.compile(r"\bpost[ _](?:ID )?#?(\d+)\b", re.IGNORECASE)
+SEGMENT_PATTERN = re.compile(r"^(?P<module>.+)\.(?P<number>\d+)\.log(?P<gz>\.gz)?$")
+# "<module>-<pid>", the file name stem of a module log written by a worker process
+PROCESS_STEM_PATTERN = re.compile(r"^(?P<module>.+)-\d+$")
+
+# PID of the process that first imported this module, inherited by the processes it starts, forked or spawned
+MAIN_PID_VARIABLE = "LOG_STORAGE_MAIN_PID"
+os.environ.setdefault(MAIN_PID_VARIABLE, str(os.getpid()))
+
+
+def day_directory(base_log_dir, day):
+    """Return the year/month/day directory of a date."""
+    return os.path.join(base_log_dir, str(day.year), f"{day.month:02d}", f"{day.day:02d}")
+
+
+def segment_name(module_name, number, compressed=False):
+    """File name of a closed segment of a module log."""
+    return f"{module_name}.{number}.log" + (".gz" if compressed else "")
+
+
+def next_segment_number(directory, module_name):
+    """Number the next closed segment of a module in a day directory gets."""
+    highest = 0
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 1
+    for name in names:
+        match = SEGMENT_PATTERN.match(name)
+        if match and match.group('module') == module_name:
+            highest = max(highest, int(match.group('number')))
+    return highest + 1
+
+
+def process_stem(module_name):
+    """File name stem of a module log in this process, ``<module>-<pid>`` in every process but the main one."""
+    if os.environ.get(MAIN_PID_VARIABLE) == str(os.getpid()):
+        return module_name
+    return f"{module_name}-{os.getpid()}"
+
+
+def stem_module(stem):
+    """Module a file name stem belongs to, without the process ID of a forked process."""
+    match = PROCESS_STEM_PATTERN.match(stem)
+    return match.group('module') if match else stem
+
+
+def extract_post_id(record):
+    """Return the post ID a record is about, from ``extra={'post_id': ...}`` or the message."""
+    post_id = getattr(record, 'post_id', None)
+    if post_id is not None:
+        return post_id
+    match = POST_ID_PATTERN.search(record.getMessage())
+    return int(match.group(1)) if match else None
+
+
+def iter_day_directories(base_log_dir):
+    """Yield (date, directory) for every day directory of the log tree, oldest first."""
+    for year in sorted(os.listdir(base_log_dir)) if os.path.isdir(base_log_dir) else []:
+        year_dir = os.path.join(base_log_dir, year)
+        if not (year.isdigit() and os.path.isdir(year_dir)):
+            continue
+        for month in sorted(os.listdir(year_dir)):
+            month_dir = os.path.join(year_dir, month)
+            if not (month.isdigit() and os.path.isdir(month_dir)):
+                continue
+            for day in sorted(os.listdir(month_dir)):
+                day_dir = os.path.join(month_dir, day)
+                if day.isdigit() and os.path.isdir(day_dir):
+                    try:
+                        yield datetime(int(year), int(month), int(day)).date(), day_dir
+                    except ValueError:
+                        continue
+
+
+class LogMaintenance:
+    """
+    Background thread compressing closed segments and enforcing retention.
+
+    Shared by every handler of the process, so rollovers never wait for gzip.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, task, *args):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-maintenance", daemon=True)
+                self._thread.start()
+        self._queue.put((task, args))
+
+    def _run(self):
+        while True:
+            task, args = self._queue.get()
+            try:
+                task(*args)
+            except Exception as e:
+                # Never let housekeeping break logging
+                print(f"Log maintenance failed: {str(e)}")
+
+    def wait(self, timeout=10):
+        """Block until the tasks submitted so far are done."""
+        done = threading.Event()
+        self.submit(done.set)
+        return done.wait(timeout)
+
+
+_maintenance = LogMaintenance()
+
+RETENTION_INTERVAL = 60
+_last_retention = {}
+
+
+def compress_segment(path):
+    """Gzip a closed segment next to itself and remove the original."""
+    gz_path = path + ".gz"
+    tmp_path = f"{gz_path}.{os.getpid()}.tmp"
+    try:
+        with open(path, 'rb') as source, gzip.open(tmp_path, 'wb', compresslevel=6) as target:
+            shutil.copyfileobj(source, target, 1 << 20)
+        os.replace(tmp_path, gz_path)
+        os.remove(path)
+    except FileNotFoundError:
+        # Already compressed by another process
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def enforce_retention(base_log_dir, retention_days=30, max_total_mb=0, compress=True, today=None):
+    """
+    Apply the retention policy to a log tree.
+
+    Day directories older than ``retention_days`` are deleted. Closed
+    segments that were never compressed (a process exited first) and active
+    files left by stopped processes are compressed, then the oldest closed
+    segments are deleted while the tree is larger than ``max_total_mb``.
+    """
+    today = today or datetime.now().date()
+    days = list(iter_day_directories(base_log_dir))
+    if retention_days:
+        cutoff = today - timedelta(days=retention_days)
+        for day, directory in days:
+            if day < cutoff:
+                shutil.rmtree(directory, ignore_errors=True)
+                # Remove the month and year directories once they are empty
+                for parent in (os.path.dirname(directory), os.path.dirname(os.path.dirname(directory))):
+                    try:
+                        os.rmdir(parent)
+                    except OSError:
+                        break
+        days = [(day, directory) for day, directory in days if day >= cutoff]
+
+    if compress:
+        for day, directory in days:
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if (name.endswith(ACTIVE_SUFFIX) and not SEGMENT_PATTERN.match(name)
+                        and day < today - timedelta(days=1)):
+                    # A process still running since yesterday rolls its file over on its next
+                    # record, older active files belong to processes that stopped before that
+                    module_name = name[:-len(ACTIVE_SUFFIX)]
+                    closed_path = os.path.join(directory, segment_name(
+                        module_name, next_segment_number(directory, module_name)))
+                    os.replace(path, closed_path)
+                    path, name = closed_path, os.path.basename(closed_path)
+                if SEGMENT_PATTERN.match(name) and not name.endswith(".gz"):
+                    compress_segment(path)
+
+    if max_total_mb:
+        segments = []
+        total = 0
+        for day, directory in days:
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                size = os.path.getsize(path)
+                total += size
+                if SEGMENT_PATTERN.match(name):
+                    segments.append((day, os.path.getmtime(path), path, size))
+        for _, _, path, size in sorted(segments):
+            if total <= max_total_mb * 1024 * 1024:
+                break
+            os.remove(path)
+            total -= size
+
+
+class DailyRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """
+    Writes ``<base>/YYYY/MM/DD/<module>.log`` and follows the calendar.
+
+    At midnight, or when the file reaches ``max_bytes``, the file is closed
+    as ``<module>.<n>.log``, compressed in the background and a new one is
+    opened in the directory of the current day. Lines mentioning a post ID
+    are recorded in the per-day ``index.jsonl`` with their segment and byte
+    offset so log_query can jump straight to them.
+
+    Worker processes, forked or spawned, write ``<module>-<pid>.log`` files
+    of their own: renaming a file other processes still append to would
+    lose their lines, so each file is only ever written and rolled over by
+    one process. A handler inherited through a fork switches on the child's
+    first record.
+    """
+
+    def __init__(self, base_log_dir, module_name, max_bytes=0, compress=True, retention_days=0,
+                 max_total_mb=0, index=True, encoding='utf-8'):
+        self.base_log_dir = base_log_dir
+        self.module_name = module_name
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.retention_days = retention_days
+        self.max_total_mb = max_total_mb
+        self.index = index
+        self._index_file = None
+        self._day = datetime.now().date()
+        self._day_end = self._midnight_after(self._day)
+        self._directory = day_directory(base_log_dir, self._day)
+        os.makedirs(self._directory, exist_ok=True)
+        self.file_stem = process_stem(module_name)
+        self._segment = next_segment_number(self._directory, self.file_stem)
+        self._size = 0
+        super().__init__(os.path.join(self._directory, self.file_stem + ACTIVE_SUFFIX), 'a', encoding=encoding,
+                         delay=False)
+        _handlers.add(self)
+        self._schedule_retention()
+
+    def _open(self):
+        # Plain '\n' line endings on every platform keep the indexed byte offsets exact
+        stream = open(self.baseFilename, self.mode, encoding=self.encoding, errors=self.errors, newline='')
+        self._size = os.fstat(stream.fileno()).st_size
+        return stream
+
+    @staticmethod
+    def _midnight_after(day):
+        return time.mktime((day + timedelta(days=1)).timetuple())
+
+    def shouldRollover(self, record):
+        if record.created >= self._day_end:
+            return True
+        return bool(self.max_bytes) and self._size >= self.max_bytes
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self._close_index()
+
+        # Another process sharing the file may already have rolled it over
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            number = max(self._segment, next_segment_number(self._directory, self.file_stem))
+            closed_path = os.path.join(self._directory, segment_name(self.file_stem, number))
+            os.replace(self.baseFilename, closed_path)
+            if self.compress:
+                _maintenance.submit(compress_segment, closed_path)
+
+        now = datetime.now().date()
+        self._day_end = self._midnight_after(now)
+        if now != self._day:
+            self._day = now
+            self._directory = day_directory(self.base_log_dir, now)
+            os.makedirs(self._directory, exist_ok=True)
+            self.baseFilename = os.path.join(self._directory, self.file_stem + ACTIVE_SUFFIX)
+            self._schedule_retention()
+        self._segment = next_segment_number(self._directory, self.file_stem)
+        self.stream = self._open()
+
+    def _flush_before_fork(self):
+        # BatchedFileHandler.flush waits for the end of a batch, the child must not inherit buffered lines
+        self.acquire()
+        try:
+            DailyRotatingFileHandler.flush(self)
+        finally:
+            self.release()
+
+    def _use_process_file(self):
+        """Leave the files shared with the parent, the next record opens ``<module>-<pid>.log``"""
+        if self.stream:
+            # Flushed before the fork, closing writes nothing
+            self.stream.close()
+            self.stream = None
+        self._close_index()
+        self.file_stem = process_stem(self.module_name)
+        self.baseFilename = os.path.join(self._directory, self.file_stem + ACTIVE_SUFFIX)
+        self._segment = next_segment_number(self._directory, self.file_stem)
+
+    def _schedule_retention(self):
+        if not (self.retention_days or self.max_total_mb or self.compress):
+            return
+        # Every module logger opens a handler, one sweep of the tree per minute is enough
+        now = time.monotonic()
+        if now - _last_retention.get(self.base_log_dir, -RETENTION_INTERVAL) < RETENTION_INTERVAL:
+            return
+        _last_retention[self.base_log_dir] = now
+        _maintenance.submit(enforce_retention, self.base_log_dir, self.retention_days, self.max_total_mb,
+                            self.compress)
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            data = self.format(record) + self.terminator
+            offset = self._size
+            self.stream.write(data)
+            # stream.tell() would flush the buffer on every record, count the bytes instead
+            self._size += len(data) if data.isascii() else len(data.encode(self.encoding, 'replace'))
+            if self.index:
+                self._index_record(record, offset)
+            self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def _index_record(self, record, offset):
+        post_id = extract_post_id(record)
+        if post_id is None:
+            return
+        if self._index_file is None:
+            self._index_file = open(os.path.join(self._directory, INDEX_FILE), 'a', encoding='utf-8')
+        entry = {"post_id": post_id, "module": self.module_name, "level": record.levelname,
+                 "segment": self._segment, "offset": offset}
+        if self.file_stem != self.module_name:
+            entry["file"] = self.file_stem
+        self._index_file.write(json.dumps(entry) + "\n")
+
+    def _close_index(self):
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    def flush(self):
+        super().flush()
+        if self._index_file is not None:
+            self._index_file.flush()
+
+    def close(self):
+        _handlers.discard(self)
+        self.acquire()
+        try:
+            self._close_index()
+        finally:
+            self.release()
+        super().close()
+
+
+# Every open DailyRotatingFileHandler, switched to files of its own in a forked child
+_handlers = weakref.WeakSet()
+
+
+def _flush_before_fork():
+    for handler in list(_handlers):
+        handler._flush_before_fork()
+
+
+def _use_process_files():
+    for handler in list(_handlers):
+        handler._use_process_file()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_flush_before_fork, after_in_child=_use_process_files)
+
+
+def wait_for_maintenance(timeout=10):
+    """Wait for pending compression and retention work, e.g. before exiting."""
+    return _maintenance.wait(timeout)
@@ -0,0 +1,131 @@
+import functools
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from src import profiler
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_EXHAUSTED = object()
+
+
+def percentile(sorted_samples, quantile):
+    """Nearest-rank percentile of an already sorted, non-empty list"""
+    rank = max(1, math.ceil(quantile * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class PhaseMetrics:
+    """
+    Latency samples per phase of the run (fetch, launch, typing, saving, ...)
+
+    Recording is a lock-protected list append, cheap enough for every
+    keystroke batch on the hot path.
+    """
+
+    def __init__(self):
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        """Add one sample, in seconds, to a phase"""
+        with self._lock:
+            self._samples[phase].append(seconds)
+
+    def drain(self):
+        """Return the samples recorded so far and forget them, e.g. to ship them to another process"""
+        with self._lock:
+            samples = {phase: values for phase, values in self._samples.items() if values}
+            self._samples = defaultdict(list)
+        return samples
+
+    def merge(self, samples):
+        """Add samples returned by the drain() of another PhaseMetrics"""
+        with self._lock:
+            for phase, values in samples.items():
+                self._samples[phase].extend(values)
+
+    @contextmanager
+    def span(self, phase):
+        """Time the body of a with block as one sample of ``phase``"""
+        start = time.perf_counter()
+        profiler.push_phase(phase)
+        try:
+            yield
+        finally:
+            profiler.pop_phase()
+            self.record(phase, time.perf_counter() - start)
+
+    def timed_iter(self, iterable, phase):
+        """
+        Yield the items of ``iterable``, timing the production of each one as a sample of ``phase``
+
+        Used for sources that fetch lazily, e.g. posts streamed page by page
+        from the API: most reads are served from memory and the page
+        requests stand out in the percentiles.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.span(phase):
+                item = next(iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                return
+            yield item
+
+    def summary(self):
+        """
+        Aggregate the samples
+
+        Returns:
+            dict: Per phase count, total, mean, max and p50/p95/p99, in seconds
+        """
+        with self._lock:
+            samples = {phase: sorted(values) for phase, values in self._samples.items() if values}
+
+        result = {}
+        for phase, values in sorted(samples.items()):
+            total = sum(values)
+            stats = {"count": len(values), "total": total, "mean": total / len(values), "max": values[-1]}
+            for quantile in QUANTILES:
+                stats[f"p{int(quantile * 100)}"] = percentile(values, quantile)
+            result[phase] = stats
+        return result
+
+    def to_prometheus(self, metric="notepad_bot_phase_seconds"):
+        """Render the summary in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {metric} Time spent in each phase of the bot run",
+            f"# TYPE {metric} summary",
+        ]
+        for phase, stats in self.summary().items():
+            for quantile in QUANTILES:
+                value = stats[f"p{int(quantile * 100)}"]
+                lines.append(f'{metric}{{phase="{phase}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{phase="{phase}"}} {stats["total"]:.6f}')
+            lines.append(f'{metric}_count{{phase="{phase}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        """Write the summary as JSON"""
+        with open(path, "w") as f:
+            json.dump({"phases": self.summary()}, f, indent=2)
+
+    def write_prometheus(self, path):
+        """Write the summary in Prometheus text format"""
+        with open(path, "w") as f:
+            f.write(self.to_prometheus())
+
+
+def timed(phase):
+    """Decorator timing a method into ``self.metrics`` under ``phase``"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.span(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,254 @@
+import os
+import struct
+import zlib
+from pathlib import Path
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the packed store module
+logger = get_logger("packed_store")
+
+# Every record is a header followed by the document bytes
+RECORD_MAGIC = b"PST1"
+RECORD_HEADER = struct.Struct("<4sQII")  # magic, post ID, length, CRC-32
+SEGMENT_PATTERN = "segment_{:05d}.pack"
+INDEX_FILE = "index.tsv"
+
+
+class PackedStoreError(Exception):
+    """Raised when a record of the packed store is missing or corrupt"""
+
+
+class PackedStore:
+    """
+    Append-only store packing many documents into a few segment files
+
+    Documents are appended to ``segment_NNNNN.pack`` files, a new segment
+    being started once ``max_segment_bytes`` is reached. ``index.tsv`` maps
+    every post ID to its segment, offset and length and is loaded into a
+    dict, so a document is read back with one seek. Data is flushed and
+    fsync'd every ``sync_every`` records, before the matching index lines,
+    so the index never points at data that could be lost. Records written
+    after the last index line (a crash between the two) are recovered by
+    scanning the tail of the last segment on open. A post written twice is
+    appended again and the index keeps the latest copy.
+
+    A store opened with ``read_only`` never changes a file, so it can be read
+    while another process is appending to it.
+    """
+
+    def __init__(self, directory, max_segment_bytes=256 * 1024 * 1024, sync_every=100, read_only=False):
+        """
+        Args:
+            directory (Path): Directory of the segments and the index, created if missing
+            max_segment_bytes (int): Size after which a new segment is started
+            sync_every (int): fsync after this many records, close always syncs
+            read_only (bool): Only read the store, without recovering or appending
+        """
+        self.directory = Path(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.sync_every = max(1, sync_every)
+        self.read_only = read_only
+        self.index = {}
+        self._segment = None
+        self._segment_number = 0
+        self._segment_size = 0
+        self._index_file = None
+        self._pending_index = []
+        self._readers = {}
+
+    def _segment_path(self, number):
+        return self.directory / SEGMENT_PATTERN.format(number)
+
+    def open(self):
+        """Load the index, recover unindexed records and open the last segment for appending"""
+        if not self.read_only:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.index = {}
+        index_path = self.directory / INDEX_FILE
+        if index_path.exists():
+            with open(index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        post_id, segment, offset, length = (int(value) for value in line.split("\t"))
+                    except ValueError:
+                        # Truncated last line, the record is recovered from the segment below
+                        continue
+                    self.index[post_id] = (segment, offset, length)
+
+        segments = sorted(int(path.stem.split("_")[1]) for path in self.directory.glob("segment_*.pack"))
+        self._segment_number = segments[-1] if segments else 1
+        self._recover(self._segment_number)
+
+        if self.read_only:
+            logger.info(f"Opened packed store {self.directory} read-only with {len(self.index)} posts "
+                        f"in {len(segments)} segments")
+            return self
+        self._segment = open(self._segment_path(self._segment_number), "ab", buffering=1024 * 1024)
+        self._segment_size = self._segment.tell()
+        self._index_file = open(index_path, "a", encoding="utf-8")
+        logger.info(f"Opened packed store {self.directory} with {len(self.index)} posts "
+                    f"in {max(len(segments), 1)} segments")
+        return self
+
+    def _recover(self, segment):
+        """
+        Index the records of a segment written after its last indexed record
+
+        In read-only mode the records are only added to the in-memory index,
+        and a torn tail is left alone: it may be a record still being written.
+        """
+        path = self._segment_path(segment)
+        if not path.exists():
+            return
+        ends = [offset + length for seg, offset, length in self.index.values() if seg == segment]
+        position = max(ends) if ends else 0
+        recovered = []
+        with open(path, "rb") as f:
+            f.seek(position)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                magic, post_id, length, crc = RECORD_HEADER.unpack(header)
+                data = f.read(length)
+                if magic != RECORD_MAGIC or len(data) < length or zlib.crc32(data) != crc:
+                    break
+                recovered.append((post_id, segment, position, RECORD_HEADER.size + length))
+                position += RECORD_HEADER.size + length
+        if position < path.stat().st_size and not self.read_only:
+            # Drop a record torn by a crash, the next append starts on a record boundary
+            logger.warning(f"Truncating torn record at offset {position} of {path.name}")
+            os.truncate(path, position)
+        for post_id, seg, offset, length in recovered:
+            self.index[post_id] = (seg, offset, length)
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} unindexed records from {path.name}")
+            if not self.read_only:
+                self._pending_index.extend(recovered)
+
+    def append(self, post_id, data):
+        """
+        Append a document
+
+        Args:
+            post_id (int): ID of the post
+            data (bytes): Document as it would be written to post_<id>.txt
+
+        Raises:
+            PackedStoreError: If the store is open read-only
+        """
+        if self.read_only:
+            raise PackedStoreError(f"Packed store {self.directory} is open read-only")
+        length = RECORD_HEADER.size + len(data)
+        if self._segment_size and self._segment_size + length > self.max_segment_bytes:
+            self._roll_over()
+        offset = self._segment_size
+        self._segment.write(RECORD_HEADER.pack(RECORD_MAGIC, post_id, len(data), zlib.crc32(data)))
+        self._segment.write(data)
+        self._segment_size += length
+        self.index[post_id] = (self._segment_number, offset, length)
+        self._pending_index.append((post_id, self._segment_number, offset, length))
+        if len(self._pending_index) >= self.sync_every:
+            self.sync()
+
+    def _roll_over(self):
+        self.sync()
+        self._segment.close()
+        self._segment_number += 1
+        self._segment = open(self._segment_path(self._segment_number), "ab", buffering=1024 * 1024)
+        self._segment_size = 0
+
+    def sync(self):
+        """fsync the appended data, then write and fsync its index lines"""
+        if not self._pending_index:
+            return
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._index_file.write("".join(f"{post_id}\t{segment}\t{offset}\t{length}\n"
+                                       for post_id, segment, offset, length in self._pending_index))
+        self._index_file.flush()
+        os.fsync(self._index_file.fileno())
+        self._pending_index = []
+
+    def __contains__(self, post_id):
+        return post_id in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def read(self, post_id):
+        """
+        Read a document back
+
+        Returns:
+            bytes: The document
+
+        Raises:
+            PackedStoreError: If the post is not in the store or its record is corrupt
+        """
+        try:
+            segment, offset, length = self.index[post_id]
+        except KeyError:
+            raise PackedStoreError(f"Post {post_id} is not in the packed store")
+        if segment == self._segment_number and self._segment is not None:
+            # The record may still sit in the write buffer
+            self._segment.flush()
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = open(self._segment_path(segment), "rb")
+        reader.seek(offset)
+        record = reader.read(length)
+        magic, stored_id, data_length, crc = RECORD_HEADER.unpack_from(record)
+        data = record[RECORD_HEADER.size:]
+        if magic != RECORD_MAGIC or stored_id != post_id or len(data) != data_length or zlib.crc32(data) != crc:
+            raise PackedStoreError(f"Record of post {post_id} in segment {segment} is corrupt")
+        return data
+
+    def export(self, directory, post_ids=None):
+        """
+        Write documents back as ``directory``/post_<id>.txt files
+
+        Args:
+            directory (Path): Destination directory, created if missing
+            post_ids (iterable): Posts to export, all of them by default
+
+        Returns:
+            tuple: (number of files written, IDs that could not be exported)
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        written = 0
+        failed = []
+        # Reading in segment and offset order keeps the reads sequential
+        ids = self.index if post_ids is None else post_ids
+        for post_id in sorted(ids, key=lambda pid: self.index.get(pid, (0, 0, 0))):
+            try:
+                data = self.read(post_id)
+                with open(directory / f"post_{post_id}.txt", "wb") as f:
+                    f.write(data)
+                written += 1
+            except (PackedStoreError, OSError) as e:
+                logger.error(f"Failed to export post {post_id}: {str(e)}")
+                failed.append(post_id)
+        return written, failed
+
+    def close(self):
+        """Sync and close every file"""
+        if self._segment is not None:
+            self.sync()
+            self._segment.close()
+            self._segment = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
@@ -0,0 +1,87 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the parallel module
+logger = get_logger("parallel")
+
+
+class ParallelExecutor:
+    """
+    Shard posts across a pool of workers and collect the outcomes
+
+    Results are reassembled in input order, so the processed/skipped lists
+    do not depend on the number of workers or on which shard finishes first.
+    """
+
+    def __init__(self, workers=None, use_threads=False):
+        """
+        Args:
+            workers (int): Pool size, defaults to the number of CPUs
+            use_threads (bool): Use threads instead of processes, for I/O bound writers
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.use_threads = use_threads
+
+    def run_iter(self, posts, writer, on_shard=None, shard_size=256):
+        """
+        Write posts from an iterable, cutting shards only as the pool has room
+
+        At most two shards per worker are in flight, so a stream of any
+        length is written with bounded memory.
+
+        Args:
+            posts (iterable): Posts to write
+            writer (callable): Picklable callable taking a list of posts and
+                returning (post ID, success[, fingerprint]) tuples, see OutputBackend.shard_writer
+            on_shard (callable): Called with the (post ID, success[, fingerprint]) tuples of each
+                finished shard, as soon as it finishes
+            shard_size (int): Posts per shard
+
+        Returns:
+            tuple: (processed post IDs, failed post IDs) in input order
+        """
+        iterator = iter(posts)
+        results = []
+        pool_class = ThreadPoolExecutor if self.use_threads else ProcessPoolExecutor
+        kind = "threads" if self.use_threads else "processes"
+        logger.info(f"Writing posts in shards of {shard_size} on {self.workers} {kind}")
+
+        with pool_class(max_workers=self.workers) as pool:
+            pending = {}
+
+            def submit_next():
+                shard = list(islice(iterator, shard_size))
+                if not shard:
+                    return False
+                results.append(None)
+                pending[pool.submit(writer, shard)] = (len(results) - 1, [post["id"] for post in shard])
+                return True
+
+            while len(pending) < self.workers * 2 and submit_next():
+                pass
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, post_ids = pending.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        logger.error(f"Worker failed on shard {index}: {str(e)}")
+                        results[index] = [(post_id, False) for post_id in post_ids]
+                    if on_shard is not None:
+                        on_shard(results[index])
+                    submit_next()
+
+        return self._split(results)
+
+    @staticmethod
+    def _split(results):
+        processed = []
+        failed = []
+        for shard_results in results:
+            for post_id, success, *_ in shard_results:
+                (processed if success else failed).append(post_id)
+        return processed, failed
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the pipeline module
+logger = get_logger("pipeline")
+
+_END = object()
+
+
+class Pipeline:
+    """
+    Producer thread feeding a consumer through a bounded queue
+
+    The producer iterates ``source`` (e.g. posts streamed from the API) and
+    prepares each item ahead of the consumer, which iterates the pipeline
+    and gets (item, prepared) pairs in source order. When the queue is full
+    the producer waits, so at most ``queue_size`` items are held between
+    the two stages. Errors raised by the producer are re-raised in the
+    consumer once the items produced before them have been consumed.
+    """
+
+    def __init__(self, source, prepare=None, queue_size=64, metrics=None):
+        """
+        Args:
+            source (iterable): Items to produce, consumed lazily by the producer thread
+            prepare (callable): Applied to each item in the producer, None to skip
+            queue_size (int): Maximum number of items waiting for the consumer
+            metrics (PhaseMetrics): Records how long each stage waited for the other
+        """
+        self.source = source
+        self.prepare = prepare
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.metrics = metrics
+        self.produced = 0
+        self._cancelled = threading.Event()
+        self._error = None
+        self._thread = None
+
+    def start(self):
+        """Start the producer thread"""
+        self._thread = threading.Thread(target=self._produce, name="pipeline-producer", daemon=True)
+        self._thread.start()
+        return self
+
+    def _produce(self):
+        try:
+            for item in self.source:
+                if self._cancelled.is_set():
+                    return
+                prepared = self.prepare(item) if self.prepare is not None else None
+                if not self._put((item, prepared)):
+                    return
+                self.produced += 1
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(_END)
+
+    def _put(self, value):
+        """Wait for room in the queue (backpressure), giving up once cancelled"""
+        started = time.perf_counter()
+        while not self._cancelled.is_set():
+            try:
+                self.queue.put(value, timeout=0.1)
+                if self.metrics is not None:
+                    self.metrics.record("producer_wait", time.perf_counter() - started)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        while True:
+            started = time.perf_counter()
+            value = self.queue.get()
+            if self.metrics is not None:
+                self.metrics.record("consumer_wait", time.perf_counter() - started)
+            if value is _END:
+                break
+            yield value
+        if self._error is not None:
+            raise self._error
+
+    def cancel(self):
+        """Stop the producer and drop whatever it queued"""
+        self._cancelled.set()
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            if self._thread.is_alive():
+                logger.warning("Producer still busy after cancellation, leaving it behind")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.cancel()
+        return False
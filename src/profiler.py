@@ -0,0 +1,233 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the profiler module
+logger = get_logger("profiler")
+
+# Post ID and phase stack of every thread, only maintained while a profiler runs
+_contexts = {}
+_running = False
+
+# Innermost frames in these modules mean a helper thread is blocked waiting for work
+IDLE_MODULES = {"threading.py", "queue.py", "selectors.py"}
+# A helper thread using less CPU than this share of the interval between two samples is blocked
+IDLE_CPU_SHARE = 0.01
+
+
+def set_post(post_id):
+    """Attribute the samples of the calling thread to a post, None when it is done"""
+    if _running:
+        _contexts.setdefault(threading.get_ident(), [None, []])[0] = post_id
+
+
+def push_phase(phase):
+    """Enter a phase on the calling thread (see PhaseMetrics.span)"""
+    if _running:
+        _contexts.setdefault(threading.get_ident(), [None, []])[1].append(phase)
+
+
+def pop_phase():
+    """Leave the innermost phase of the calling thread"""
+    if _running:
+        context = _contexts.get(threading.get_ident())
+        if context and context[1]:
+            context[1].pop()
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread at a fixed interval
+
+    A background thread reads ``sys._current_frames()`` every ``interval``
+    seconds, so the profiled code runs unmodified and the cost is one stack
+    walk per thread per sample (about 1% at the default 100 Hz). Each
+    sample is attributed to the post and phase its thread was in, as
+    reported by set_post() and the PhaseMetrics spans. Samples measure wall
+    time: a thread waiting on a dialog or a queue is sampled too, but helper
+    threads blocked on a queue, an event or a lock (log maintenance, tqdm's
+    monitor, an idle pipeline producer) are left out of the hotspot tables.
+    A helper thread is blocked when its innermost frame is in IDLE_MODULES
+    or, where the platform has per-thread CPU clocks, when its CPU time did
+    not advance since the previous sample (waits in C code have no frame,
+    and a thread waiting for the GIL is not running either).
+    """
+
+    def __init__(self, interval=0.01, max_depth=64):
+        """
+        Args:
+            interval (float): Seconds between two samples
+            max_depth (int): Innermost frames kept per stack
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        # Sample counts by (thread name, phase, frames from the outermost)
+        self.stacks = Counter()
+        # Keys of self.stacks sampled while a helper thread was blocked
+        self.idle_stacks = set()
+        # Sample counts by post ID
+        self.posts = Counter()
+        self.rounds = 0
+        self.elapsed = 0.0
+        self.sampler_cpu = 0.0
+        self._labels = {}
+        self._thread_names = {}
+        self._cpu_times = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        """Start sampling"""
+        global _running
+        _contexts.clear()
+        _running = True
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Profiling every {self.interval * 1000:.0f} ms")
+        return self
+
+    def stop(self):
+        """Stop sampling"""
+        global _running
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        _running = False
+        self.elapsed = time.perf_counter() - self._started
+        return self
+
+    def _run(self):
+        own_id = threading.get_ident()
+        cpu_started = time.thread_time()
+        while not self._stop.wait(self.interval):
+            self._sample(own_id)
+            self.rounds += 1
+        self.sampler_cpu = time.thread_time() - cpu_started
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _thread_name(self, thread_id):
+        name = self._thread_names.get(thread_id)
+        if name is None:
+            # A thread started since the last lookup
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self._thread_names.setdefault(thread_id, str(thread_id))
+        return name
+
+    def _is_idle(self, thread_id, frame):
+        """Whether a helper thread is blocked, see the class docstring"""
+        idle = os.path.basename(frame.f_code.co_filename) in IDLE_MODULES
+        if hasattr(time, "pthread_getcpuclockid"):
+            try:
+                cpu = time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+            except OSError:
+                # The thread exited since sys._current_frames()
+                return idle
+            last = self._cpu_times.get(thread_id)
+            self._cpu_times[thread_id] = cpu
+            if last is not None and cpu - last < self.interval * IDLE_CPU_SHARE:
+                return True
+        return idle
+
+    def _sample(self, own_id):
+        main_id = threading.main_thread().ident
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            idle = thread_id != main_id and self._is_idle(thread_id, frame)
+            frames = []
+            while frame is not None and len(frames) < self.max_depth:
+                frames.append(self._label(frame.f_code))
+                frame = frame.f_back
+            frames.reverse()
+            post_id, phases = _contexts.get(thread_id, (None, ()))
+            phase = phases[-1] if phases else None
+            key = (self._thread_name(thread_id), phase, tuple(frames))
+            self.stacks[key] += 1
+            if idle:
+                self.idle_stacks.add(key)
+            if post_id is not None:
+                self.posts[post_id] += 1
+
+    @property
+    def seconds_per_sample(self):
+        return self.elapsed / self.rounds if self.rounds else self.interval
+
+    def write_collapsed(self, path):
+        """
+        Write the stacks in the collapsed format of flamegraph.pl and speedscope
+
+        Each line is ``thread;[phase];outermost;...;innermost count``.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for (thread_name, phase, frames), count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                names = [thread_name] + ([f"[{phase}]"] if phase else []) + list(frames)
+                f.write(";".join(name.replace(";", ":") for name in names) + f" {count}\n")
+
+    def hotspots(self, top=25):
+        """
+        Aggregate the samples of the busy threads
+
+        Returns:
+            dict: ``self`` and ``total`` sample counts per function, samples per phase and per post
+        """
+        own = Counter()
+        total = Counter()
+        phases = Counter()
+        for key, count in self.stacks.items():
+            if key in self.idle_stacks:
+                continue
+            _, phase, frames = key
+            if frames:
+                own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+            phases[phase or "(no phase)"] += count
+        return {"self": own.most_common(top), "total": total.most_common(top), "phases": phases.most_common(),
+                "posts": self.posts.most_common(top)}
+
+    def write_report(self, path, top=25):
+        """Write the top-N hotspot table"""
+        spots = self.hotspots(top)
+        sample = self.seconds_per_sample
+        samples = sum(self.stacks.values())
+        by_thread = defaultdict(int)
+        idle_by_thread = defaultdict(int)
+        for key, count in self.stacks.items():
+            by_thread[key[0]] += count
+            if key in self.idle_stacks:
+                idle_by_thread[key[0]] += count
+        busy = samples - sum(idle_by_thread.values())
+
+        def rows(items, base=busy):
+            return "".join(f"{count:8d} {count * sample:9.3f}s {count / base * 100 if base else 0:6.1f}%  "
+                           f"{name}\n" for name, count in items)
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("=== PROFILE ===\n\n")
+            f.write(f"Duration: {self.elapsed:.2f}s, {self.rounds} sampling rounds every "
+                    f"{self.interval * 1000:.0f} ms ({samples} thread samples)\n")
+            f.write(f"Sampler CPU time: {self.sampler_cpu:.3f}s "
+                    f"({self.sampler_cpu / self.elapsed * 100 if self.elapsed else 0:.1f}% of the run)\n")
+            f.write("Samples are wall time: waiting threads are counted too, except the idle helper threads "
+                    "left out of the phase, function and post tables\n\n")
+            f.write(f"--- Threads ---\n{rows(sorted(by_thread.items(), key=lambda item: -item[1]), samples)}\n")
+            if idle_by_thread:
+                f.write(f"--- Idle helper threads (blocked on a queue, event or lock) ---\n"
+                        f"{rows(sorted(idle_by_thread.items(), key=lambda item: -item[1]), samples)}\n")
+            f.write(f"--- Phases ---\n{rows(spots['phases'])}\n")
+            f.write(f"--- Top {top} functions by self samples ---\n{rows(spots['self'])}\n")
+            f.write(f"--- Top {top} functions by total samples (including callees) ---\n{rows(spots['total'])}\n")
+            if spots["posts"]:
+                f.write(f"--- Top {top} posts by samples ---\n"
+                        f"{rows((f'post {post_id}', count) for post_id, count in spots['posts'])}")
@@ -0,0 +1,220 @@
+import heapq
+import itertools
+import random
+import time
+from collections import Counter, deque
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the retry module
+logger = get_logger("retry")
+
+# Why a post failed
+LAUNCH = "launch"
+TYPING = "typing"
+SAVE = "save"
+VERIFICATION = "verification"
+WRITE = "write"
+DATA = "data"
+UNKNOWN = "unknown"
+
+# A post that cannot be rendered fails the same way every time
+PERMANENT = {DATA}
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def classify_exception(error):
+    """Return the failure category of an exception raised while writing a post"""
+    if isinstance(error, (KeyError, TypeError, ValueError, UnicodeError)):
+        return DATA
+    if isinstance(error, OSError):
+        return WRITE
+    return UNKNOWN
+
+
+class RetryQueue:
+    """
+    Failed posts waiting for another attempt, instead of blocking the ones behind them
+
+    A post that fails is deferred with a jittered exponential backoff and
+    retried once the main pass is done, so one bad record or a flapping
+    desktop only costs its own attempts. Failures are counted per category;
+    posts failing with a permanent category, or more than ``max_retries``
+    times, are given up and left to the next run (journaled as failed, so
+    --resume picks them up).
+    """
+
+    def __init__(self, max_retries=3, base_delay=2.0, max_delay=60.0, jitter=0.5, seed=None):
+        """
+        Args:
+            max_retries (int): Attempts after the first one, 0 gives failed posts up at once
+            base_delay (float): Seconds before the first retry, doubled for every further one
+            max_delay (float): Upper bound of the backoff
+            jitter (float): The delay is spread uniformly by +/- this fraction
+            seed (int): Seed of the jitter, for reproducible runs
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        # (ready at, order, post) of the deferred posts
+        self._heap = []
+        self._order = itertools.count()
+        self.attempts = Counter()
+        self.categories = {}
+        self.failures = Counter()
+        self.deferred = 0
+        self.retried = 0
+        self.recovered = []
+        self.given_up = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def delay(self, attempts):
+        """Backoff before the retry following the ``attempts``-th failure"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * self._random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def count(self, category):
+        """Count a failure that is handled elsewhere, e.g. a corrupted file left to the repair pass"""
+        self.failures[category] += 1
+
+    def record_failure(self, post, category):
+        """
+        Defer a failed post, or give it up
+
+        Returns:
+            bool: True if the post will be retried
+        """
+        post_id = post["id"]
+        self.failures[category] += 1
+        self.attempts[post_id] += 1
+        self.categories[post_id] = category
+        if category in PERMANENT or self.attempts[post_id] > self.max_retries:
+            self.given_up.append(post_id)
+            logger.warning(f"Giving up post {post_id} after {self.attempts[post_id]} attempts ({category} failure)")
+            return False
+        delay = self.delay(self.attempts[post_id])
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._order), post))
+        self.deferred += 1
+        logger.info(f"Deferred post {post_id} after a {category} failure, retrying in {delay:.1f}s")
+        return True
+
+    def record_success(self, post_id):
+        """Note that a post was written, after retries if it had failed before"""
+        if post_id in self.attempts:
+            self.recovered.append(post_id)
+
+    def drain(self, stop=None):
+        """
+        Yield the deferred posts as their backoff expires, including those deferred again meanwhile
+
+        Args:
+            stop (threading.Event): Stop waiting and yielding once set
+        """
+        while self._heap:
+            ready_at = self._heap[0][0]
+            wait = ready_at - time.monotonic()
+            if wait > 0:
+                logger.info(f"Waiting {wait:.1f}s before retrying {len(self._heap)} deferred posts")
+                if stop is not None:
+                    if stop.wait(wait):
+                        return
+                else:
+                    time.sleep(wait)
+            elif stop is not None and stop.is_set():
+                return
+            _, _, post = heapq.heappop(self._heap)
+            self.retried += 1
+            yield post
+
+    def abandon(self):
+        """Give up the posts still deferred, e.g. when the run is stopped, and return their IDs"""
+        post_ids = [post["id"] for _, _, post in sorted(self._heap)]
+        self._heap = []
+        self.given_up.extend(post_ids)
+        return post_ids
+
+    def stats(self):
+        return {"failures": dict(self.failures), "deferred": self.deferred, "retried": self.retried,
+                "recovered": len(self.recovered), "given_up": len(self.given_up)}
+
+
+class CircuitBreaker:
+    """
+    Stops hammering a failing desktop or backend
+
+    The outcomes of the last ``window`` posts are kept; once at least
+    ``min_samples`` are known and the share of failures reaches
+    ``threshold`` the breaker opens. The caller then pauses for
+    ``cooldown`` seconds (or switches backend) and half-opens it: the next
+    post is a trial, closing the breaker if it succeeds and opening it
+    again if it fails.
+    """
+
+    def __init__(self, window=20, threshold=0.5, min_samples=10, cooldown=30.0):
+        """
+        Args:
+            window (int): Number of recent outcomes considered
+            threshold (float): Failure share that opens the breaker, above 1 never opens it
+            min_samples (int): Outcomes needed before the breaker can open
+            cooldown (float): Seconds to pause once open
+        """
+        self.threshold = threshold
+        self.min_samples = min(max(1, min_samples), window)
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.trips = 0
+        self.paused = 0.0
+
+    @property
+    def failure_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def record(self, success):
+        """
+        Add the outcome of a post
+
+        Returns:
+            bool: True if this outcome opened the breaker
+        """
+        if self.state == HALF_OPEN:
+            if success:
+                logger.info("Circuit breaker closed, the trial post succeeded")
+                self.reset()
+                return False
+            return self._open("the trial post failed")
+        self.outcomes.append(success)
+        if (self.state == CLOSED and len(self.outcomes) >= self.min_samples
+                and self.failure_rate >= self.threshold):
+            return self._open(f"{self.failure_rate:.0%} of the last {len(self.outcomes)} posts failed")
+        return False
+
+    def _open(self, reason):
+        self.state = OPEN
+        self.trips += 1
+        logger.warning(f"Circuit breaker opened: {reason}")
+        return True
+
+    def pause(self, stop=None):
+        """Wait out the cooldown, then let a trial post through"""
+        logger.warning(f"Pausing for {self.cooldown:g}s before a trial post")
+        started = time.monotonic()
+        if stop is not None:
+            stop.wait(self.cooldown)
+        else:
+            time.sleep(self.cooldown)
+        self.paused += time.monotonic() - started
+        self.state = HALF_OPEN
+
+    def reset(self):
+        """Close the breaker and forget the outcomes, e.g. after switching backend"""
+        self.state = CLOSED
+        self.outcomes.clear()
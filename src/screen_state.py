@@ -0,0 +1,323 @@
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the screen state module
+logger = get_logger("screen_state")
+
+# States the bot waits on when a template is configured for them
+EDITOR_READY = "editor_ready"
+SAVE_DIALOG = "save_dialog"
+CONFIRM_SAVE = "confirm_save"
+ERROR_DIALOG = "error_dialog"
+
+STATES_FILE = "states.json"
+
+
+def to_gray(image):
+    """
+    Convert a screenshot to a 2-D float32 grayscale array
+
+    Args:
+        image: PIL image, or array of shape (H, W), (H, W, 3) or (H, W, 4)
+    """
+    import numpy as np
+
+    if hasattr(image, "convert"):
+        image = image.convert("L")
+    array = np.asarray(image, dtype=np.float32)
+    if array.ndim == 3:
+        # ITU-R 601 luma, like PIL's "L" mode
+        array = array[..., :3] @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return array
+
+
+def downscale(array, factor):
+    """Shrink a grayscale array by an integer factor, averaging each factor x factor block"""
+    if factor <= 1:
+        return array
+    height, width = array.shape[0] // factor * factor, array.shape[1] // factor * factor
+    # Strided slices add the blocks up without the copies of a reshape
+    total = sum(array[row:height:factor, column:width:factor] for row in range(factor) for column in range(factor))
+    return total / (factor * factor)
+
+
+def fast_length(size):
+    """Smallest length >= size with no prime factor above 5, fast for the FFT"""
+    while True:
+        rest = size
+        for prime in (2, 3, 5):
+            while rest % prime == 0:
+                rest //= prime
+        if rest == 1:
+            return size
+        size += 1
+
+
+def best_match(image, template):
+    """
+    Locate a template in an image by normalised cross-correlation
+
+    Every position is scored at once: the correlation is one FFT product,
+    with the template spectrum cached per image size, and the window sums
+    and sums of squares come from integral images.
+
+    Args:
+        image (ndarray): Grayscale image
+        template (StateTemplate): Prepared template, at the scale of the image
+
+    Returns:
+        tuple: (score in [-1, 1], (x, y) of the best window), score 0.0 if the image is too small
+    """
+    import numpy as np
+
+    height, width = template.pixels.shape
+    if image.shape[0] < height or image.shape[1] < width:
+        return 0.0, (0, 0)
+
+    image64 = image.astype(np.float64)
+    sums = np.pad(image64.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    squares = np.pad((image64 * image64).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+
+    def window_sums(integral):
+        return (integral[height:, width:] - integral[:-height, width:]
+                - integral[height:, :-width] + integral[:-height, :-width])
+
+    count = height * width
+    window_sum = window_sums(sums)
+    variance = window_sums(squares) - window_sum * window_sum / count
+    # The template has zero mean, so the window mean drops out of the correlation
+    shape = (fast_length(image.shape[0]), fast_length(image.shape[1]))
+    correlation = np.fft.irfft2(np.fft.rfft2(image64, shape) * template.spectrum(shape), shape)
+    correlation = correlation[:variance.shape[0], :variance.shape[1]]
+    scores = np.zeros_like(variance)
+    flat = variance <= 1e-6 * count
+    np.divide(correlation, np.sqrt(np.maximum(variance, 0)) * template.norm, out=scores, where=~flat)
+    y, x = np.unravel_index(np.argmax(scores), scores.shape)
+    return float(scores[y, x]), (int(x), int(y))
+
+
+def locate(image, template):
+    """
+    Locate a template in a full resolution image, whatever its alignment
+
+    Downscaling only keeps the template intact when its screen position
+    falls on the same factor x factor grid as the template crop, so the
+    image is downscaled once per grid phase and the best phase wins. The
+    position is exact at full resolution.
+
+    Args:
+        image (ndarray): Grayscale image at screen resolution
+        template (StateTemplate): Prepared template
+
+    Returns:
+        tuple: (score in [-1, 1], (x, y) of the best window in the image)
+    """
+    factor = template.factor
+    best = (0.0, (0, 0))
+    for dy in range(factor):
+        for dx in range(factor):
+            score, (x, y) = best_match(downscale(image[dy:, dx:], factor), template)
+            if score > best[0]:
+                best = (score, (x * factor + dx, y * factor + dy))
+    return best
+
+
+class StateTemplate:
+    """A screen state: a downscaled grayscale template and where to look for it"""
+
+    def __init__(self, name, image, region=None, threshold=0.9, factor=2):
+        """
+        Args:
+            name (str): Name of the state
+            image: Template at screen resolution, PIL image or array
+            region (tuple): (left, top, width, height) of the screen searched, None for all of it
+            threshold (float): Correlation a match needs, from 0 to 1
+            factor (int): Downscaling factor applied to the template and the screenshots
+
+        Raises:
+            ValueError: If the template is blank or smaller than the downscaling factor
+        """
+        import numpy as np
+
+        self.name = name
+        self.region = tuple(region) if region else None
+        self.threshold = threshold
+        self.factor = factor
+        self.pixels = downscale(to_gray(image), factor)
+        if min(self.pixels.shape) < 1:
+            raise ValueError(f"Template of state '{name}' is smaller than the downscaling factor")
+        # Zero-mean template and its norm, computed once instead of on every check
+        self.centered = self.pixels - self.pixels.mean()
+        self.norm = float(np.sqrt((self.centered * self.centered).sum()))
+        if self.norm == 0:
+            raise ValueError(f"Template of state '{name}' is blank, it would match anything")
+        self._spectra = {}
+
+    def spectrum(self, shape):
+        """Conjugate spectrum of the zero-mean template padded to ``shape``, computed once per shape"""
+        import numpy as np
+
+        spectrum = self._spectra.get(shape)
+        if spectrum is None:
+            spectrum = self._spectra[shape] = np.conj(np.fft.rfft2(self.centered, shape))
+        return spectrum
+
+    @classmethod
+    def from_file(cls, name, path, region=None, threshold=0.9, factor=2):
+        """Load a template from an image file (needs Pillow)"""
+        from PIL import Image
+
+        with Image.open(path) as image:
+            return cls(name, image, region, threshold, factor)
+
+
+class ScreenStateDetector:
+    """
+    Recognises screen states (editor ready, Save As dialog, ...) from image templates
+
+    Window titles cannot tell whether a dialog shows its contents or the
+    editor accepts input yet; the pixels can. Templates are loaded once,
+    converted to grayscale and downscaled; each check grabs only the
+    bounding box of the regions searched, downscales it the same way at
+    every grid phase (see locate) and scores every position with NumPy
+    FFTs, in about ten milliseconds for a dialog-sized region. Checks are
+    timed per state into the phase metrics as ``screen_<state>``.
+    """
+
+    def __init__(self, screen, templates=(), waiter=None, metrics=None, factor=2):
+        """
+        Args:
+            screen (callable): ``screen(region)`` returning a screenshot of
+                (left, top, width, height), or of the whole screen for None,
+                as a PIL image or an array (e.g. GuiDriver.screenshot)
+            templates (iterable): StateTemplate objects
+            waiter (WaitEngine): Polls the states with backoff, every 10 ms if None
+            metrics (PhaseMetrics): Receives the duration of every check
+            factor (int): Downscaling factor of the screenshots, the one of the templates
+        """
+        self.screen = screen
+        self.templates = {template.name: template for template in templates}
+        self.waiter = waiter
+        self.metrics = metrics
+        self.factor = factor
+        # Checks, matches and seconds spent per state
+        self.stats = defaultdict(lambda: {"checks": 0, "matches": 0, "seconds": 0.0})
+
+    @classmethod
+    def from_directory(cls, path, screen, waiter=None, metrics=None, factor=2, threshold=0.9):
+        """
+        Load the templates of a directory
+
+        ``states.json`` maps each state to its ``template`` file and optional
+        ``region`` and ``threshold``; without it every PNG is a state named
+        after the file, searched on the whole screen.
+
+        Raises:
+            OSError, ValueError: If a template cannot be read or is unusable
+        """
+        path = Path(path)
+        states_file = path / STATES_FILE
+        if states_file.exists():
+            with open(states_file, "r", encoding="utf-8") as f:
+                states = json.load(f)
+        else:
+            states = {image.stem: {"template": image.name} for image in sorted(path.glob("*.png"))}
+
+        templates = [StateTemplate.from_file(name, path / config.get("template", f"{name}.png"),
+                                             region=config.get("region"),
+                                             threshold=config.get("threshold", threshold), factor=factor)
+                     for name, config in states.items()]
+        logger.info(f"Loaded {len(templates)} screen state templates from {path}: "
+                     f"{', '.join(template.name for template in templates)}")
+        return cls(screen, templates, waiter, metrics, factor)
+
+    def __contains__(self, state):
+        return state in self.templates
+
+    def _capture(self, templates):
+        """Grab the bounding box of the regions searched, None meaning the whole screen"""
+        regions = [template.region for template in templates]
+        if any(region is None for region in regions):
+            return (0, 0), self.screen(None)
+        left = min(region[0] for region in regions)
+        top = min(region[1] for region in regions)
+        right = max(region[0] + region[2] for region in regions)
+        bottom = max(region[1] + region[3] for region in regions)
+        return (left, top), self.screen((left, top, right - left, bottom - top))
+
+    def detect(self, states):
+        """
+        Check which of ``states`` is on screen, from a single screenshot
+
+        Returns:
+            tuple: (state, (x, y) of the match on screen, score) of the first
+                state that matches, in the order given, or None
+        """
+        templates = [self.templates[state] for state in states if state in self.templates]
+        if not templates:
+            return None
+        started = time.perf_counter()
+        (left, top), screenshot = self._capture(templates)
+        gray = to_gray(screenshot)
+        if self.metrics is not None:
+            self.metrics.record("screen_capture", time.perf_counter() - started)
+        found = None
+        # Only the templates tried are counted, each with the time of its own search
+        for template in templates:
+            started = time.perf_counter()
+            image = gray
+            if template.region is not None:
+                x, y = template.region[0] - left, template.region[1] - top
+                image = gray[y:y + template.region[3], x:x + template.region[2]]
+            score, (x, y) = locate(image, template)
+            seconds = time.perf_counter() - started
+            stats = self.stats[template.name]
+            stats["checks"] += 1
+            stats["seconds"] += seconds
+            if self.metrics is not None:
+                self.metrics.record(f"screen_{template.name}", seconds)
+            if score >= template.threshold:
+                offset = template.region[:2] if template.region else (left, top)
+                found = (template.name, (offset[0] + x, offset[1] + y), score)
+                stats["matches"] += 1
+                break
+        return found
+
+    def wait_for(self, states, timeout=5):
+        """
+        Wait until one of ``states`` is on screen
+
+        Args:
+            states (str or list): State, or states checked in order of preference
+            timeout (float): Seconds to wait
+
+        Returns:
+            tuple: The detect() result, or None on timeout
+        """
+        if isinstance(states, str):
+            states = [states]
+
+        def check():
+            try:
+                return self.detect(states)
+            except Exception as e:
+                logger.error(f"Error checking the screen for {states}: {str(e)}")
+                return None
+
+        if self.waiter is not None:
+            return self.waiter.wait_until(check, timeout, f"Screen state {states}")
+        deadline = time.perf_counter() + timeout
+        while True:
+            result = check()
+            if result or time.perf_counter() >= deadline:
+                return result
+            time.sleep(0.01)
+
+    def summary(self):
+        """Checks, matches and mean check time per state, for the summary report"""
+        return {state: {**stats, "mean_ms": stats["seconds"] / stats["checks"] * 1000 if stats["checks"] else 0.0}
+                for state, stats in sorted(self.stats.items())}
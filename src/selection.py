@@ -0,0 +1,126 @@
+import re
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the selection module
+logger = get_logger("selection")
+
+
+def parse_id_spec(spec):
+    """
+    Parse an ID specification such as "1-5,8,10-12"
+
+    Args:
+        spec (str|int|list): Comma separated IDs and inclusive ranges, or a list of them
+
+    Returns:
+        tuple: (set of single IDs, list of (low, high) ranges)
+    """
+    ids = set()
+    ranges = []
+    if spec is None:
+        return ids, ranges
+    if isinstance(spec, (list, tuple)):
+        parts = [str(part) for part in spec]
+    else:
+        parts = str(spec).split(",")
+
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-", 1)
+            ranges.append((int(low), int(high)))
+        else:
+            ids.add(int(part))
+    return ids, ranges
+
+
+class IdSet:
+    """Membership test over single IDs and inclusive ranges"""
+
+    def __init__(self, spec=None):
+        self.ids, self.ranges = parse_id_spec(spec)
+
+    def __bool__(self):
+        return bool(self.ids or self.ranges)
+
+    def __contains__(self, post_id):
+        return post_id in self.ids or any(low <= post_id <= high for low, high in self.ranges)
+
+
+class PostSelector:
+    """
+    Decide which posts are processed, in a single pass before processing starts
+
+    A post is selected when it matches every configured filter. In
+    interactive mode the user is additionally asked about each post that
+    passed the filters.
+    """
+
+    def __init__(self, include=None, exclude=None, user_ids=None, title_regex=None, body_regex=None,
+                 min_body_length=None, max_body_length=None, interactive=False):
+        """
+        Args:
+            include (str): IDs/ranges to process, everything when empty
+            exclude (str): IDs/ranges never to process
+            user_ids (str): userId values/ranges to process, everything when empty
+            title_regex (str): Pattern the title has to contain
+            body_regex (str): Pattern the body has to contain
+            min_body_length (int): Minimum body length in characters
+            max_body_length (int): Maximum body length in characters
+            interactive (bool): Ask for confirmation of each remaining post
+        """
+        self.include = IdSet(include)
+        self.exclude = IdSet(exclude)
+        self.user_ids = IdSet(user_ids)
+        self.title_regex = re.compile(title_regex) if title_regex else None
+        self.body_regex = re.compile(body_regex) if body_regex else None
+        self.min_body_length = min_body_length
+        self.max_body_length = max_body_length
+        self.interactive = interactive
+
+    @classmethod
+    def from_file(cls, path, **overrides):
+        """
+        Build a selector from a YAML (or JSON) selection file
+
+        The file holds the constructor arguments as keys; ``overrides`` that
+        are not None take precedence over the file.
+        """
+        import yaml
+
+        with open(path, "r") as f:
+            options = yaml.safe_load(f) or {}
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**options)
+
+    def matches(self, post):
+        """Check a post against the filters, without asking the user"""
+        post_id = post["id"]
+        if self.include and post_id not in self.include:
+            return False
+        if self.exclude and post_id in self.exclude:
+            return False
+        if self.user_ids and post["userId"] not in self.user_ids:
+            return False
+        if self.title_regex and not self.title_regex.search(post["title"]):
+            return False
+        body = post["body"]
+        if self.body_regex and not self.body_regex.search(body):
+            return False
+        if self.min_body_length is not None and len(body) < self.min_body_length:
+            return False
+        if self.max_body_length is not None and len(body) > self.max_body_length:
+            return False
+        return True
+
+    def confirm(self, post):
+        """Ask the user whether to process a post"""
+        answer = input(f"\nProcess post {post['id']} with title: '{post['title']}'? (y/n): ")
+        return answer.strip().lower() == 'y'
+
+    def accepts(self, post):
+        """Check a post against the filters and, in interactive mode, ask the user"""
+        return self.matches(post) and (not self.interactive or self.confirm(post))
@@ -0,0 +1,256 @@
+import csv
+import json
+import sqlite3
+from pathlib import Path
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the sources module
+logger = get_logger("sources")
+
+POST_FIELDS = ("userId", "id", "title", "body")
+
+
+class SourceError(Exception):
+    """Raised when a record source cannot be read"""
+
+# Column names recognised for each post field when no field map is given
+FIELD_ALIASES = {
+    "userId": ("userId", "user_id", "userid", "user"),
+    "id": ("id", "post_id", "postId"),
+    "title": ("title", "subject", "name"),
+    "body": ("body", "text", "content"),
+}
+
+
+def parse_field_map(spec):
+    """
+    Parse a field map such as ``"title=subject,body=text"``
+
+    Returns:
+        dict: Source field name by post field
+
+    Raises:
+        SourceError: If a mapping is not ``<post field>=<source field>``
+    """
+    field_map = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        field, _, column = part.partition("=")
+        if field not in POST_FIELDS or not column:
+            raise SourceError(f"Invalid field mapping '{part}', expected <{'|'.join(POST_FIELDS)}>=<source field>")
+        field_map[field] = column
+    return field_map
+
+
+class RecordSource:
+    """
+    Lazily yields records of an export as posts
+
+    Subclasses only implement ``records()``, a generator of dicts; each
+    record is mapped onto the userId/id/title/body shape process_post
+    expects, so an export of any size is read with constant memory.
+    """
+
+    name = None
+
+    def __init__(self, field_map=None):
+        """
+        Args:
+            field_map (dict): Source field name by post field, unmapped fields
+                are looked up under the names of FIELD_ALIASES
+        """
+        self.field_map = field_map or {}
+        self.invalid = 0
+        self._columns = None
+
+    def records(self):
+        """Yield the raw records as dicts"""
+        raise NotImplementedError
+
+    def _resolve_columns(self, record):
+        columns = {}
+        for field in POST_FIELDS:
+            if field in self.field_map:
+                columns[field] = self.field_map[field]
+            else:
+                columns[field] = next((alias for alias in FIELD_ALIASES[field] if alias in record), field)
+        return columns
+
+    def to_post(self, record):
+        """
+        Map a record onto a post
+
+        Returns:
+            dict: The post, or None if the record lacks a field or has a non-numeric ID
+        """
+        if self._columns is None:
+            # Columns are resolved once, from the first record
+            self._columns = self._resolve_columns(record)
+        try:
+            post = {field: record[column] for field, column in self._columns.items()}
+            post["id"] = int(post["id"])
+            post["userId"] = int(post["userId"])
+        except (KeyError, TypeError, ValueError) as e:
+            self.invalid += 1
+            logger.warning(f"Skipping invalid record in {self.name} source: {str(e)}")
+            return None
+        post["title"] = "" if post["title"] is None else str(post["title"])
+        post["body"] = "" if post["body"] is None else str(post["body"])
+        return post
+
+    def __iter__(self):
+        try:
+            for record in self.records():
+                post = self.to_post(record)
+                if post is not None:
+                    yield post
+        except (OSError, ValueError, csv.Error, sqlite3.Error) as e:
+            raise SourceError(f"Failed to read the {self.name} source: {str(e)}") from e
+
+
+class JsonSource(RecordSource):
+    """JSON array of posts, as written by the fetch command (loaded at once)"""
+
+    name = "json"
+
+    def __init__(self, path, field_map=None):
+        super().__init__(field_map)
+        self.path = Path(path)
+
+    def records(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+class JsonlSource(RecordSource):
+    """One JSON object per line"""
+
+    name = "jsonl"
+
+    def __init__(self, path, field_map=None):
+        super().__init__(field_map)
+        self.path = Path(path)
+
+    def records(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    self.invalid += 1
+                    logger.warning(f"Skipping invalid JSON on line {line_number} of {self.path}: {str(e)}")
+
+
+class CsvSource(RecordSource):
+    """CSV file with a header row"""
+
+    name = "csv"
+
+    def __init__(self, path, field_map=None, delimiter=",", encoding="utf-8-sig"):
+        """
+        Args:
+            delimiter (str): Field delimiter
+            encoding (str): File encoding, the default also strips an Excel BOM
+        """
+        super().__init__(field_map)
+        self.path = Path(path)
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    def records(self):
+        with open(self.path, "r", encoding=self.encoding, newline="") as f:
+            yield from csv.DictReader(f, delimiter=self.delimiter)
+
+
+class SqliteSource(RecordSource):
+    """Rows of a SQLite query, fetched in batches"""
+
+    name = "sqlite"
+
+    def __init__(self, path, query="SELECT * FROM posts ORDER BY id", field_map=None, batch_size=1000):
+        """
+        Args:
+            query (str): Query returning one row per post
+            batch_size (int): Rows fetched from the cursor at a time
+        """
+        super().__init__(field_map)
+        self.path = Path(path)
+        self.query = query
+        self.batch_size = batch_size
+
+    def records(self):
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        connection.row_factory = sqlite3.Row
+        try:
+            cursor = connection.execute(self.query)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            connection.close()
+
+
+class HttpSource(RecordSource):
+    """Paginated JSON API, fetched page by page by a PostFetcher"""
+
+    name = "http"
+
+    def __init__(self, fetcher, limit=None, field_map=None):
+        """
+        Args:
+            fetcher (PostFetcher): Fetcher requesting the pages
+            limit (int): Maximum number of records to request, None for all
+        """
+        super().__init__(field_map)
+        self.fetcher = fetcher
+        self.limit = limit
+
+    def records(self):
+        try:
+            yield from self.fetcher.iter_posts(limit=self.limit)
+        finally:
+            self.fetcher.close()
+
+
+FILE_SOURCES = {
+    ".json": JsonSource,
+    ".jsonl": JsonlSource,
+    ".ndjson": JsonlSource,
+    ".csv": CsvSource,
+    ".db": SqliteSource,
+    ".sqlite": SqliteSource,
+    ".sqlite3": SqliteSource,
+}
+
+
+def open_source(path, field_map=None, query=None):
+    """
+    Create the record source of a file from its extension
+
+    Args:
+        path (str): JSON, JSONL, CSV or SQLite file
+        field_map (dict): Source field name by post field
+        query (str): SQL query for SQLite files
+
+    Returns:
+        RecordSource: The source
+
+    Raises:
+        SourceError: If the file type is not supported
+    """
+    suffix = Path(path).suffix.lower()
+    try:
+        source_class = FILE_SOURCES[suffix]
+    except KeyError:
+        raise SourceError(f"Unsupported input file '{path}', use one of: {', '.join(sorted(FILE_SOURCES))}")
+    if source_class is SqliteSource and query:
+        return SqliteSource(path, query=query, field_map=field_map)
+    return source_class(path, field_map=field_map)
@@ -0,0 +1,130 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import main
+from src.benchmark.api_stub import PostsApiStub
+from src.fetcher import FetchError, PostFetcher
+from src.http_cache import ResponseCache
+
+
+class PaginationTest(unittest.TestCase):
+    def test_pages_are_concatenated_in_collection_order(self):
+        with PostsApiStub(count=120) as api:
+            fetcher = PostFetcher(api.url, page_size=50, max_workers=2)
+            posts = fetcher.fetch(limit=120)
+            fetcher.close()
+        self.assertEqual([post["id"] for post in posts], list(range(1, 121)))
+        self.assertEqual(api.requests, 3)
+
+    def test_limit_is_honoured_across_pages(self):
+        with PostsApiStub(count=120) as api:
+            fetcher = PostFetcher(api.url, page_size=50, max_workers=4)
+            posts = fetcher.fetch(limit=70)
+            fetcher.close()
+        self.assertEqual([post["id"] for post in posts], list(range(1, 71)))
+        # Two full pages, the second one trimmed, and no request beyond the limit
+        self.assertEqual(api.requests, 2)
+
+    def test_stops_at_the_end_of_the_collection(self):
+        with PostsApiStub(count=30) as api:
+            fetcher = PostFetcher(api.url, page_size=20, max_workers=4)
+            self.assertEqual(len(fetcher.fetch(limit=None)), 30)
+            self.assertEqual(len(fetcher.fetch(limit=100)), 30)
+            fetcher.close()
+
+    def test_iter_pages_yields_pages_as_they_arrive(self):
+        with PostsApiStub(count=45) as api:
+            fetcher = PostFetcher(api.url, page_size=20, max_workers=1)
+            sizes = [len(page) for page in fetcher.iter_pages()]
+            fetcher.close()
+        self.assertEqual(sizes, [20, 20, 5])
+
+    def test_unreachable_api_gives_no_posts(self):
+        with PostsApiStub(count=1) as api:
+            url = api.url
+        fetcher = PostFetcher(url, retry_count=1, timeout=1)
+        self.assertEqual(fetcher.fetch(limit=5), [])
+        with self.assertRaises(FetchError):
+            fetcher.fetch_page(0, 5)
+        fetcher.close()
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def fetch(self, api_url, limit, **options):
+        fetcher = PostFetcher(api_url, page_size=10, max_workers=1, retry_count=1, timeout=1,
+                              cache=ResponseCache(self.directory, ttl=options.pop("ttl", 0)), **options)
+        try:
+            return fetcher.fetch_page(0, limit) if options.get("offline") else fetcher.fetch(limit)
+        finally:
+            fetcher.close()
+
+    def test_stale_entry_is_revalidated_with_304(self):
+        with PostsApiStub(count=10) as api:
+            first = self.fetch(api.url, 10)
+            second = self.fetch(api.url, 10)
+        self.assertEqual(first, second)
+        # Both fetches asked the server, the second one got an empty 304
+        self.assertEqual(api.requests, 2)
+
+    def test_fresh_entry_is_served_without_request(self):
+        with PostsApiStub(count=10) as api:
+            first = self.fetch(api.url, 10, ttl=3600)
+            second = self.fetch(api.url, 10, ttl=3600)
+        self.assertEqual(first, second)
+        self.assertEqual(api.requests, 1)
+
+    def test_offline_serves_the_cache_only(self):
+        with PostsApiStub(count=10) as api:
+            online = self.fetch(api.url, 10)
+            url = api.url
+        self.assertEqual(self.fetch(url, 10, offline=True), online)
+        with self.assertRaises(FetchError):
+            PostFetcher(url, offline=True, cache=ResponseCache(self.directory)).fetch_page(100, 10)
+
+    def test_offline_run_with_another_limit_hits_the_cache(self):
+        with PostsApiStub(count=40) as api:
+            online = self.fetch(api.url, 30)
+            url = api.url
+        fetcher = PostFetcher(url, page_size=10, offline=True, cache=ResponseCache(self.directory))
+        self.assertEqual(fetcher.fetch(limit=20), online[:20])
+        self.assertEqual(fetcher.fetch(limit=25), online[:25])
+
+    def test_stale_entry_is_served_when_the_api_is_down(self):
+        with PostsApiStub(count=10) as api:
+            online = self.fetch(api.url, 10)
+            url = api.url
+        self.assertEqual(self.fetch(url, 10), online)
+
+    def test_corrupt_entry_is_ignored(self):
+        cache = ResponseCache(self.directory)
+        path = cache._path("http://api/posts", {"_start": 0})
+        path.write_text("{not json", encoding="utf-8")
+        self.assertIsNone(cache.get("http://api/posts", {"_start": 0}))
+
+
+class FetchCommandTest(unittest.TestCase):
+    def test_failed_fetch_keeps_the_previous_output(self):
+        with tempfile.TemporaryDirectory() as directory, PostsApiStub(count=30) as api:
+            output = Path(directory) / "posts.json"
+            arguments = ["fetch", "--api-url", api.url, "--output-dir", directory, "--output", str(output),
+                         "--page-size", "10", "--fetch-workers", "1"]
+            self.assertEqual(main.main(arguments + ["--limit", "10"]), 0)
+            saved = output.read_text(encoding="utf-8")
+            # Only the first page is cached, the second one fails offline after the first was written
+            self.assertEqual(main.main(arguments + ["--limit", "30", "--offline"]), 1)
+            self.assertEqual(output.read_text(encoding="utf-8"), saved)
+            self.assertEqual(len(json.loads(saved)), 10)
+            self.assertEqual(sorted(path.name for path in Path(directory).glob("posts.json*")), ["posts.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import main
+from src.benchmark.api_stub import PostsApiStub, synthetic_post
+from src.benchmark.fake_gui import create_fake_gui_worker
+from src.gui_workers import GuiWorkerPool
+from src.journal import PROCESSED
+from src.typing_speed import FIXED_INTERVAL
+
+
+def crashing_worker(worker_id, options):
+    """Fake GUI worker whose process dies the first time it gets post 5"""
+    bot = create_fake_gui_worker(worker_id, options)
+    write_post = bot.process_post
+
+    def process_post(post, rendered=None):
+        marker = Path(bot.desktop_path) / "crashed_once"
+        if post["id"] == 5 and not marker.exists():
+            marker.touch()
+            os._exit(3)
+        return write_post(post, rendered)
+
+    bot.process_post = process_post
+    return bot
+
+
+def dropping_worker(worker_id, options):
+    """Fake GUI worker whose desktop loses keystrokes on worker 2 only"""
+    rates = {"keystroke_drop": 0.05} if worker_id == 2 else {}
+    return create_fake_gui_worker(worker_id, {**options, "fake_desktop": {"failure_rates": rates}})
+
+
+class GuiWorkerPoolTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.options = {"backend": "notepad", "limit": None, "use_cache": False, "output_dir": self.directory,
+                        "typing_speed": "fixed"}
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def run_pool(self, factory, posts, workers=3):
+        results = {}
+
+        def on_result(post, result):
+            results[post["id"]] = result
+            return False
+
+        pool = GuiWorkerPool(workers, factory, self.options, use_displays=False, max_restarts=1)
+        return pool, pool.run((synthetic_post(post_id) for post_id in posts), on_result), results
+
+    def test_workers_write_every_post(self):
+        pool, stats, results = self.run_pool(create_fake_gui_worker, range(1, 13))
+        self.assertEqual(sorted(results), list(range(1, 13)))
+        self.assertTrue(all(result["success"] for result in results.values()))
+        self.assertEqual(sum(worker["posts"] for worker in stats), 12)
+        for post_id in range(1, 13):
+            self.assertTrue((Path(self.directory) / f"post_{post_id}.txt").exists())
+        self.assertTrue(all(worker.typing is not None for worker in pool.workers))
+
+    def test_crashed_worker_is_restarted_and_its_post_handed_out_again(self):
+        _, stats, results = self.run_pool(crashing_worker, range(1, 9), workers=2)
+        self.assertEqual(sorted(results), list(range(1, 9)))
+        self.assertTrue(results[5]["success"])
+        self.assertEqual(sum(worker["restarts"] for worker in stats), 1)
+
+
+class NoDisplayPool(GuiWorkerPool):
+    """GuiWorkerPool running dropping_worker bots without Xvfb"""
+
+    def __init__(self, workers, factory, options, **kwargs):
+        super().__init__(workers, dropping_worker, options, use_displays=False, **kwargs)
+
+
+class ParallelTypingSettingsTest(unittest.TestCase):
+    def test_parent_saves_the_merged_settings_once(self):
+        with PostsApiStub(count=12) as api, tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.object(main, "GuiWorkerPool", NoDisplayPool):
+            settings_path = Path(output_dir) / "typing_speed.json"
+            settings_path.write_text(json.dumps({"other-host": {"interval": 0.001, "pause": 0.05}}),
+                                     encoding="utf-8")
+            bot = main.NotepadBot(backend="notepad", api_url=api.url, limit=12, use_cache=False,
+                                  output_dir=output_dir, verify=True, gui_workers=3, repair_attempts=0)
+            bot.action()
+            settings = json.loads(settings_path.read_text(encoding="utf-8"))
+            processed = sum(1 for entry in bot.journal.index.values() if entry["status"] == PROCESSED)
+
+        self.assertGreater(processed, 0)
+        self.assertEqual(settings["other-host"]["interval"], 0.001)
+        # Worker 2 slowed down after its mismatches, the others kept the fixed interval
+        self.assertGreater(settings[bot.typing.host]["interval"], FIXED_INTERVAL)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.backends import write_post_files
+from src.journal import FAILED, PROCESSED, RunJournal, file_digest
+
+
+class RunJournalTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._directory.name)
+        self.path = self.directory / "run_journal.jsonl"
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def write_file(self, name, text):
+        file_path = self.directory / name
+        file_path.write_text(text, encoding="utf-8")
+        return file_path
+
+    def test_resume_skips_intact_outputs_only(self):
+        done = self.write_file("post_1.txt", "one")
+        journal = RunJournal(self.path)
+        journal.record(1, PROCESSED, done)
+        journal.record(2, FAILED)
+        journal.close()
+
+        resumed = RunJournal(self.path)
+        resumed.load()
+        self.assertTrue(resumed.is_done(1, done))
+        self.assertFalse(resumed.is_done(2, self.directory / "post_2.txt"))
+        self.assertFalse(resumed.is_done(3, self.directory / "post_3.txt"))
+        done.unlink()
+        self.assertFalse(resumed.is_done(1, done))
+
+    def test_edit_keeping_size_and_mtime_is_detected(self):
+        done = self.write_file("post_1.txt", "one")
+        journal = RunJournal(self.path)
+        journal.record(1, PROCESSED, done)
+        journal.close()
+        stat = os.stat(done)
+        done.write_text("eno", encoding="utf-8")
+        os.utime(done, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        resumed = RunJournal(self.path)
+        resumed.load()
+        self.assertFalse(resumed.is_done(1, done))
+
+    def test_last_record_of_a_post_wins(self):
+        done = self.write_file("post_1.txt", "one")
+        journal = RunJournal(self.path)
+        journal.record(1, FAILED)
+        journal.record(1, PROCESSED, done)
+        journal.close()
+        self.assertEqual(RunJournal(self.path).load()[1]["status"], PROCESSED)
+
+    def test_torn_last_line_is_ignored_and_terminated(self):
+        self.path.write_text(json.dumps({"post_id": 1, "status": FAILED}) + '\n{"post_id": 2, "sta',
+                             encoding="utf-8")
+        journal = RunJournal(self.path)
+        self.assertEqual(set(journal.load()), {1})
+        journal.record(3, FAILED)
+        journal.record(4, FAILED)
+        journal.close()
+        self.assertEqual(set(RunJournal(self.path).load()), {1, 3, 4})
+
+    def test_shard_fingerprints_match_the_files(self):
+        posts = [{"userId": 1, "id": post_id, "title": "title", "body": "line\nline"} for post_id in (1, 2)]
+        results = write_post_files(posts, self.directory, generated_at="2024-01-01 00:00:00")
+        self.assertEqual([result[:2] for result in results], [(1, True), (2, True)])
+
+        journal = RunJournal(self.path)
+        journal.record_many([(post_id, PROCESSED, self.directory / f"post_{post_id}.txt", None, file_fingerprint)
+                             for post_id, _, file_fingerprint in results])
+        journal.close()
+        for post_id in (1, 2):
+            file_path = self.directory / f"post_{post_id}.txt"
+            self.assertEqual(journal.index[post_id]["sha256"], file_digest(file_path))
+            self.assertIn(b"line\r\nline", file_path.read_bytes())
+            self.assertTrue(journal.is_done(post_id, file_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+from src.logger.log_query import find_post_lines
+from src.logger.log_storage import (INDEX_FILE, SEGMENT_PATTERN, DailyRotatingFileHandler, day_directory,
+                                    enforce_retention, segment_name, stem_module, wait_for_maintenance)
+
+
+def read_segment(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def write_lines(base, name, count, max_bytes):
+    """Log ``count`` numbered lines through a fresh handler, in a spawned process too"""
+    handler = DailyRotatingFileHandler(base, "module", max_bytes=max_bytes, compress=True)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.Logger(f"log_storage_test_{name}")
+    logger.addHandler(handler)
+    for number in range(count):
+        logger.info(f"{name} line {number:03d}")
+    handler.close()
+    wait_for_maintenance()
+
+
+class DailyRotatingFileHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.base = self._directory.name
+        self.handler = None
+
+    def tearDown(self):
+        if self.handler is not None:
+            self.handler.close()
+        wait_for_maintenance()
+        self._directory.cleanup()
+
+    def logger(self, **options):
+        self.handler = DailyRotatingFileHandler(self.base, "module", **options)
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.Logger("log_storage_test")
+        logger.addHandler(self.handler)
+        return logger
+
+    def day_files(self):
+        directory = day_directory(self.base, datetime.now().date())
+        return directory, sorted(os.listdir(directory))
+
+    def lines_by_stem(self):
+        """Lines of the day directory by file name stem, <module> or <module>-<pid>"""
+        directory, names = self.day_files()
+        lines = {}
+        for name in names:
+            match = SEGMENT_PATTERN.match(name)
+            stem = match.group("module") if match else name[:-len(".log")]
+            if name != INDEX_FILE:
+                lines.setdefault(stem, []).extend(read_segment(os.path.join(directory, name)).splitlines())
+        return lines
+
+    def test_size_rollover_keeps_every_line_in_order(self):
+        logger = self.logger(max_bytes=100, compress=True)
+        for number in range(20):
+            logger.info(f"line {number:02d} of the size rollover test")
+        wait_for_maintenance()
+        directory, names = self.day_files()
+        segments = sorted((name for name in names if name.endswith(".log.gz")),
+                          key=lambda name: int(name.split(".")[1]))
+        self.assertGreater(len(segments), 1)
+        self.assertNotIn(segment_name("module", 1), names)
+        text = "".join(read_segment(os.path.join(directory, name)) for name in segments)
+        text += read_segment(os.path.join(directory, "module.log"))
+        self.assertEqual(text.splitlines(), [f"line {number:02d} of the size rollover test" for number in range(20)])
+
+    def test_post_lines_are_indexed_with_their_offset(self):
+        logger = self.logger(max_bytes=60, compress=False)
+        logger.info("starting")
+        logger.info("Processing post 12...")
+        logger.info("Saved post_13.txt")
+        logger.info("done")
+        self.handler.flush()
+        directory, _ = self.day_files()
+        with open(os.path.join(directory, INDEX_FILE), encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([entry["post_id"] for entry in entries], [12, 13])
+        for entry, message in zip(entries, ["Processing post 12...", "Saved post_13.txt"]):
+            name = segment_name("module", entry["segment"])
+            path = os.path.join(directory, name if os.path.exists(os.path.join(directory, name)) else "module.log")
+            with open(path, "rb") as f:
+                f.seek(entry["offset"])
+                self.assertEqual(f.readline().decode("utf-8").rstrip("\n"), message)
+
+    def test_midnight_closes_the_file(self):
+        logger = self.logger(compress=False)
+        logger.info("before midnight")
+        self.handler._day_end = 0
+        logger.info("after midnight")
+        directory, names = self.day_files()
+        self.assertIn(segment_name("module", 1), names)
+        self.assertEqual(read_segment(os.path.join(directory, "module.log")), "after midnight\n")
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_forked_process_rolls_over_its_own_file(self):
+        logger = self.logger(max_bytes=100, compress=True)
+        logger.info("parent before the fork")
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for number in range(20):
+                    logger.info(f"child line {number:02d} about post {number}")
+                wait_for_maintenance()
+            finally:
+                os._exit(0)
+        for number in range(20):
+            logger.info(f"parent line {number:02d} of the fork test")
+        os.waitpid(pid, 0)
+        wait_for_maintenance()
+
+        lines = self.lines_by_stem()
+        self.assertEqual(sorted(lines), ["module", f"module-{pid}"])
+        self.assertEqual(stem_module(f"module-{pid}"), "module")
+        self.assertEqual(sorted(lines["module"]), ["parent before the fork"]
+                         + [f"parent line {number:02d} of the fork test" for number in range(20)])
+        self.assertEqual(sorted(lines[f"module-{pid}"]),
+                         [f"child line {number:02d} about post {number}" for number in range(20)])
+        self.assertEqual(list(find_post_lines(self.base, 7, modules=["module"])), ["child line 07 about post 7"])
+
+    def test_spawned_process_rolls_over_its_own_file(self):
+        child = multiprocessing.get_context("spawn").Process(target=write_lines,
+                                                              args=(self.base, "child", 300, 400))
+        child.start()
+        write_lines(self.base, "parent", 300, 400)
+        child.join()
+        self.assertEqual(child.exitcode, 0)
+
+        lines = self.lines_by_stem()
+        self.assertEqual(sorted(lines), ["module", f"module-{child.pid}"])
+        self.assertEqual(sorted(lines["module"]), [f"parent line {number:03d}" for number in range(300)])
+        self.assertEqual(sorted(lines[f"module-{child.pid}"]), [f"child line {number:03d}" for number in range(300)])
+
+
+class RetentionTest(unittest.TestCase):
+    def test_old_days_are_deleted_and_leftovers_compressed(self):
+        with tempfile.TemporaryDirectory() as base:
+            for day in (date(2024, 1, 1), date(2024, 3, 9), date(2024, 3, 10)):
+                os.makedirs(day_directory(base, day))
+            stopped = os.path.join(day_directory(base, date(2024, 3, 9)), "module.log")
+            with open(stopped, "w", encoding="utf-8") as f:
+                f.write("left by a stopped process\n")
+
+            enforce_retention(base, retention_days=30, compress=True, today=date(2024, 3, 11))
+
+            self.assertFalse(os.path.exists(os.path.join(base, "2024", "01")))
+            names = os.listdir(day_directory(base, date(2024, 3, 9)))
+            self.assertEqual(names, [segment_name("module", 1, compressed=True)])
+
+    def test_total_size_cap_drops_the_oldest_segments(self):
+        with tempfile.TemporaryDirectory() as base:
+            for day in (date(2024, 3, 9), date(2024, 3, 10)):
+                directory = day_directory(base, day)
+                os.makedirs(directory)
+                with open(os.path.join(directory, segment_name("module", 1)), "wb") as f:
+                    f.write(os.urandom(700 * 1024))
+
+            enforce_retention(base, retention_days=0, max_total_mb=1, compress=False, today=date(2024, 3, 10))
+
+            self.assertEqual(os.listdir(day_directory(base, date(2024, 3, 9))), [])
+            self.assertEqual(len(os.listdir(day_directory(base, date(2024, 3, 10)))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
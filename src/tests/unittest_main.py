@@ -0,0 +1,19 @@
+"""
+Entry point of the unit tests, run from the repository root:
+
+    python -m unittest src.tests.unittest_main
+"""
+import unittest
+from pathlib import Path
+
+
+def load_tests(loader, tests, pattern):
+    """Collect the tests of every src/tests/unittest_*.py module"""
+    for path in sorted(Path(__file__).parent.glob("unittest_*.py")):
+        if path.stem != "unittest_main":
+            tests.addTests(loader.loadTestsFromName(f"src.tests.{path.stem}"))
+    return tests
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.packed_store import INDEX_FILE, RECORD_HEADER, PackedStore, PackedStoreError
+
+
+class PackedStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._directory.name) / "packed"
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def store(self, **options):
+        return PackedStore(self.directory, **options)
+
+    def segments(self):
+        return sorted(path.name for path in self.directory.glob("segment_*.pack"))
+
+    def test_documents_are_read_back_after_reopening(self):
+        with self.store() as store:
+            store.append(1, b"one")
+            store.append(2, b"two")
+            self.assertEqual(store.read(2), b"two")
+        with self.store() as store:
+            self.assertEqual((len(store), store.read(1), store.read(2)), (2, b"one", b"two"))
+            with self.assertRaises(PackedStoreError):
+                store.read(3)
+
+    def test_rewritten_post_keeps_the_latest_copy(self):
+        with self.store() as store:
+            store.append(1, b"old")
+            store.append(1, b"new")
+        with self.store() as store:
+            self.assertEqual(store.read(1), b"new")
+
+    def test_segments_roll_over(self):
+        record = RECORD_HEADER.size + 100
+        with self.store(max_segment_bytes=record * 2) as store:
+            for post_id in range(5):
+                store.append(post_id, bytes(100))
+        self.assertEqual(len(self.segments()), 3)
+        with self.store() as store:
+            self.assertEqual(sorted(store.index), list(range(5)))
+
+    def test_unindexed_records_are_recovered(self):
+        with self.store() as store:
+            for post_id in range(3):
+                store.append(post_id, f"post {post_id}".encode())
+        # A crash after the data was synced but before its index lines were written
+        index_path = self.directory / INDEX_FILE
+        index_path.write_text(index_path.read_text(encoding="utf-8").splitlines(keepends=True)[0],
+                              encoding="utf-8")
+        with self.store() as store:
+            self.assertEqual(store.read(2), b"post 2")
+        with self.store() as store:
+            self.assertEqual(len(store), 3)
+
+    def test_torn_record_is_truncated(self):
+        with self.store() as store:
+            store.append(1, b"complete")
+        segment = self.directory / self.segments()[-1]
+        size = segment.stat().st_size
+        with open(segment, "ab") as f:
+            f.write(b"PST1\x02\x00")
+        with self.store() as store:
+            self.assertEqual(segment.stat().st_size, size)
+            store.append(2, b"after")
+        with self.store() as store:
+            self.assertEqual((store.read(1), store.read(2)), (b"complete", b"after"))
+
+    def test_read_only_store_leaves_the_files_alone(self):
+        with self.store() as store:
+            store.append(1, b"complete")
+        segment = self.directory / self.segments()[-1]
+        index_path = self.directory / INDEX_FILE
+        index = index_path.read_bytes()
+        # A record being appended by a running writer, the one before it not indexed yet
+        with self.store(sync_every=1000) as writer:
+            writer.append(2, b"unindexed")
+            writer._segment.flush()
+            with open(segment, "ab") as f:
+                f.write(b"PST1\x02\x00")
+            size = segment.stat().st_size
+            with self.store(read_only=True) as store:
+                self.assertEqual((store.read(1), store.read(2)), (b"complete", b"unindexed"))
+                with self.assertRaises(PackedStoreError):
+                    store.append(3, b"refused")
+            self.assertEqual((segment.stat().st_size, index_path.read_bytes()), (size, index))
+
+    def test_corrupt_record_is_reported(self):
+        with self.store() as store:
+            store.append(1, b"payload")
+        segment = self.directory / self.segments()[-1]
+        data = bytearray(segment.read_bytes())
+        data[-1] ^= 0xFF
+        segment.write_bytes(bytes(data))
+        with self.store() as store, self.assertRaises(PackedStoreError):
+            store.read(1)
+
+    def test_export_writes_files(self):
+        with self.store() as store:
+            store.append(1, b"one\r\n")
+            store.append(2, b"two\r\n")
+            written, failed = store.export(Path(self._directory.name) / "out", post_ids=[1, 2, 3])
+        self.assertEqual((written, failed), (2, [3]))
+        self.assertEqual((Path(self._directory.name) / "out" / "post_1.txt").read_bytes(), b"one\r\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
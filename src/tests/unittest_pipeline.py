@@ -0,0 +1,59 @@
+import itertools
+import threading
+import time
+import unittest
+
+from src.metrics import PhaseMetrics
+from src.pipeline import Pipeline
+
+
+class PipelineTest(unittest.TestCase):
+    def test_items_arrive_in_order_with_their_preparation(self):
+        with Pipeline(range(100), prepare=lambda item: item * 2, queue_size=4) as pipeline:
+            self.assertEqual(list(pipeline), [(item, item * 2) for item in range(100)])
+
+    def test_producer_error_is_raised_after_the_items_before_it(self):
+        def source():
+            yield 1
+            yield 2
+            raise ValueError("page 3 failed")
+
+        received = []
+        with self.assertRaises(ValueError), Pipeline(source()) as pipeline:
+            for item, _ in pipeline:
+                received.append(item)
+        self.assertEqual(received, [1, 2])
+
+    def test_queue_bounds_how_far_the_producer_runs_ahead(self):
+        with Pipeline(itertools.count(), queue_size=3) as pipeline:
+            time.sleep(0.2)
+            # Three queued items and one waiting for room
+            self.assertLessEqual(pipeline.produced, 4)
+
+    def test_cancel_stops_an_endless_source(self):
+        pipeline = Pipeline(itertools.count(), queue_size=2, metrics=PhaseMetrics()).start()
+        consumed = [item for item, _ in itertools.islice(pipeline, 5)]
+        pipeline.cancel()
+        self.assertEqual(consumed, [0, 1, 2, 3, 4])
+        self.assertFalse(pipeline._thread.is_alive())
+        self.assertNotIn("pipeline-producer", [thread.name for thread in threading.enumerate()])
+
+    def test_source_reads_are_timed_in_the_producer(self):
+        metrics = PhaseMetrics()
+        with Pipeline(metrics.timed_iter(range(10), "fetch_posts"), metrics=metrics) as pipeline:
+            self.assertEqual([item for item, _ in pipeline], list(range(10)))
+        # One sample per item, and one for the read that found the source exhausted
+        self.assertEqual(metrics.summary()["fetch_posts"]["count"], 11)
+
+    def test_leaving_the_block_early_cancels(self):
+        prepared = []
+        with Pipeline(range(1000), prepare=prepared.append, queue_size=2) as pipeline:
+            for item, _ in pipeline:
+                if item == 3:
+                    break
+        self.assertLess(len(prepared), 10)
+        self.assertFalse(pipeline._thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import time
+import unittest
+
+from src.profiler import SamplingProfiler
+
+
+def hash_data(seconds):
+    """Keep the calling thread busy in C code that releases the GIL"""
+    data = bytes(1024 * 1024)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        hashlib.sha256(data)
+
+
+class SamplingProfilerTest(unittest.TestCase):
+    def test_idle_helper_threads_are_left_out_of_the_hotspots(self):
+        stop = threading.Event()
+        jobs = queue.Queue()
+        helpers = [threading.Thread(target=stop.wait, name="waiting-helper"),
+                   threading.Thread(target=jobs.get, name="queue-helper")]
+        busy = threading.Thread(target=hash_data, args=(0.3,), name="busy-helper")
+        for helper in helpers:
+            helper.start()
+        sampler = SamplingProfiler(interval=0.005).start()
+        try:
+            busy.start()
+            busy.join()
+        finally:
+            sampler.stop()
+            stop.set()
+            jobs.put(None)
+            for helper in helpers:
+                helper.join()
+
+        spots = sampler.hotspots()
+        functions = [name for name, _ in spots["self"]]
+        self.assertTrue(any(name.startswith("hash_data (unittest_profiler.py") for name in functions))
+        self.assertFalse(any(name.startswith("wait (threading.py") for name in functions))
+        threads = {key[0] for key, count in sampler.stacks.items() if key not in sampler.idle_stacks}
+        self.assertIn("busy-helper", threads)
+        self.assertNotIn("waiting-helper", threads)
+        self.assertNotIn("queue-helper", threads)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.txt")
+            sampler.write_report(path)
+            with open(path, encoding="utf-8") as f:
+                report = f.read()
+        idle_table = report.split("--- Idle helper threads")[1].split("\n\n")[0]
+        self.assertIn("waiting-helper", idle_table)
+        self.assertIn("queue-helper", idle_table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import threading
+import unittest
+
+from src.retry import (CLOSED, DATA, HALF_OPEN, LAUNCH, OPEN, UNKNOWN, WRITE, CircuitBreaker, RetryQueue,
+                       classify_exception)
+
+
+def post(post_id):
+    return {"id": post_id}
+
+
+class RetryQueueTest(unittest.TestCase):
+    def test_backoff_doubles_up_to_the_cap(self):
+        retries = RetryQueue(base_delay=1.0, max_delay=5.0, jitter=0)
+        self.assertEqual([retries.delay(attempts) for attempts in (1, 2, 3, 4)], [1.0, 2.0, 4.0, 5.0])
+
+    def test_jitter_stays_in_bounds_and_is_seeded(self):
+        delays = [RetryQueue(base_delay=1.0, jitter=0.5, seed=3).delay(1) for _ in range(2)]
+        self.assertEqual(delays[0], delays[1])
+        self.assertTrue(0.5 <= delays[0] <= 1.5)
+
+    def test_failed_posts_are_retried_then_given_up(self):
+        retries = RetryQueue(max_retries=2, base_delay=0, jitter=0)
+        self.assertTrue(retries.record_failure(post(1), LAUNCH))
+        self.assertEqual([p["id"] for p in retries.drain()], [1])
+        self.assertTrue(retries.record_failure(post(1), LAUNCH))
+        self.assertFalse(retries.record_failure(post(1), LAUNCH))
+        self.assertEqual(retries.given_up, [1])
+        self.assertEqual(retries.failures[LAUNCH], 3)
+
+    def test_permanent_failures_are_not_retried(self):
+        retries = RetryQueue(max_retries=3)
+        self.assertFalse(retries.record_failure(post(1), DATA))
+        self.assertEqual(len(retries), 0)
+
+    def test_drain_yields_posts_deferred_while_draining(self):
+        retries = RetryQueue(max_retries=1, base_delay=0, jitter=0)
+        retries.record_failure(post(1), WRITE)
+        retries.record_failure(post(2), WRITE)
+        drained = []
+        for deferred in retries.drain():
+            drained.append(deferred["id"])
+            if deferred["id"] == 1:
+                retries.record_success(1)
+        self.assertEqual(drained, [1, 2])
+        self.assertEqual(retries.stats(), {"failures": {WRITE: 2}, "deferred": 2, "retried": 2,
+                                           "recovered": 1, "given_up": 0})
+
+    def test_stop_interrupts_the_backoff(self):
+        retries = RetryQueue(base_delay=60, jitter=0)
+        retries.record_failure(post(1), WRITE)
+        stop = threading.Event()
+        stop.set()
+        self.assertEqual(list(retries.drain(stop)), [])
+        self.assertEqual(retries.abandon(), [1])
+        self.assertEqual(len(retries), 0)
+
+    def test_exceptions_are_classified(self):
+        self.assertEqual(classify_exception(KeyError("title")), DATA)
+        self.assertEqual(classify_exception(PermissionError()), WRITE)
+        self.assertEqual(classify_exception(RuntimeError()), UNKNOWN)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_once_enough_posts_failed(self):
+        breaker = CircuitBreaker(window=4, threshold=0.5, min_samples=4)
+        self.assertEqual([breaker.record(outcome) for outcome in (False, False, True)], [False, False, False])
+        self.assertTrue(breaker.record(True))
+        self.assertEqual((breaker.state, breaker.trips), (OPEN, 1))
+
+    def test_old_outcomes_leave_the_window(self):
+        breaker = CircuitBreaker(window=3, threshold=0.6, min_samples=3)
+        for outcome in (False, True, True, True, False):
+            self.assertFalse(breaker.record(outcome))
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_trial_post_closes_or_reopens(self):
+        breaker = CircuitBreaker(window=2, threshold=0.5, min_samples=1, cooldown=0)
+        self.assertTrue(breaker.record(False))
+        breaker.pause()
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.record(False))
+        self.assertEqual(breaker.trips, 2)
+        breaker.pause()
+        self.assertFalse(breaker.record(True))
+        self.assertEqual((breaker.state, breaker.failure_rate), (CLOSED, 0.0))
+
+    def test_threshold_above_one_never_opens(self):
+        breaker = CircuitBreaker(window=5, threshold=1.1, min_samples=1)
+        self.assertFalse(any(breaker.record(False) for _ in range(10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from src.benchmark.fake_gui import FakeDesktop
+from src.screen_state import (CONFIRM_SAVE, EDITOR_READY, SAVE_DIALOG, STATES_FILE, ScreenStateDetector,
+                              StateTemplate, locate)
+
+
+def save_templates(desktop, directory, states=None):
+    """Save the window faces of a fake desktop as the templates of a screen templates directory"""
+    from PIL import Image
+
+    states = states or {EDITOR_READY: "notepad", SAVE_DIALOG: "Save As", CONFIRM_SAVE: "Confirm Save As"}
+    config = {}
+    for state, kind in states.items():
+        Image.fromarray(desktop.face(kind)).save(Path(directory) / f"{state}.png")
+        config[state] = {"template": f"{state}.png"}
+    with open(Path(directory) / STATES_FILE, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+
+class LocateTest(unittest.TestCase):
+    def setUp(self):
+        self.desktop = FakeDesktop()
+        self.template = StateTemplate(SAVE_DIALOG, self.desktop.face("Save As"))
+
+    def screen_with_dialog_at(self, left, top):
+        self.desktop.windows = []
+        self.desktop._open_dialog("Save As", None)
+        self.desktop.active.position = (left, top)
+        return self.desktop.screenshot().astype(np.float32)
+
+    def test_exact_position_at_every_grid_alignment(self):
+        for position in [(100, 60), (101, 60), (100, 61), (101, 61), (143, 97)]:
+            with self.subTest(position=position):
+                score, found = locate(self.screen_with_dialog_at(*position), self.template)
+                self.assertGreater(score, 0.99)
+                self.assertEqual(found, position)
+
+    def test_other_window_does_not_match(self):
+        self.desktop._open_dialog("Confirm Save As", None)
+        score, _ = locate(self.desktop.screenshot().astype(np.float32), self.template)
+        self.assertLess(score, 0.9)
+
+    def test_blank_template_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StateTemplate("blank", np.full((20, 20), 128, dtype=np.uint8))
+
+
+class ScreenStateDetectorTest(unittest.TestCase):
+    def setUp(self):
+        self.desktop = FakeDesktop()
+        self.captures = []
+
+        def screen(region):
+            self.captures.append(region)
+            return self.desktop.screenshot(region)
+
+        self.screen = screen
+
+    def detector(self, region=None):
+        templates = [StateTemplate(EDITOR_READY, self.desktop.face("notepad")),
+                     StateTemplate(SAVE_DIALOG, self.desktop.face("Save As"), region=region)]
+        return ScreenStateDetector(self.screen, templates)
+
+    def test_detects_window_at_odd_offset(self):
+        self.desktop.launch_notepad()
+        self.desktop.windows[0].visible_at = 0.0
+        self.desktop.windows[0].position = (41, 23)
+        state, position, score = self.detector().detect([SAVE_DIALOG, EDITOR_READY])
+        self.assertEqual((state, position), (EDITOR_READY, (41, 23)))
+        self.assertGreater(score, 0.99)
+
+    def test_only_the_templates_tried_are_counted(self):
+        self.desktop.launch_notepad()
+        self.desktop.windows[0].visible_at = 0.0
+        detector = self.detector()
+        detector.detect([EDITOR_READY, SAVE_DIALOG])
+        detector.detect([SAVE_DIALOG, EDITOR_READY])
+        summary = detector.summary()
+        self.assertEqual((summary[EDITOR_READY]["checks"], summary[EDITOR_READY]["matches"]), (2, 2))
+        # The first detect stopped at the editor, the save dialog was only searched once
+        self.assertEqual((summary[SAVE_DIALOG]["checks"], summary[SAVE_DIALOG]["matches"]), (1, 0))
+        self.assertGreater(summary[SAVE_DIALOG]["mean_ms"], 0)
+
+    def test_region_is_searched_and_reported_in_screen_coordinates(self):
+        self.desktop._open_dialog("Save As", None)
+        self.desktop.active.position = (143, 97)
+        detector = self.detector(region=(120, 80, 200, 100))
+        state, position, _ = detector.detect([SAVE_DIALOG])
+        self.assertEqual((state, position), (SAVE_DIALOG, (143, 97)))
+        self.assertEqual(self.captures, [(120, 80, 200, 100)])
+
+    def test_absent_state_is_none(self):
+        self.desktop._open_dialog("Confirm Save As", None)
+        detector = self.detector()
+        self.assertIsNone(detector.detect([SAVE_DIALOG, EDITOR_READY]))
+        self.assertIsNone(detector.detect(["unknown_state"]))
+        self.assertEqual(detector.summary()[SAVE_DIALOG]["matches"], 0)
+
+    def test_wait_for_times_out(self):
+        self.assertIsNone(self.detector().wait_for(SAVE_DIALOG, timeout=0.05))
+
+    def test_from_directory_reads_states_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            save_templates(self.desktop, directory)
+            detector = ScreenStateDetector.from_directory(directory, self.screen)
+        self.assertEqual(sorted(detector.templates), sorted([EDITOR_READY, SAVE_DIALOG, CONFIRM_SAVE]))
+        self.desktop._open_dialog("Confirm Save As", None)
+        self.assertEqual(detector.detect([CONFIRM_SAVE])[1], (201, 151))
+
+
+class NotepadScreenStatesTest(unittest.TestCase):
+    def test_run_waits_on_screen_states(self):
+        from main import NotepadBot
+        from src.benchmark.api_stub import PostsApiStub
+        from src.journal import PROCESSED
+
+        desktop = FakeDesktop()
+        with PostsApiStub(count=3) as api, tempfile.TemporaryDirectory() as output_dir, \
+                tempfile.TemporaryDirectory() as templates:
+            save_templates(desktop, templates)
+            bot = NotepadBot(backend="notepad", api_url=api.url, limit=3, use_cache=False, output_dir=output_dir,
+                             screen_templates=templates, typing_speed="fixed")
+            desktop.attach(bot)
+            bot.action()
+            processed = [post_id for post_id, entry in bot.journal.index.items() if entry["status"] == PROCESSED]
+
+        self.assertEqual(len(processed), 3)
+        summary = bot.screen.summary()
+        self.assertGreaterEqual(summary[EDITOR_READY]["matches"], 1)
+        self.assertEqual(summary[SAVE_DIALOG]["matches"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
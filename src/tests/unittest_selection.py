@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.selection import IdSet, PostSelector, parse_id_spec
+
+
+def post(post_id, user_id=1, title="title", body="body"):
+    return {"id": post_id, "userId": user_id, "title": title, "body": body}
+
+
+class IdSpecTest(unittest.TestCase):
+    def test_ids_and_ranges(self):
+        self.assertEqual(parse_id_spec("1-5, 8,10-12,"), ({8}, [(1, 5), (10, 12)]))
+        self.assertEqual(parse_id_spec([3, "4-6"]), ({3}, [(4, 6)]))
+        self.assertEqual(parse_id_spec(7), ({7}, []))
+        self.assertEqual(parse_id_spec(None), (set(), []))
+
+    def test_invalid_spec_raises(self):
+        with self.assertRaises(ValueError):
+            parse_id_spec("1-x")
+
+    def test_membership(self):
+        ids = IdSet("1-5,8")
+        self.assertIn(1, ids)
+        self.assertIn(5, ids)
+        self.assertIn(8, ids)
+        self.assertNotIn(6, ids)
+        self.assertFalse(IdSet(""))
+
+
+class PostSelectorTest(unittest.TestCase):
+    def test_everything_is_selected_by_default(self):
+        self.assertTrue(PostSelector().accepts(post(1)))
+
+    def test_include_and_exclude(self):
+        selector = PostSelector(include="1-10", exclude="5")
+        self.assertEqual([post_id for post_id in range(1, 13) if selector.matches(post(post_id))],
+                         [1, 2, 3, 4, 6, 7, 8, 9, 10])
+
+    def test_user_and_text_filters(self):
+        selector = PostSelector(user_ids="2-3", title_regex="^qui", body_regex="est")
+        self.assertTrue(selector.matches(post(1, 2, "quia et", "est rerum")))
+        self.assertFalse(selector.matches(post(1, 1, "quia et", "est rerum")))
+        self.assertFalse(selector.matches(post(1, 2, "et quia", "est rerum")))
+        self.assertFalse(selector.matches(post(1, 2, "quia et", "rerum")))
+
+    def test_body_length_bounds(self):
+        selector = PostSelector(min_body_length=3, max_body_length=5)
+        self.assertEqual([selector.matches(post(1, body="x" * n)) for n in (2, 3, 5, 6)],
+                         [False, True, True, False])
+
+    def test_interactive_mode_asks_only_for_matching_posts(self):
+        asked = []
+        selector = PostSelector(exclude="2", interactive=True)
+        selector.confirm = lambda p: asked.append(p["id"]) or p["id"] == 1
+        self.assertEqual([selector.accepts(post(post_id)) for post_id in (1, 2, 3)], [True, False, False])
+        self.assertEqual(asked, [1, 3])
+
+    def test_selection_file_with_overrides(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "selection.yaml"
+            path.write_text("include: 1-3\nexclude: [2]\nmin_body_length: 1\n", encoding="utf-8")
+            selector = PostSelector.from_file(path, exclude="3", max_body_length=None)
+        self.assertEqual([post_id for post_id in range(1, 5) if selector.matches(post(post_id))], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
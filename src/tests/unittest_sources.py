@@ -0,0 +1,28 @@
+import contextlib
+import io
+import unittest
+
+import main
+from src.sources import SourceError, open_source, parse_field_map
+
+
+class SourceOptionsTest(unittest.TestCase):
+    def test_field_map_is_parsed(self):
+        self.assertEqual(parse_field_map("title=subject, body=text"), {"title": "subject", "body": "text"})
+        with self.assertRaises(SourceError):
+            parse_field_map("subject")
+
+    def test_unsupported_input_file_is_a_source_error(self):
+        with self.assertRaises(SourceError):
+            open_source("data.txt")
+
+    def test_bad_input_options_are_usage_errors(self):
+        for arguments in (["render", "--input", "data.txt"], ["render", "--field-map", "subject"]):
+            with self.assertRaises(SystemExit) as raised, contextlib.redirect_stderr(io.StringIO()) as stderr:
+                main.main(arguments)
+            self.assertEqual(raised.exception.code, 2)
+            self.assertIn("error:", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.typing_speed import FIXED_INTERVAL, FIXED_PAUSE, TypingSpeedController
+
+
+class TypingSpeedControllerTest(unittest.TestCase):
+    def controller(self, **kwargs):
+        return TypingSpeedController(host="test-host", speedup_after=2, **kwargs).load()
+
+    def test_new_host_starts_from_fixed_settings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            typing = self.controller(path=Path(directory) / "typing_speed.json")
+        self.assertEqual((typing.interval, typing.pause), (FIXED_INTERVAL, FIXED_PAUSE))
+
+    def test_unverified_posts_never_speed_up(self):
+        typing = self.controller()
+        for _ in range(10):
+            typing.record_post(None)
+        self.assertEqual((typing.interval, typing.pause), (FIXED_INTERVAL, FIXED_PAUSE))
+        self.assertEqual(typing.adjustments, 0)
+
+    def test_verified_streak_speeds_up_and_mismatch_slows_down(self):
+        typing = self.controller()
+        typing.record_post(True)
+        typing.record_post(True)
+        self.assertAlmostEqual(typing.interval, FIXED_INTERVAL * 0.8)
+        self.assertAlmostEqual(typing.pause, FIXED_PAUSE * 0.8)
+        typing.record_post(False)
+        self.assertAlmostEqual(typing.interval, FIXED_INTERVAL * 0.8 * 2)
+        self.assertEqual(typing.clean_streak, 0)
+
+    def test_dialog_and_focus_loss_lengthen_the_pause(self):
+        pauses = []
+        typing = self.controller()
+        typing.on_pause_change = pauses.append
+        typing.record_focus_loss()
+        typing.record_dialog(0, timed_out=True)
+        self.assertEqual(pauses, [FIXED_PAUSE * 2, FIXED_PAUSE * 4])
+
+    def test_bounds_are_kept(self):
+        typing = self.controller(bounds={"max_interval": 0.015})
+        typing.record_post(False)
+        typing.record_post(False)
+        self.assertEqual(typing.interval, 0.015)
+
+    def test_settings_are_saved_per_host(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "typing_speed.json"
+            path.write_text(json.dumps({"other-host": {"interval": 0.001, "pause": 0.05}}), encoding="utf-8")
+            typing = self.controller(path=path)
+            typing.record_post(False)
+            self.assertTrue(typing.save())
+            reloaded = self.controller(path=path)
+            settings = json.loads(path.read_text(encoding="utf-8"))
+        self.assertEqual(reloaded.interval, FIXED_INTERVAL * 2)
+        self.assertEqual(settings["other-host"]["interval"], 0.001)
+
+    def test_merge_keeps_the_slowest_learned_settings(self):
+        typing = self.controller()
+        typing.merge([{"interval": 0.05, "pause": 0.5, "adjustments": 0},
+                      {"interval": 0.008, "pause": 0.08, "adjustments": 1},
+                      {"interval": 0.02, "pause": 0.06, "adjustments": 2}, None])
+        self.assertEqual((typing.interval, typing.pause, typing.adjustments), (0.02, 0.08, 3))
+        typing.merge([{"interval": 0.05, "pause": 0.5, "adjustments": 0}])
+        self.assertEqual(typing.interval, 0.02)
+
+    def test_fixed_mode_ignores_outcomes(self):
+        typing = self.controller(adaptive=False)
+        typing.record_post(False)
+        typing.record_focus_loss()
+        self.assertEqual((typing.interval, typing.pause), (FIXED_INTERVAL, FIXED_PAUSE))
+        self.assertFalse(typing.save())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.backends import write_post_file
+from src.verifier import MISMATCH, MISSING, OK, OutputVerifier, first_difference
+
+POST = {"userId": 1, "id": 7, "title": "sunt aut facere", "body": "quia et suscipit\nsuscipit recusandae"}
+
+
+class OutputVerifierTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._directory.name)
+        self.path = self.directory / "post_7.txt"
+        self.verifier = OutputVerifier()
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_saved_file_matches_whatever_its_timestamp(self):
+        write_post_file(POST, self.directory, generated_at="2024-05-01 12:34:56")
+        result = self.verifier.verify(POST, self.path)
+        self.assertEqual(result["status"], OK)
+        self.assertEqual(result["actual_size"], result["expected_size"])
+
+    def test_missing_file(self):
+        self.assertEqual(self.verifier.verify(POST, self.path)["status"], MISSING)
+
+    def test_dropped_keystroke_points_at_its_line(self):
+        write_post_file(POST, self.directory, generated_at="2024-05-01 12:34:56")
+        self.path.write_bytes(self.path.read_bytes().replace(b"recusandae", b"recusande"))
+        result = self.verifier.verify(POST, self.path)
+        self.assertEqual(result["status"], MISMATCH)
+        self.assertEqual(result["line"], 8)
+
+    def test_line_endings_are_checked(self):
+        write_post_file(POST, self.directory, generated_at="2024-05-01 12:34:56", newline="\n")
+        self.assertEqual(self.verifier.verify(POST, self.path)["status"], MISMATCH)
+        self.assertEqual(OutputVerifier(newline="\n").verify(POST, self.path)["status"], OK)
+
+    def test_truncated_file(self):
+        self.assertEqual(first_difference([b"a\n", b"b\n"], [b"a\n"]), 2)
+        self.assertIsNone(first_difference([b"a\n"], [b"a\n"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
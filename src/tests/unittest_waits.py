@@ -0,0 +1,117 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from src.waits import WaitEngine, WindowProvider, match_title
+
+
+class ScriptedWindowProvider(WindowProvider):
+    """WindowProvider replaying a list of window title snapshots, one per listing, the last one forever"""
+
+    version = "scripted"
+
+    def __init__(self, snapshots, active=None):
+        self.snapshots = list(snapshots)
+        self.active = active
+        self.listings = 0
+
+    def get_titles(self):
+        self.listings += 1
+        if len(self.snapshots) > 1:
+            return self.snapshots.pop(0)
+        return self.snapshots[0]
+
+    def get_windows(self, title):
+        return [t for t in self.get_titles() if title.upper() in t.upper()]
+
+    def get_active_title(self):
+        return self.active
+
+
+class FailingWindowProvider(WindowProvider):
+    def get_titles(self):
+        raise OSError("no display")
+
+
+class MatchTitleTest(unittest.TestCase):
+    def test_exact_match_follows_candidate_priority(self):
+        titles = ["Save As", "Untitled - Notepad"]
+        self.assertEqual(match_title(titles, ["Confirm Save As", "Save As"]), "Save As")
+        self.assertIsNone(match_title(titles, ["Notepad"]))
+
+    def test_partial_match_ignores_case(self):
+        self.assertEqual(match_title(["*post_1.txt - Notepad"], ["notepad"], partial=True), "notepad")
+        self.assertIsNone(match_title([], ["Notepad"], partial=True))
+
+
+class WaitEngineTest(unittest.TestCase):
+    def engine(self, provider):
+        return WaitEngine(provider, initial_interval=0.001, max_interval=0.004)
+
+    def test_met_condition_returns_without_sleeping(self):
+        started = time.perf_counter()
+        self.assertEqual(self.engine(None).wait_until(lambda: "ready", timeout=1), "ready")
+        self.assertLess(time.perf_counter() - started, 0.05)
+
+    def test_timeout_returns_none_and_backs_off(self):
+        polls = []
+        engine = WaitEngine(None, initial_interval=0.01, max_interval=0.04, backoff=2)
+        started = time.perf_counter()
+        self.assertIsNone(engine.wait_until(lambda: polls.append(time.perf_counter()), timeout=0.2))
+        self.assertGreaterEqual(time.perf_counter() - started, 0.2)
+        # 10, 20 then 40 ms between polls: far fewer polls than a fixed 10 ms loop
+        self.assertLess(len(polls), 12)
+
+    def test_waits_for_window_to_appear(self):
+        provider = ScriptedWindowProvider([[], [], ["Untitled - Notepad"], ["Untitled - Notepad", "Save As"]])
+        engine = self.engine(provider)
+        self.assertEqual(engine.wait_for_window(["Notepad"], partial=True, timeout=1), "Notepad")
+        self.assertEqual(provider.listings, 3)
+        self.assertEqual(engine.wait_for_window(["Confirm Save As", "Save As"], timeout=1), "Save As")
+
+    def test_window_that_never_appears_times_out(self):
+        engine = self.engine(ScriptedWindowProvider([["Untitled - Notepad"]]))
+        self.assertIsNone(engine.wait_for_window(["Save As"], timeout=0.05))
+
+    def test_waits_for_window_to_close(self):
+        provider = ScriptedWindowProvider([["post_1.txt - Notepad"], ["post_1.txt - Notepad"], []])
+        self.assertTrue(self.engine(provider).wait_for_window_closed("Notepad", partial=True, timeout=1))
+        provider = ScriptedWindowProvider([["post_1.txt - Notepad"]])
+        self.assertFalse(self.engine(provider).wait_for_window_closed("Notepad", partial=True, timeout=0.05))
+
+    def test_waits_for_focus(self):
+        provider = ScriptedWindowProvider([[]], active="Save As")
+        engine = self.engine(provider)
+        self.assertTrue(engine.wait_for_active_window("Save As", timeout=0.05))
+        self.assertFalse(engine.wait_for_active_window("Untitled - Notepad", timeout=0.05))
+
+    def test_provider_errors_count_as_not_found(self):
+        engine = self.engine(FailingWindowProvider())
+        self.assertIsNone(engine.find_window(["Notepad"]))
+        self.assertIsNone(engine.wait_for_window(["Notepad"], timeout=0.02))
+
+    def test_waits_for_file_to_stop_growing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "post_1.txt"
+
+            def write_slowly():
+                with open(path, "w", encoding="utf-8") as f:
+                    for _ in range(3):
+                        f.write("text")
+                        f.flush()
+                        time.sleep(0.02)
+
+            writer = threading.Thread(target=write_slowly)
+            writer.start()
+            try:
+                self.assertTrue(self.engine(None).wait_for_file(path, timeout=2, stable_for=0.15))
+            finally:
+                writer.join()
+            self.assertEqual(path.read_text(encoding="utf-8"), "text" * 3)
+            self.assertFalse(self.engine(None).wait_for_file(Path(directory) / "missing.txt", timeout=0.05))
+
+
+if __name__ == "__main__":
+    unittest.main()
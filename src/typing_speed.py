@@ -0,0 +1,209 @@
+import json
+import os
+import socket
+import time
+from pathlib import Path
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the typing speed module
+logger = get_logger("typing_speed")
+
+# Conservative settings, fine on the slowest machine and where a host without learned settings starts
+FIXED_INTERVAL = 0.01
+FIXED_PAUSE = 0.1
+
+# Hard bounds the controller never leaves, in seconds
+DEFAULT_BOUNDS = {
+    "min_interval": 0.0,
+    "max_interval": 0.05,
+    "min_pause": 0.02,
+    "max_pause": 0.5,
+}
+
+# Below these the multiplicative steps would never reach the floor, snap to it instead
+MIN_STEP_INTERVAL = 0.0005
+MIN_STEP_PAUSE = 0.005
+
+
+class TypingSpeedController:
+    """
+    Tunes the per-key interval and the pause after every GUI action of a host
+
+    Multiplicative steps on both sides, applied to delays: a bad outcome
+    multiplies the delay it points at by ``backoff`` (a verification
+    mismatch slows typing down, a lost focus or a slow dialog lengthens the
+    pause), while ``speedup_after`` verified posts in a row shorten both by
+    ``speedup``. A host starts from the conservative fixed settings and
+    only gets faster on verified posts, so typing never speeds up without
+    evidence that the files still match; without verification the settings
+    can only slow down. The learned settings are stored per host name in a
+    JSON file and reloaded by the next run.
+    """
+
+    def __init__(self, path=None, adaptive=True, bounds=None, backoff=2.0, speedup=0.8, speedup_after=20,
+                 host=None):
+        """
+        Args:
+            path (Path): JSON file with the settings of every host, None to keep them in memory
+            adaptive (bool): False keeps the conservative fixed settings
+            bounds (dict): Overrides of DEFAULT_BOUNDS
+            backoff (float): Factor applied to a delay after a bad outcome
+            speedup (float): Factor applied to the delays after a clean streak
+            speedup_after (int): Clean posts in a row needed to speed up
+            host (str): Name the settings are stored under, the host name by default
+        """
+        self.path = Path(path) if path else None
+        self.adaptive = adaptive
+        self.bounds = {**DEFAULT_BOUNDS, **(bounds or {})}
+        self.backoff = backoff
+        self.speedup = speedup
+        self.speedup_after = max(1, speedup_after)
+        self.host = host or socket.gethostname()
+        self.interval = FIXED_INTERVAL
+        self.pause = FIXED_PAUSE
+        self.clean_streak = 0
+        self.adjustments = 0
+        # Called with the new pause whenever it changes, so the driver can apply it
+        self.on_pause_change = None
+
+    def _clamp(self, value, low, high):
+        return min(max(value, self.bounds[low]), self.bounds[high])
+
+    def load(self):
+        """Start from the settings learned on this host, or from the fixed ones"""
+        if not self.adaptive:
+            return self
+        self.interval, self.pause = FIXED_INTERVAL, FIXED_PAUSE
+        settings = self._read_all().get(self.host)
+        if settings:
+            self.interval = settings.get("interval", self.interval)
+            self.pause = settings.get("pause", self.pause)
+            logger.info(f"Loaded typing settings for {self.host}: interval {self.interval * 1000:.1f} ms, "
+                        f"pause {self.pause * 1000:.0f} ms")
+        else:
+            logger.info(f"No typing settings learned for {self.host} yet, starting from the fixed settings")
+        self.interval = self._clamp(self.interval, "min_interval", "max_interval")
+        self.pause = self._clamp(self.pause, "min_pause", "max_pause")
+        return self
+
+    def _read_all(self):
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable typing settings {self.path}: {str(e)}")
+            return {}
+
+    def save(self):
+        """Store the settings of this host, keeping those of the other hosts"""
+        if not self.adaptive or self.path is None:
+            return False
+        try:
+            settings = self._read_all()
+            settings[self.host] = {"interval": self.interval, "pause": self.pause,
+                                   "updated": time.strftime('%Y-%m-%d %H:%M:%S')}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(settings, f, indent=2)
+            os.replace(tmp_path, self.path)
+            logger.info(f"Saved typing settings for {self.host} to {self.path}")
+            return True
+        except OSError as e:
+            logger.warning(f"Failed to save typing settings: {str(e)}")
+            return False
+
+    def settings(self):
+        """Current settings and number of adjustments, e.g. to report them to another process"""
+        return {"interval": self.interval, "pause": self.pause, "adjustments": self.adjustments}
+
+    def merge(self, reports):
+        """
+        Adopt the settings learned by several workers of this host
+
+        Workers that never adjusted their settings learned nothing; of the
+        others the slowest settings are kept, the only ones every worker
+        found safe.
+
+        Args:
+            reports (iterable): settings() of every worker
+        """
+        if not self.adaptive:
+            return
+        learned = [report for report in reports if report and report["adjustments"]]
+        if not learned:
+            return
+        self.interval = self._clamp(max(report["interval"] for report in learned), "min_interval", "max_interval")
+        self.pause = self._clamp(max(report["pause"] for report in learned), "min_pause", "max_pause")
+        self.adjustments += sum(report["adjustments"] for report in learned)
+        logger.info(f"Merged the typing settings of {len(learned)} workers: interval {self.interval * 1000:.1f} ms, "
+                    f"pause {self.pause * 1000:.0f} ms")
+
+    def _set(self, interval=None, pause=None, reason=""):
+        if interval is not None:
+            self.interval = self._clamp(interval, "min_interval", "max_interval")
+        if pause is not None:
+            new_pause = self._clamp(pause, "min_pause", "max_pause")
+            if new_pause != self.pause:
+                self.pause = new_pause
+                if self.on_pause_change is not None:
+                    self.on_pause_change(self.pause)
+        self.adjustments += 1
+        logger.info(f"Typing {reason}: interval {self.interval * 1000:.1f} ms, pause {self.pause * 1000:.0f} ms")
+
+    def _slower(self, value, minimum):
+        return max(value, minimum) * self.backoff
+
+    def _faster(self, value, minimum):
+        value *= self.speedup
+        return 0.0 if value < minimum else value
+
+    def record_post(self, verified):
+        """
+        Report the outcome of a post
+
+        Args:
+            verified (bool): True if the file matched the post, False on a
+                mismatch, None when the post was not verified
+        """
+        if not self.adaptive:
+            return
+        if verified is False:
+            self.clean_streak = 0
+            self._set(interval=self._slower(self.interval, MIN_STEP_INTERVAL), reason="slowed down after a mismatch")
+            return
+        if verified is None:
+            # An unverified post proves nothing about dropped keystrokes
+            return
+        self.clean_streak += 1
+        if self.clean_streak < self.speedup_after:
+            return
+        self.clean_streak = 0
+        interval = self._faster(self.interval, MIN_STEP_INTERVAL)
+        if interval != self.interval or self.pause > self.bounds["min_pause"]:
+            self._set(interval=interval, pause=self._faster(self.pause, MIN_STEP_PAUSE),
+                      reason=f"sped up after {self.speedup_after} verified posts")
+
+    def record_focus_loss(self):
+        """Report a window that did not get the focus in time"""
+        if not self.adaptive:
+            return
+        self.clean_streak = 0
+        self._set(pause=self._slower(self.pause, MIN_STEP_PAUSE), reason="slowed down after a focus loss")
+
+    def record_dialog(self, seconds, timed_out=False):
+        """
+        Report how long a dialog took to appear
+
+        A dialog that never appeared, or took longer than ten pauses, means
+        the desktop cannot keep up with the actions.
+        """
+        if not self.adaptive:
+            return
+        if timed_out or seconds > 10 * self.pause:
+            self.clean_streak = 0
+            self._set(pause=self._slower(self.pause, MIN_STEP_PAUSE),
+                      reason=f"slowed down after a {'missing' if timed_out else 'slow'} dialog")
@@ -0,0 +1,111 @@
+import hashlib
+import re
+
+from src.backends import render_post
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the verifier module
+logger = get_logger("verifier")
+
+OK = "ok"
+MISSING = "missing"
+MISMATCH = "mismatch"
+
+# The footer timestamp differs between the rendering and the saved file, it is hashed as a placeholder
+TIMESTAMP_LINE = re.compile(rb"^Generated: \d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\r?\n)?$")
+NORMALISED_TIMESTAMP = b"Generated: <timestamp>"
+
+
+def normalise_line(line):
+    """Replace the timestamp of a footer line, keeping its line ending"""
+    match = TIMESTAMP_LINE.match(line)
+    if match is None:
+        return line
+    return NORMALISED_TIMESTAMP + (match.group(1) or b"")
+
+
+def normalised_digest(lines):
+    """
+    Hash lines with the footer timestamp normalised
+
+    Returns:
+        tuple: (SHA-256 hex digest, number of bytes hashed before normalisation)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for line in lines:
+        size += len(line)
+        digest.update(normalise_line(line))
+    return digest.hexdigest(), size
+
+
+def first_difference(expected_lines, actual_lines):
+    """Return the 1-based number of the first line that differs, None if the lines are equal"""
+    expected_lines = iter(expected_lines)
+    number = 0
+    for number, actual in enumerate(actual_lines, 1):
+        expected = next(expected_lines, None)
+        if expected is None or normalise_line(expected) != normalise_line(actual):
+            return number
+    # The file ends early
+    return number + 1 if next(expected_lines, None) is not None else None
+
+
+class OutputVerifier:
+    """
+    Compares saved post files with the document the post should produce
+
+    The file is read line by line and hashed as it streams, so checking a
+    post costs one sequential read and never holds the file in memory. Both
+    sides are hashed with the "Generated:" timestamp replaced by a
+    placeholder, as it is taken when the post is typed.
+    """
+
+    def __init__(self, newline="\r\n", encoding="utf-8"):
+        """
+        Args:
+            newline (str): Line ending Notepad saves for every typed Enter
+            encoding (str): Encoding the files are saved in
+        """
+        self.newline = newline
+        self.encoding = encoding
+
+    def expected_lines(self, post):
+        """Return the lines of the file a post should produce, as bytes"""
+        text = render_post(post, "0000-00-00 00:00:00").replace("\n", self.newline)
+        return text.encode(self.encoding).splitlines(keepends=True)
+
+    def verify(self, post, file_path):
+        """
+        Check a saved file against the post
+
+        Args:
+            post (dict): Post the file was written from
+            file_path (Path): Saved file
+
+        Returns:
+            dict: ``status`` (OK, MISSING or MISMATCH), the expected and actual
+                digests and sizes and, for a mismatch, the first differing ``line``
+        """
+        expected_lines = self.expected_lines(post)
+        expected_sha256, expected_size = normalised_digest(expected_lines)
+        result = {"post_id": post["id"], "file": str(file_path), "expected_sha256": expected_sha256,
+                  "expected_size": expected_size}
+        try:
+            with open(file_path, "rb") as f:
+                actual_sha256, actual_size = normalised_digest(f)
+        except OSError as e:
+            logger.debug(f"Cannot read {file_path}: {str(e)}")
+            result["status"] = MISSING
+            return result
+
+        result.update(actual_sha256=actual_sha256, actual_size=actual_size)
+        if actual_sha256 == expected_sha256:
+            result["status"] = OK
+            return result
+
+        # Only mismatches are read a second time, to point at the damage
+        with open(file_path, "rb") as f:
+            result["line"] = first_difference(expected_lines, f)
+        result["status"] = MISMATCH
+        return result
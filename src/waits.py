@@ -0,0 +1,244 @@
+import re
+import subprocess
+import time
+from pathlib import Path
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the waits module
+logger = get_logger("waits")
+
+
+class WindowProvider:
+    """
+    Access to the desktop windows, the only thing the wait engine looks at
+
+    Windows returned by get_windows need a ``title`` attribute and
+    ``activate()``/``close()`` methods, like pygetwindow windows.
+    """
+
+    version = None
+
+    def get_titles(self):
+        """Return the titles of all open windows"""
+        raise NotImplementedError
+
+    def get_windows(self, title):
+        """Return the windows whose title contains ``title`` (case insensitive)"""
+        raise NotImplementedError
+
+    def get_active_title(self):
+        """Return the title of the focused window, or None"""
+        raise NotImplementedError
+
+
+class PyGetWindowProvider(WindowProvider):
+    """Window provider backed by pygetwindow, imported on first use"""
+
+    def __init__(self):
+        self._gw = None
+
+    @property
+    def gw(self):
+        if self._gw is None:
+            import pygetwindow
+            self._gw = pygetwindow
+        return self._gw
+
+    @property
+    def version(self):
+        return self.gw.__version__
+
+    def get_titles(self):
+        return self.gw.getAllTitles()
+
+    def get_windows(self, title):
+        return self.gw.getWindowsWithTitle(title)
+
+    def get_active_title(self):
+        return self.gw.getActiveWindowTitle()
+
+
+class XdotoolWindow:
+    """An X11 window, addressed by its ID through xdotool"""
+
+    def __init__(self, provider, window_id):
+        self.provider = provider
+        self.window_id = window_id
+
+    @property
+    def title(self):
+        return self.provider.run("getwindowname", self.window_id)
+
+    def activate(self):
+        self.provider.run("windowactivate", "--sync", self.window_id)
+
+    def close(self):
+        self.provider.run("windowclose", self.window_id)
+
+    def __eq__(self, other):
+        return isinstance(other, XdotoolWindow) and other.window_id == self.window_id
+
+    def __hash__(self):
+        return hash(self.window_id)
+
+
+class XdotoolWindowProvider(WindowProvider):
+    """
+    Window provider for X11 displays (e.g. Xvfb), where pygetwindow is not supported
+
+    Runs the xdotool command line tool against the display in $DISPLAY.
+    """
+
+    def __init__(self, command="xdotool", timeout=5):
+        self.command = command
+        self.timeout = timeout
+
+    @property
+    def version(self):
+        try:
+            return self.run("version")
+        except OSError:
+            return None
+
+    def run(self, *args):
+        """Run an xdotool command and return its output, empty when nothing matched"""
+        result = subprocess.run([self.command, *args], capture_output=True, text=True, timeout=self.timeout)
+        return result.stdout.strip()
+
+    def _search(self, title):
+        output = self.run("search", "--onlyvisible", "--name", re.escape(title))
+        return [XdotoolWindow(self, window_id) for window_id in output.split()]
+
+    def get_titles(self):
+        return [window.title for window in self._search("")]
+
+    def get_windows(self, title):
+        return self._search(title)
+
+    def get_active_title(self):
+        return self.run("getactivewindow", "getwindowname") or None
+
+
+def match_title(titles, candidates, partial=False):
+    """
+    Return the first candidate present in ``titles``, or None
+
+    Args:
+        titles (list): Titles of the open windows
+        candidates (list): Titles to look for, in priority order
+        partial (bool): Whether a case insensitive substring match is enough
+    """
+    if partial:
+        upper_titles = [t.upper() for t in titles]
+        for candidate in candidates:
+            if any(candidate.upper() in t for t in upper_titles):
+                return candidate
+    else:
+        title_set = set(titles)
+        for candidate in candidates:
+            if candidate in title_set:
+                return candidate
+    return None
+
+
+class WaitEngine:
+    """
+    Wait on desktop conditions instead of sleeping for fixed delays
+
+    Conditions are polled with an interval that starts short and grows
+    geometrically up to ``max_interval``, so a condition that is already
+    met returns immediately and a slow one does not busy-loop.
+    """
+
+    def __init__(self, provider, initial_interval=0.01, max_interval=0.2, backoff=1.5):
+        """
+        Args:
+            provider (WindowProvider): Source of window information
+            initial_interval (float): First polling interval in seconds
+            max_interval (float): Upper bound of the polling interval
+            backoff (float): Factor applied to the interval after each poll
+        """
+        self.provider = provider
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def wait_until(self, condition, timeout=5, description="condition"):
+        """
+        Poll ``condition`` until it returns a truthy value or the timeout expires
+
+        Returns:
+            The truthy value returned by the condition, or None on timeout
+        """
+        start_time = time.perf_counter()
+        deadline = start_time + timeout
+        interval = self.initial_interval
+        while True:
+            result = condition()
+            if result:
+                logger.debug(f"{description} met after {time.perf_counter() - start_time:.3f}s")
+                return result
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                logger.debug(f"{description} not met after {timeout} seconds")
+                return None
+            time.sleep(min(interval, remaining))
+            interval = min(interval * self.backoff, self.max_interval)
+
+    def find_window(self, titles, partial=False):
+        """Check all ``titles`` against the open windows in a single pass"""
+        try:
+            return match_title(self.provider.get_titles(), titles, partial)
+        except Exception as e:
+            logger.error(f"Error listing windows: {str(e)}")
+            return None
+
+    def wait_for_window(self, titles, partial=False, timeout=5):
+        """
+        Wait until one of ``titles`` is open
+
+        Returns:
+            str: The title that appeared first, or None on timeout
+        """
+        return self.wait_until(lambda: self.find_window(titles, partial), timeout,
+                               f"Window {titles}")
+
+    def wait_for_window_closed(self, title, partial=False, timeout=5):
+        """Wait until no window matches ``title``, returns True once it is gone"""
+        return bool(self.wait_until(lambda: self.find_window([title], partial) is None, timeout,
+                                    f"Window '{title}' closed"))
+
+    def wait_for_active_window(self, title, timeout=2):
+        """Wait until the window titled ``title`` has the focus"""
+        def is_active():
+            try:
+                return self.provider.get_active_title() == title
+            except Exception:
+                return False
+
+        return bool(self.wait_until(is_active, timeout, f"Window '{title}' active"))
+
+    def wait_for_file(self, path, timeout=5, stable_for=0.1):
+        """
+        Wait until ``path`` exists and its size has not changed for ``stable_for`` seconds
+
+        Returns:
+            bool: True once the file is complete, False on timeout
+        """
+        path = Path(path)
+        state = {"size": None, "since": None}
+
+        def is_stable():
+            try:
+                size = path.stat().st_size
+            except OSError:
+                state["size"] = None
+                return False
+            now = time.perf_counter()
+            if size != state["size"]:
+                state["size"], state["since"] = size, now
+                return False
+            return now - state["since"] >= stable_for
+
+        return bool(self.wait_until(is_stable, timeout, f"File '{path.name}' written"))
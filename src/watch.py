@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from src.logger.custom_logger import get_logger
+
+# Get a logger for the watch module
+logger = get_logger("watch")
+
+STATE_VERSION = 1
+
+
+def post_fingerprint(post):
+    """Short hash of the fields a post file is rendered from"""
+    data = json.dumps([post["userId"], post["title"], post["body"]], ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+class FingerprintIndex:
+    """
+    Persistent fingerprint of every post written so far, for watch mode
+
+    A post is processed again only when its fingerprint differs from the
+    one stored after it was last written. Fingerprints are computed when a
+    post is selected and only committed once it was written successfully,
+    so a post that failed is retried on the next cycle. The state file is
+    rewritten atomically after every cycle.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (Path): JSON state file, created after the first cycle
+        """
+        self.path = Path(path)
+        self.fingerprints = {}
+        self.cycles = 0
+        self.last_cycle = None
+        self._pending = {}
+
+    def load(self):
+        """Load the state of the previous cycles, starting empty if there is none"""
+        if not self.path.exists():
+            logger.info(f"No watch state at {self.path}, every post is new")
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.fingerprints = {int(post_id): fingerprint
+                                 for post_id, fingerprint in state.get("fingerprints", {}).items()}
+            self.cycles = state.get("cycles", 0)
+            self.last_cycle = state.get("last_cycle")
+            logger.info(f"Loaded watch state: {len(self.fingerprints)} posts after {self.cycles} cycles "
+                        f"(last at {self.last_cycle})")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable watch state {self.path}: {str(e)}")
+        return self
+
+    def changed(self, post):
+        """Check whether a post is new or changed, and remember its fingerprint until commit()"""
+        fingerprint = post_fingerprint(post)
+        if self.fingerprints.get(post["id"]) == fingerprint:
+            return False
+        self._pending[post["id"]] = fingerprint
+        return True
+
+    def forget(self, post_id):
+        """Drop the fingerprint of a post, e.g. when its output file is gone"""
+        self.fingerprints.pop(post_id, None)
+
+    def commit(self, post_ids):
+        """Store the fingerprints of the posts that were written"""
+        for post_id in post_ids:
+            fingerprint = self._pending.pop(post_id, None)
+            if fingerprint is not None:
+                self.fingerprints[post_id] = fingerprint
+
+    def save(self):
+        """Write the state file, forgetting fingerprints of posts that were not written"""
+        self._pending = {}
+        self.cycles += 1
+        self.last_cycle = time.strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": STATE_VERSION, "cycles": self.cycles, "last_cycle": self.last_cycle,
+                           "fingerprints": self.fingerprints}, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            logger.error(f"Failed to save the watch state: {str(e)}")
+            return False
+
+    def __len__(self):
+        return len(self.fingerprints)